@@ -2,7 +2,7 @@ import argparse
 import os
 
 from metrics.data_vendor import DataVendor
-from metrics.calc.events import CalculateMetrics
+from metrics.calc.events import AggregationKey, CalculateMetrics, JobPartition, SensorSharding
 
 from metrics.utils.precipitation import PrecipitationType
 from rich.console import Console
@@ -21,7 +21,12 @@ def _run_events(args: argparse.Namespace):
                 f"- forecast_offsets = {args.offsets}\n"
                 f"- observations_offset = {args.observations_offset}\n"
                 f"- sensor_selection_path = {args.filter_sensors_dir}\n"
-                f"- process_num = {args.process_num}\n")
+                f"- process_num = {args.process_num}\n"
+                f"- partition = {args.partition}\n"
+                f"- sensor_shards = {args.sensor_shards}\n"
+                f"- shard_by = {args.shard_by}\n"
+                f"- aggregate = {args.aggregate}\n"
+                f"- tile_cache_mb = {args.tile_cache_mb}\n")
 
     calculator = CalculateMetrics(
         forecast_vendor=DataVendor(args.forecast_vendor),
@@ -31,7 +36,12 @@ def _run_events(args: argparse.Namespace):
         threshold=args.threshold,
         precip_types=[PrecipitationType[t.upper()] for t in args.precip_types],
         observations_offset=args.observations_offset,
-        sensor_selection_path=args.filter_sensors_dir
+        sensor_selection_path=args.filter_sensors_dir,
+        partition=JobPartition(args.partition),
+        sensor_shards_num=args.sensor_shards,
+        sensor_sharding=SensorSharding(args.shard_by),
+        aggregate_by=None if args.aggregate is None else [AggregationKey(key) for key in args.aggregate],
+        tile_cache_size=args.tile_cache_mb * 1024 ** 2
     )
 
     os.makedirs(os.path.dirname(args.output_csv), exist_ok=True)
@@ -56,6 +66,26 @@ def _parse_event_args(subparsers: argparse._SubParsersAction):
                         help=("Path to a directory with parquet tables. "
                               "If this argument exists, then only sensors id's found in directory would be used."
                               "Sensor id is and `id` field in a parquet table"))
+    parser.add_argument("--partition", dest="partition", type=str, default=JobPartition.TIME.value,
+                        choices=[value.value for value in JobPartition],
+                        help=("Strategy of splitting session into jobs. "
+                              "`time` - by observation time ranges, `snapshot` - by forecast snapshot ranges, "
+                              "so each forecast snapshot is loaded only once"))
+    parser.add_argument("--sensor-shards", dest="sensor_shards", type=int, default=1,
+                        help=("Number of shards to split sensors into. Each job is split by sensors, "
+                              "so short sessions with many sensors can use all processes"))
+    parser.add_argument("--shard-by", dest="shard_by", type=str, default=SensorSharding.ID.value,
+                        choices=[value.value for value in SensorSharding],
+                        help=("Strategy of assigning sensors to shards. "
+                              "`id` - by hash of sensor id, `tile` - by coarse map tile of sensor location"))
+    parser.add_argument("--aggregate", dest="aggregate", type=str, nargs="*", default=None,
+                        choices=[value.value for value in AggregationKey],
+                        help=("Write tp/fp/tn/fn counts summed by specified keys instead of metrics of each event. "
+                              "Without keys counts of the whole session are summed. "
+                              "`country` is taken from the sensors selection table"))
+    parser.add_argument("--tile-cache-mb", dest="tile_cache_mb", type=int, default=2048,
+                        help=("Maximum size in MB of decoded tiles cache shared by all processes. "
+                              "Used only for tile forecast vendors. `0` disables the cache"))
 
     parser.set_defaults(func=_run_events)
 
@@ -1,12 +1,20 @@
+import contextlib
 import multiprocessing
 import numpy as np
 import os
 import pandas
+import tempfile
 import typing
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from enum import Enum
 from metrics.calc.forecast_manager import ForecastManager, DataVendor
-from metrics.calc.utils import read_selected_sensors
+from metrics.calc.utils import CsvAppendWriter, read_selected_sensors
+from metrics.io.parquet_filter import build_filter
+from metrics.io.sensor_index import SensorIndex
+from metrics.io.snapshot_dataset import SnapshotDataset
+from metrics.io.tile_cache import set_shared_tile_cache
+from metrics.io.tile_reader import calculate_tile_pixels
 from metrics.session import Session
 from metrics.utils.precipitation import PrecipitationType
 from metrics.utils.time import floor_timestamp
@@ -18,6 +26,103 @@ from tqdm import tqdm
 console = Console()
 
 
+class JobPartition(Enum):
+    """Strategy of splitting session into metrics calculation jobs"""
+    # jobs are split by observations time ranges, each forecast snapshot is loaded by several jobs
+    TIME = "time"
+    # jobs are split by forecast snapshot ranges, each forecast snapshot is loaded by a single job
+    SNAPSHOT = "snapshot"
+
+
+class SensorSharding(Enum):
+    """Strategy of assigning sensors to shards, when jobs are additionally split by sensors"""
+    # sensors are assigned by hash of sensor id
+    ID = "id"
+    # sensors are assigned by a coarse web mercator tile of sensor location, so shards cover compact areas
+    TILE = "tile"
+
+
+class AggregationKey(Enum):
+    """Keys to aggregate tp/fp/tn/fn counts by"""
+    FORECAST_TIME = "forecast_time"
+    SENSOR = "sensor"
+    # timestamp of events floored to an hour
+    HOUR = "hour"
+    # country of sensors from the sensors selection table
+    COUNTRY = "country"
+
+    @property
+    def column(self) -> str:
+        """Name of the column in the aggregated table"""
+        if self == AggregationKey.SENSOR:
+            return "id"
+
+        return self.value
+
+
+METRIC_COLUMNS = ["tp", "fp", "tn", "fn"]
+
+# columns of observation tables that are used for metrics calculation
+OBSERVATION_COLUMNS = ["id", "lon", "lat", "timestamp", "precip_rate", "precip_type"]
+
+
+def aggregate_metrics(metrics: pandas.DataFrame, aggregate_by: typing.List[AggregationKey]) -> pandas.DataFrame:
+    """Sums tp/fp/tn/fn counts by keys
+
+    Parameters
+    ----------
+    metrics : pandas.DataFrame
+        Table with tp/fp/tn/fn counts and columns of keys
+    aggregate_by : List[AggregationKey]
+        Keys to aggregate counts by. If list is empty, then counts of the whole table are summed
+
+    Returns
+    -------
+    pandas.DataFrame
+        Table of summed counts for each unique combination of keys
+    """
+    columns = [key.column for key in aggregate_by]
+    if len(columns) == 0:
+        return metrics[METRIC_COLUMNS].sum().to_frame().T
+
+    return metrics.groupby(columns, dropna=False)[METRIC_COLUMNS].sum().reset_index()
+
+
+# zoom level of tiles used to assign sensors to shards with `SensorSharding.TILE`
+SHARDING_TILE_ZOOM = 4
+
+
+def calc_sensor_shards(sensors: pandas.DataFrame,
+                       shards_num: int,
+                       sharding: SensorSharding = SensorSharding.ID) -> np.ndarray:
+    """Calculates shard index for each sensor row. Shard is stable across processes and runs
+
+    Parameters
+    ----------
+    sensors : pandas.DataFrame
+        Table of sensors. Has next columns: "id", and "lon", "lat" for `SensorSharding.TILE`
+    shards_num : int
+        Number of shards
+    sharding : SensorSharding
+        Strategy of assigning sensors to shards
+
+    Returns
+    -------
+    np.ndarray
+        Shard index in range [0, shards_num) for each row of `sensors`
+    """
+    if sharding == SensorSharding.TILE:
+        lons = sensors["lon"].to_numpy(dtype=np.float64)
+        lats = sensors["lat"].to_numpy(dtype=np.float64)
+        tile_x, tile_y, _, _ = calculate_tile_pixels(lons=lons, lats=lats, zoom=SHARDING_TILE_ZOOM, tile_size=1)
+        keys = pandas.Series((tile_x.astype(np.int64) << 32) | tile_y.astype(np.int64))
+    else:
+        keys = sensors["id"].astype(str)
+
+    hashes = pandas.util.hash_pandas_object(keys, index=False).to_numpy()
+    return (hashes % np.uint64(shards_num)).astype(np.int64)
+
+
 @dataclass
 class JobParams:
     """
@@ -45,6 +150,18 @@ class JobParams:
         Offset for observations comparing to forecast (in seconds)
     group_period: int
         Grouping period to aggregate events timestamps (in seconds)
+    forecast_range: Optional[Tuple[int, int]]
+        Range of forecast snapshots timestamps to load. If it is `None`, then range is calculated from `time_range`
+    sensor_shard: int
+        Index of the sensors shard processed by the job
+    sensor_shards_num: int
+        Number of sensors shards. If it is `1`, then all sensors are processed by the job
+    sensor_sharding: SensorSharding
+        Strategy of assigning sensors to shards
+    aggregate_by: Optional[List[AggregationKey]]
+        Keys to aggregate tp/fp/tn/fn counts by. If it is `None`, then metrics of each event are returned
+    sensor_countries: Dict[str, str]
+        Country of each sensor id. Used to aggregate by `AggregationKey.COUNTRY`
     """
     forecast_vendor: DataVendor
     observation_vendor: DataVendor
@@ -57,6 +174,76 @@ class JobParams:
     observations_offset: int = 0
     group_period: int = 600
     forecast_manager_cls: typing.Type[ForecastManager] = ForecastManager
+    forecast_range: typing.Optional[typing.Tuple[int, int]] = None
+    sensor_shard: int = 0
+    sensor_shards_num: int = 1
+    sensor_sharding: SensorSharding = SensorSharding.ID
+    aggregate_by: typing.Optional[typing.List[AggregationKey]] = None
+    sensor_countries: typing.Dict[str, str] = field(default_factory=dict)
+
+
+def _ceil_to_period(timestamps: np.ndarray, period: int, offset: int = 0) -> np.ndarray:
+    """Aligns timestamps to the period the same way as `Worker._align_time_column`.
+    Values in range (0, 10m] will be aligned to 10m
+    """
+    timestamps = np.asarray(timestamps)
+    if np.issubdtype(timestamps.dtype, np.integer):
+        return -((-(timestamps.astype(np.int64) + offset)) // period) * period
+
+    return (np.ceil((timestamps + offset) / period) * period).astype(np.int64)
+
+
+def _group_max(keys: np.ndarray, values: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Groups values by integer keys and reduces each group with max. Missing values are skipped like in pandas
+
+    Parameters
+    ----------
+    keys : np.ndarray
+        Group key of each value
+    values : np.ndarray
+        Values to reduce
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Sorted unique keys and max value of each group
+    """
+    if len(keys) == 0:
+        return keys, values.astype(np.float64)
+
+    order = np.argsort(keys)
+    keys = keys[order]
+
+    starts = np.ones(len(keys), dtype=bool)
+    starts[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(starts)
+
+    return keys[starts], np.fmax.reduceat(values[order], starts)
+
+
+def _join_sorted(left: np.ndarray, right: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Does inner join of two sorted arrays of integer keys
+
+    Parameters
+    ----------
+    left : np.ndarray
+        Sorted keys of the left table
+    right : np.ndarray
+        Sorted keys of the right table
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Indices of joined rows in left and right tables
+    """
+    first = np.searchsorted(right, left, side="left")
+    counts = np.searchsorted(right, left, side="right") - first
+
+    left_index = np.repeat(np.arange(len(left)), counts)
+    # position of each joined row inside of its group of right rows
+    positions = np.arange(len(left_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    return left_index, np.repeat(first, counts) + positions
 
 
 # MARK: Multiprocess Job
@@ -109,14 +296,30 @@ class Worker:
 
         sensors_time_range = (sensors_start_time, sensors_end_time)
 
-        collected_sensor_files = self._get_sensor_file_list(sensors_time_range=sensors_time_range,
-                                                            sensors_path=sensors_path)
+        # filters are pushed down to the parquet reader, so only rows of selected sensors are decoded
+        sensor_ids = self._params.sensor_ids if len(self._params.sensor_ids) > 0 else None
 
-        console.log(f"Load sensors {collected_sensor_files}")
+        dataset = SnapshotDataset(os.path.join(session.datasets_folder, self._params.observation_vendor.value))
         loaded_tables = []
-        for file_path in collected_sensor_files:
-            if os.path.exists(file_path):
-                loaded_tables.append(pandas.read_parquet(file_path))
+        if dataset.exists():
+            console.log(f"Load sensors {sensors_time_range} from dataset {dataset.root}")
+            sensors_table = dataset.read(snapshots_range=sensors_time_range,
+                                         timestamp_range=sensors_time_range,
+                                         ids=sensor_ids,
+                                         columns=OBSERVATION_COLUMNS)
+            if sensors_table is not None:
+                loaded_tables.append(sensors_table)
+        else:
+            collected_sensor_files = self._get_sensor_file_list(sensors_time_range=sensors_time_range,
+                                                                sensors_path=sensors_path)
+
+            console.log(f"Load sensors {collected_sensor_files}")
+            filters = build_filter(timestamp_range=sensors_time_range, ids=sensor_ids)
+            for file_path in collected_sensor_files:
+                if os.path.exists(file_path):
+                    loaded_tables.append(pandas.read_parquet(file_path,
+                                                             columns=OBSERVATION_COLUMNS,
+                                                             filters=filters))
 
         sensor_observations = pandas.concat(loaded_tables)
 
@@ -126,6 +329,14 @@ class Worker:
             sensor_observations = sensor_observations[sensor_observations["id"].isin(self._params.sensor_ids)]
             console.log(f"{len(sensor_observations)} observations stayed after filtering for {sensors_time_range}")
 
+        if self._params.sensor_shards_num > 1:
+            shards = calc_sensor_shards(sensors=sensor_observations,
+                                        shards_num=self._params.sensor_shards_num,
+                                        sharding=self._params.sensor_sharding)
+            sensor_observations = sensor_observations[shards == self._params.sensor_shard]
+            console.log(f"{len(sensor_observations)} observations stayed in shard "
+                        f"{self._params.sensor_shard}/{self._params.sensor_shards_num} for {sensors_time_range}")
+
         # leave only sensors in the measured range
         filter = (sensor_observations["timestamp"] > sensors_time_range[0]) & \
             (sensor_observations["timestamp"] <= sensors_time_range[1])
@@ -138,9 +349,12 @@ class Worker:
         sensor_observations = sensor_observations.sort_values(by=["id", "timestamp"])
         sensor_observations = sensor_observations.drop_duplicates(subset=["id", "timestamp"], keep="first")
 
-        forecast_start_time, forecast_end_time = self._params.time_range
-        # -1:10, to cover begin of observations with 2 hour forecast
-        forecast_start_time = forecast_start_time - (max(self._params.forecast_offsets) + 4200)
+        if self._params.forecast_range is None:
+            forecast_start_time, forecast_end_time = self._params.time_range
+            # -1:10, to cover begin of observations with 2 hour forecast
+            forecast_start_time = forecast_start_time - (max(self._params.forecast_offsets) + 4200)
+        else:
+            forecast_start_time, forecast_end_time = self._params.forecast_range
 
         console.log(f"Loading forecast in range ({forecast_start_time}, {forecast_end_time})...")
 
@@ -149,9 +363,38 @@ class Worker:
                                                sensors_table=sensor_observations)
 
         console.log(f"Calculating metrics for {self._params.time_range}...")
-        return self._calculate(forecast_times=self._params.forecast_offsets,
-                               observations=sensor_observations,
-                               forecast=forecast)
+        metrics = self._calculate(forecast_times=self._params.forecast_offsets,
+                                  observations=sensor_observations,
+                                  forecast=forecast)
+
+        if self._params.aggregate_by is not None:
+            return self._aggregate(metrics)
+
+        return metrics
+
+    def _aggregate(self, metrics: pandas.DataFrame) -> pandas.DataFrame:
+        """Sums tp/fp/tn/fn counts by `self._params.aggregate_by` keys.
+        For jobs split by time ranges only events that end in `self._params.time_range` are counted,
+        so events on the boundary of neighbour jobs are not counted twice.
+
+        Parameters
+        ----------
+        metrics : pandas.DataFrame
+            Calculated metrics for each sensor id, forecast offset, timestamp
+
+        Returns
+        -------
+        pandas.DataFrame
+            Table of summed counts for each unique combination of keys
+        """
+        if self._params.forecast_range is None:
+            events_end = metrics["timestamp"] - self._params.observations_offset
+            metrics = metrics[(events_end > self._params.time_range[0]) & (events_end <= self._params.time_range[1])]
+
+        metrics = metrics.assign(hour=floor_timestamp(metrics["timestamp"], 3600),
+                                 country=metrics["id"].map(self._params.sensor_countries))
+
+        return aggregate_metrics(metrics=metrics, aggregate_by=self._params.aggregate_by)
 
     def _align_time_column(self, data: pandas.DataFrame,
                            column_name: str,
@@ -185,6 +428,8 @@ class Worker:
                    forecast: pandas.DataFrame) -> pandas.DataFrame:
         """Implements calculation of metrics. This function takes two tables: observation, forecast.
         Data in both tables resampled by 10 minutes (using max value of precip_rate).
+        Calculation is done on sorted NumPy arrays: sensor ids are factorized into integer codes,
+        max values are reduced over sorted segments and tables are joined with binary search.
 
         Parameters
         ----------
@@ -200,60 +445,92 @@ class Worker:
         pandas.DataFrame
             Calculated metrics for each forecast offset per sensor ID & timestamp
         """
-        observations = observations.sort_values(by=["id", "timestamp"])
-        observations = observations.drop_duplicates(subset=["id", "timestamp"], keep="first")
-
-        # ceil forecast time to 10 minutes
-        forecast = self._align_time_column(data=forecast,
-                                           column_name="forecast_time",
-                                           period=self._params.group_period,
-                                           offset=self._params.observations_offset)
-        forecast = self._align_time_column(data=forecast,
-                                           column_name="timestamp",
-                                           period=self._params.group_period,
-                                           offset=self._params.observations_offset)
-
-        forecast["precip_type_status"] = forecast["precip_type"].isin(self._params.precip_types)
-        forecast = forecast.groupby(["id", "timestamp", "precip_type_status", "forecast_time"]).agg({
-            "precip_rate": "max"
-        }).reset_index()
-
-        forecast = forecast[forecast["forecast_time"].isin(forecast_times)]
-
-        # resample observations
-        observations = self._align_time_column(data=observations,
-                                               column_name="timestamp",
-                                               period=self._params.group_period,
-                                               offset=self._params.observations_offset)
-
-        observations["precip_type_status"] = observations["precip_type"].isin(self._params.precip_types)
-        observations = observations.groupby(["id", "timestamp", "precip_type_status"]).agg({
-            "precip_rate": "max"
-        }).reset_index()
-
-        print(f"Observations:\n{observations}")
-        print(f"Forecast:\n{forecast}")
-
-        result_metrics = pandas.merge(forecast, observations,
-                                      on=["id", "timestamp"],
-                                      how="inner",
-                                      suffixes=("_forecast", "_observations"))
-
-        result_metrics["forecasted_precip"] = ((result_metrics["precip_rate_forecast"] > self._params.threshold) &
-                                               result_metrics["precip_type_status_forecast"])
-
-        result_metrics["observed_precip"] = ((result_metrics["precip_rate_observations"] > self._params.threshold) &
-                                             result_metrics["precip_type_status_observations"])
-
-        result_metrics["tp"] = 0
-        result_metrics["fp"] = 0
-        result_metrics["tn"] = 0
-        result_metrics["fn"] = 0
-
-        result_metrics.loc[(result_metrics["forecasted_precip"]) & (result_metrics["observed_precip"]), "tp"] = 1
-        result_metrics.loc[(result_metrics["forecasted_precip"]) & (~result_metrics["observed_precip"]), "fp"] = 1
-        result_metrics.loc[(~result_metrics["forecasted_precip"]) & (~result_metrics["observed_precip"]), "tn"] = 1
-        result_metrics.loc[(~result_metrics["forecasted_precip"]) & (result_metrics["observed_precip"]), "fn"] = 1
+        precip_types = np.asarray(self._params.precip_types)
+        forecast_times = np.unique(np.asarray(forecast_times, dtype=np.int64))
+        forecast_times_num = max(1, len(forecast_times))
+        period = self._params.group_period
+        offset = self._params.observations_offset
+
+        # factorize sensor ids of both tables once, all further work is done with integer codes
+        codes, ids = pandas.factorize(pandas.concat([observations["id"], forecast["id"]], ignore_index=True))
+        observation_codes = codes[:len(observations)].astype(np.int64)
+        forecast_codes = codes[len(observations):].astype(np.int64)
+
+        # drop duplicated observations, first observation of the (id, timestamp) pair is kept.
+        # Missing sensor ids are factorized as -1, they are skipped like in pandas groupby
+        observations_mask = ~observations.duplicated(subset=["id", "timestamp"], keep="first").to_numpy()
+        observations_mask &= observation_codes >= 0
+
+        # ceil timestamps and forecast time to 10 minutes
+        observation_timestamps = _ceil_to_period(observations["timestamp"].to_numpy()[observations_mask],
+                                                 period=period,
+                                                 offset=offset)
+
+        forecast_times_aligned = _ceil_to_period(forecast["forecast_time"].to_numpy(), period=period, offset=offset)
+        forecast_mask = np.isin(forecast_times_aligned, forecast_times) & (forecast_codes >= 0)
+        forecast_timestamps = _ceil_to_period(forecast["timestamp"].to_numpy()[forecast_mask],
+                                              period=period,
+                                              offset=offset)
+
+        # pack (sensor code, timestamp bucket) into a single integer key that keeps sort order
+        all_timestamps = np.concatenate([observation_timestamps, forecast_timestamps])
+        min_timestamp = all_timestamps.min() if len(all_timestamps) > 0 else 0
+        buckets_num = (all_timestamps.max() - min_timestamp) // period + 1 if len(all_timestamps) > 0 else 1
+
+        observation_keys = observation_codes[observations_mask] * buckets_num + \
+            (observation_timestamps - min_timestamp) // period
+        forecast_keys = forecast_codes[forecast_mask] * buckets_num + (forecast_timestamps - min_timestamp) // period
+
+        # resample observations by (id, timestamp, precip_type_status)
+        observation_statuses = np.isin(observations["precip_type"].to_numpy()[observations_mask], precip_types)
+        observation_keys, observation_rates = _group_max(
+            keys=observation_keys * 2 + observation_statuses,
+            values=observations["precip_rate"].to_numpy(dtype=np.float64)[observations_mask])
+        observation_statuses = (observation_keys % 2).astype(bool)
+        observation_keys = observation_keys // 2
+
+        # resample forecast by (id, timestamp, precip_type_status, forecast_time)
+        forecast_statuses = np.isin(forecast["precip_type"].to_numpy()[forecast_mask], precip_types)
+        forecast_time_index = np.searchsorted(forecast_times, forecast_times_aligned[forecast_mask])
+        forecast_keys, forecast_rates = _group_max(
+            keys=(forecast_keys * 2 + forecast_statuses) * forecast_times_num + forecast_time_index,
+            values=forecast["precip_rate"].to_numpy(dtype=np.float64)[forecast_mask])
+        forecast_times_aligned = forecast_times[forecast_keys % forecast_times_num]
+        forecast_keys = forecast_keys // forecast_times_num
+        forecast_statuses = (forecast_keys % 2).astype(bool)
+        forecast_keys = forecast_keys // 2
+
+        forecast_index, observation_index = _join_sorted(left=forecast_keys, right=observation_keys)
+
+        forecast_keys = forecast_keys[forecast_index]
+        forecast_codes = forecast_keys // buckets_num
+        timestamps = min_timestamp + (forecast_keys % buckets_num) * period
+        forecast_statuses = forecast_statuses[forecast_index]
+        forecast_times_aligned = forecast_times_aligned[forecast_index]
+        forecast_rates = forecast_rates[forecast_index]
+        observation_statuses = observation_statuses[observation_index]
+        observation_rates = observation_rates[observation_index]
+
+        # session tables store rates as float32, so threshold is compared with the same precision
+        threshold = np.float64(np.float32(self._params.threshold))
+        forecasted_precip = (forecast_rates > threshold) & forecast_statuses
+        observed_precip = (observation_rates > threshold) & observation_statuses
+
+        result_metrics = pandas.DataFrame({
+            "id": np.asarray(ids, dtype=object)[forecast_codes],
+            "timestamp": timestamps,
+            "precip_type_status_forecast": forecast_statuses,
+            "forecast_time": forecast_times_aligned,
+            "precip_rate_forecast": forecast_rates,
+            "precip_type_status_observations": observation_statuses,
+            "precip_rate_observations": observation_rates,
+            "forecasted_precip": forecasted_precip,
+            "observed_precip": observed_precip,
+            "tp": (forecasted_precip & observed_precip).astype(np.int64),
+            "fp": (forecasted_precip & ~observed_precip).astype(np.int64),
+            "tn": (~forecasted_precip & ~observed_precip).astype(np.int64),
+            "fn": (~forecasted_precip & observed_precip).astype(np.int64)
+        })
 
         print(f"Metrics (forecast - {self._params.forecast_vendor.value}, "
               f"observations - {self._params.observation_vendor.value}, "
@@ -285,7 +562,12 @@ class CalculateMetrics:
                  observations_offset: int = 0,
                  split_time_range: int = 3600,
                  group_period: int = 600,
-                 forecast_manager_cls: typing.Type[ForecastManager] = ForecastManager) -> None:
+                 forecast_manager_cls: typing.Type[ForecastManager] = ForecastManager,
+                 partition: JobPartition = JobPartition.TIME,
+                 sensor_shards_num: int = 1,
+                 sensor_sharding: SensorSharding = SensorSharding.ID,
+                 aggregate_by: typing.Optional[typing.List[AggregationKey]] = None,
+                 tile_cache_size: int = 2 * 1024 ** 3) -> None:
         """
         Parameters
         ----------
@@ -304,6 +586,18 @@ class CalculateMetrics:
             Path to a session directory
         sensors_path : str
             Path to a directory with sensor tables
+        partition : JobPartition
+            Strategy of splitting session into jobs
+        sensor_shards_num : int
+            Number of shards to split sensors into. Each time (or snapshot) job is split into this number of jobs,
+            so short sessions with many sensors can use all processes
+        sensor_sharding : SensorSharding
+            Strategy of assigning sensors to shards
+        aggregate_by : Optional[List[AggregationKey]]
+            Keys to aggregate tp/fp/tn/fn counts by. Counts are aggregated inside of workers and only
+            aggregated tables are collected from them. If it is `None`, then metrics of each event are written
+        tile_cache_size : int
+            Maximum size (in bytes) of decoded tiles cache shared by all processes. `0` disables the cache
         """
         self._forecast_vendor = forecast_vendor
         self._observation_vendor = observation_vendor
@@ -316,6 +610,11 @@ class CalculateMetrics:
         self._split_time_range = split_time_range
         self._group_period = group_period
         self._forecast_manager_cls = forecast_manager_cls
+        self._partition = partition
+        self._sensor_shards_num = max(1, sensor_shards_num)
+        self._sensor_sharding = sensor_sharding
+        self._aggregate_by = aggregate_by
+        self._tile_cache_size = tile_cache_size
 
     def _calc_sensors_range(self) -> typing.Tuple[int, int]:
         """Calculates aligned sensors range based on session start/end time
@@ -334,50 +633,216 @@ class CalculateMetrics:
 
         return (start_time, end_time)
 
-    def calculate(self, output_csv: str, process_num: int = 1) -> pandas.DataFrame:
+    def _create_job_params(self,
+                           time_range: typing.Tuple[int, int],
+                           sensor_ids: typing.List[str],
+                           forecast_range: typing.Optional[typing.Tuple[int, int]] = None) -> JobParams:
+        return JobParams(forecast_vendor=self._forecast_vendor,
+                         observation_vendor=self._observation_vendor,
+                         forecast_offsets=self._forecast_offsets,
+                         session_path=self._session_path,
+                         time_range=time_range,
+                         sensor_ids=sensor_ids,
+                         threshold=self._threshold,
+                         precip_types=[precip_type.value for precip_type in self._precip_types],
+                         observations_offset=self._observations_offset,
+                         group_period=self._group_period,
+                         forecast_manager_cls=self._forecast_manager_cls,
+                         forecast_range=forecast_range,
+                         aggregate_by=self._aggregate_by)
+
+    def _create_time_jobs(self,
+                          sensors_range: typing.Tuple[int, int],
+                          sensor_ids: typing.List[str]) -> typing.List[JobParams]:
+        """Splits session by `self._split_time_range` observation ranges.
+        Each job loads all forecast snapshots that cover its range.
+        """
+        start_time, end_time = sensors_range
+
+        jobs = []
+        for timestamp in range(start_time, end_time, self._split_time_range):
+            jobs.append(self._create_job_params(time_range=(timestamp, timestamp + self._split_time_range),
+                                                sensor_ids=sensor_ids))
+
+        return jobs
+
+    def _create_snapshot_jobs(self,
+                              sensors_range: typing.Tuple[int, int],
+                              sensor_ids: typing.List[str]) -> typing.List[JobParams]:
+        """Splits session by `self._split_time_range` forecast snapshot ranges, so each snapshot is loaded once.
+        Each job loads observations that can be matched with forecasts of its snapshots:
+        events of snapshot `s` with forecast time `f` are grouped into range (s + f - group_period, s + f + group_period)
+        """
+        start_time, end_time = sensors_range
+        min_offset = min(self._forecast_offsets)
+        max_offset = max(self._forecast_offsets)
+
+        snapshots_start_time = floor_timestamp(start_time - max_offset - self._group_period, self._split_time_range)
+
+        jobs = []
+        for snapshot_time in range(snapshots_start_time, end_time + 1, self._split_time_range):
+            forecast_range = (snapshot_time, snapshot_time + self._split_time_range - 1)
+
+            time_range = (max(start_time, snapshot_time + min_offset - self._group_period),
+                          min(end_time, forecast_range[1] + max_offset + self._group_period))
+
+            if time_range[0] >= time_range[1]:
+                continue
+
+            jobs.append(self._create_job_params(time_range=time_range,
+                                                sensor_ids=sensor_ids,
+                                                forecast_range=forecast_range))
+
+        return jobs
+
+    def _create_sensor_shard_jobs(self, jobs: typing.List[JobParams]) -> typing.List[JobParams]:
+        """Splits each job into `self._sensor_shards_num` jobs by sensors"""
+        if self._sensor_shards_num == 1:
+            return jobs
+
+        return [replace(job,
+                        sensor_shard=shard,
+                        sensor_shards_num=self._sensor_shards_num,
+                        sensor_sharding=self._sensor_sharding)
+                for job in jobs
+                for shard in range(self._sensor_shards_num)]
+
+    def _create_jobs(self,
+                     sensors_range: typing.Tuple[int, int],
+                     sensor_ids: typing.List[str]) -> typing.List[JobParams]:
+        """Splits session into jobs according to `self._partition` and then splits each job by sensor shards
+
+        Parameters
+        ----------
+        sensors_range : Tuple[int, int]
+            Aligned observations time range of the session
+        sensor_ids : List[str]
+            List of sensors that should be used to compare. If list is empty then all sensors will be used
+
+        Returns
+        -------
+        List[JobParams]
+            List of jobs to run
+        """
+        if self._partition == JobPartition.SNAPSHOT:
+            jobs = self._create_snapshot_jobs(sensors_range=sensors_range, sensor_ids=sensor_ids)
+        else:
+            jobs = self._create_time_jobs(sensors_range=sensors_range, sensor_ids=sensor_ids)
+
+        return self._create_sensor_shard_jobs(jobs)
+
+    def _build_sensor_index(self):
+        """Builds tile and pixel coordinates index for all observation sensors of the session and saves it into
+        the session tables folder. Index is built once per session, so workers don't project sensor coordinates
+        for every snapshot.
+        """
+        if not self._forecast_manager_cls.uses_sensor_index(self._forecast_vendor):
+            return
+
+        session = Session.create_from_folder(self._session_path)
+        if os.path.exists(session.sensor_index_path):
+            return
+
+        sensors_path = os.path.join(session.tables_folder, self._observation_vendor.value)
+        dataset = SnapshotDataset(os.path.join(session.datasets_folder, self._observation_vendor.value))
+
+        sensor_tables = []
+        if dataset.exists():
+            sensor_tables.append(dataset.read_all(columns=SensorIndex.KEY_COLUMNS).drop_duplicates())
+        elif os.path.isdir(sensors_path):
+            for file_name in os.listdir(sensors_path):
+                if file_name.endswith(".parquet"):
+                    sensors = pandas.read_parquet(os.path.join(sensors_path, file_name),
+                                                  columns=SensorIndex.KEY_COLUMNS)
+                    sensor_tables.append(sensors.drop_duplicates())
+
+        if len(sensor_tables) == 0:
+            return
+
+        console.log(f"Building sensor index {session.sensor_index_path}")
+        SensorIndex.build(pandas.concat(sensor_tables)).save(session.sensor_index_path)
+
+    def _create_tile_cache_dir(self) -> typing.ContextManager[typing.Optional[str]]:
+        """Creates temporary directory for decoded tiles shared by all processes of the run.
+        If forecast vendor doesn't decode tiles or cache is disabled, then `None` is used as a path
+        """
+        if self._tile_cache_size <= 0 or not self._forecast_manager_cls.uses_tile_cache(self._forecast_vendor):
+            return contextlib.nullcontext(None)
+
+        return tempfile.TemporaryDirectory(prefix="tile_cache_")
+
+    def calculate(self,
+                  output_csv: str,
+                  process_num: int = 1,
+                  collect_metrics: bool = False) -> typing.Optional[pandas.DataFrame]:
         """
         Parameters
         ----------
         output_csv : str
-            Path to the output CSV file
+            Path to the output CSV file. Metrics of each job are appended to the file once the job is finished
         process_num : int
             Number of parallel processes to run
+        collect_metrics : bool
+            If `True`, then metrics of all jobs are also concatenated into a single table and returned.
+            By default only the CSV file is written, so memory usage doesn't grow with session length.
+            When metrics are aggregated, then the CSV file is written once all jobs are finished
+
+        Returns
+        -------
+        Optional[pandas.DataFrame]
+            Calculated metrics when `collect_metrics` is `True`, otherwise `None`
         """
         selected_sensors = read_selected_sensors(self._sensor_selection_path)
         selected_sensors = selected_sensors.drop_duplicates(subset=["id"], keep="first")
         selected_sensors_ids = selected_sensors["id"].unique()
 
-        # Calculate metrics in this way:
-        # - split session time by 1 hour ranges
-        # - calculate metrics for each 1 hour range
-
         start_time, end_time = self._calc_sensors_range()
 
-        jobs = []
-        for timestamp in range(start_time, end_time, self._split_time_range):
-            jobs.append(JobParams(forecast_vendor=self._forecast_vendor,
-                                  observation_vendor=self._observation_vendor,
-                                  forecast_offsets=self._forecast_offsets,
-                                  session_path=self._session_path,
-                                  time_range=(timestamp, timestamp + self._split_time_range),
-                                  sensor_ids=selected_sensors_ids,
-                                  threshold=self._threshold,
-                                  precip_types=[precip_type.value for precip_type in self._precip_types],
-                                  observations_offset=self._observations_offset,
-                                  group_period=self._group_period,
-                                  forecast_manager_cls=self._forecast_manager_cls))
-
-        final_metrics: pandas.DataFrame = pandas.DataFrame()
+        self._build_sensor_index()
+
+        jobs = self._create_jobs(sensors_range=(start_time, end_time),
+                                 sensor_ids=selected_sensors_ids)
+
+        if self._aggregate_by is not None and AggregationKey.COUNTRY in self._aggregate_by \
+                and "country" in selected_sensors.columns:
+            sensor_countries = dict(zip(selected_sensors["id"], selected_sensors["country"]))
+            jobs = [replace(job, sensor_countries=sensor_countries) for job in jobs]
+
+        collected_metrics: typing.List[pandas.DataFrame] = []
+        aggregated_metrics: typing.List[pandas.DataFrame] = []
         pool_ctx = multiprocessing.get_context("spawn")
-        with pool_ctx.Pool(processes=process_num) as pool:
+        with self._create_tile_cache_dir() as tile_cache_path, \
+                pool_ctx.Pool(processes=process_num,
+                              initializer=set_shared_tile_cache,
+                              initargs=(tile_cache_path, self._tile_cache_size)) as pool, \
+                CsvAppendWriter(output_csv) as writer:
             for m in tqdm(pool.imap_unordered(_process_time_range, jobs),
                           desc="Calculating metrics...",
                           ascii=True,
                           total=len(jobs)):
-                final_metrics = pandas.concat([final_metrics, m])
-                final_metrics.to_csv(output_csv, index=False)
+                if self._aggregate_by is not None:
+                    if m is not None:
+                        aggregated_metrics.append(m)
+                    continue
+
+                writer.write(m)
+
+                if collect_metrics and m is not None:
+                    collected_metrics.append(m)
+
+            if self._aggregate_by is not None and len(aggregated_metrics) > 0:
+                # jobs can share keys (e.g. forecast time), so their counts are summed once more
+                m = aggregate_metrics(metrics=pandas.concat(aggregated_metrics), aggregate_by=self._aggregate_by)
+                writer.write(m)
+                collected_metrics.append(m)
+
+        if not collect_metrics:
+            return None
+
+        if len(collected_metrics) == 0:
+            return pandas.DataFrame()
 
-        return final_metrics
+        return pandas.concat(collected_metrics)
 
 
 def calc_events(session_path: str,
@@ -1,4 +1,5 @@
 from metrics.io.rainviewer import RainViewerTileLoader
+from metrics.io.rainviewer_store import RainViewerStoreTileLoader
 from metrics.calc.forecast.tile_provider import TileProvider
 
 
@@ -6,7 +7,11 @@ class RainViewerProvider(TileProvider):
 
     FORECAST_STEP = 600
 
-    def __init__(self, snapshots_path: str, snapshot_timestamp: int, max_forecast_time: int = 12 * 600) -> None:
+    def __init__(self,
+                 snapshots_path: str,
+                 snapshot_timestamp: int,
+                 max_forecast_time: int = 12 * 600,
+                 decoded: bool = False) -> None:
         """
         Parameters
         ----------
@@ -14,9 +19,13 @@ class RainViewerProvider(TileProvider):
             Path to folder with rainviewer snapshots
         snapshot_timestamp : int
             Timestamp of rainviewer tiles snapshot
+        decoded : bool
+            If `True`, then snapshots are read from tile stores created by `metrics.parse`
+            (see `RainViewerTileStore`), otherwise tiles are decoded from snapshot archives
         """
         super().__init__(snapshots_path=snapshots_path,
                          snapshot_timestamp=snapshot_timestamp,
-                         tile_loader_class=RainViewerTileLoader,
+                         tile_loader_class=RainViewerStoreTileLoader if decoded else RainViewerTileLoader,
                          max_forecast_time=max_forecast_time,
-                         forecast_step=RainViewerProvider.FORECAST_STEP)
+                         forecast_step=RainViewerProvider.FORECAST_STEP,
+                         snapshot_ext=".parquet" if decoded else ".zip")
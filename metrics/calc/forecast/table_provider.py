@@ -3,10 +3,14 @@ import pandas
 import typing
 
 from metrics.calc.forecast.provider import ForecastProvider
+from metrics.io.parquet_filter import build_filter
 
 
 class TableProvider(ForecastProvider):
 
+    # columns of forecast tables that are used for metrics calculation
+    COLUMNS = ["id", "precip_rate", "precip_type", "timestamp"]
+
     def __init__(self, tables_path: str, snapshot_timestamp: int) -> None:
         """
         Parameters
@@ -18,10 +22,10 @@ class TableProvider(ForecastProvider):
         """
 
         self._snapshot_timestamp = snapshot_timestamp
-        self._table = None
+        self._table_path = None
         table_path = os.path.join(tables_path, f"{snapshot_timestamp}.parquet")
         if os.path.exists(table_path):
-            self._table = pandas.read_parquet(table_path)
+            self._table_path = table_path
 
     def get_data_timestamp(self) -> int:
         """Returns snapshot timestamp of the data
@@ -29,9 +33,13 @@ class TableProvider(ForecastProvider):
         return self._snapshot_timestamp
 
     def load(self, sensors_table: pandas.DataFrame) -> typing.Optional[pandas.DataFrame]:
-        """See DataProviderInterface.load"""
-        if self._table is None:
+        """See DataProviderInterface.load
+        Table is read with filter by sensor ids and only used columns, so row groups
+        without requested sensors are not decoded.
+        """
+        if self._table_path is None:
             return None
 
-        return self._filter_by_sensors(sensors_table=sensors_table,
-                                       data=self._table)
+        return pandas.read_parquet(self._table_path,
+                                   columns=TableProvider.COLUMNS,
+                                   filters=build_filter(ids=sensors_table["id"].unique()))
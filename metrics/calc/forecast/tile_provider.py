@@ -1,11 +1,12 @@
+import numpy as np
 import os
 import pandas
 import typing
 
 from metrics.calc.forecast.provider import ForecastProvider
+from metrics.io.sensor_index import TILE_PIXEL_COLUMNS
 from metrics.io.tile_loader import BaseTileLoader
 from metrics.io.tile_reader import TileReader
-from metrics.utils.coords import Coordinate
 from metrics.utils.dbz import dbz_to_precipitation_rate
 from metrics.utils.precipitation import PrecipitationType
 
@@ -25,7 +26,8 @@ class TileProvider(ForecastProvider):
                  snapshot_timestamp: int,
                  tile_loader_class: BaseTileLoader,
                  max_forecast_time: int = 3600,
-                 forecast_step: int = 600) -> None:
+                 forecast_step: int = 600,
+                 snapshot_ext: str = ".zip") -> None:
         """
         Parameters
         ----------
@@ -39,15 +41,17 @@ class TileProvider(ForecastProvider):
             Maximum forecast time in seconds
         forecast_step : int
             Forecast snapshots step in seconds
+        snapshot_ext : str
+            Extension of the snapshot file that is passed to the tile loader
         """
         self._snapshot_timestamp = snapshot_timestamp
         self._max_forecast_time = max_forecast_time
         self._forecast_step = forecast_step
         self._tile_reader = None
 
-        zip_path = os.path.join(snapshots_path, f"{snapshot_timestamp}.zip")
-        if os.path.exists(zip_path):
-            self._tile_reader = TileReader(tile_loader_class(zip_path=zip_path))
+        snapshot_path = os.path.join(snapshots_path, f"{snapshot_timestamp}{snapshot_ext}")
+        if os.path.exists(snapshot_path):
+            self._tile_reader = TileReader(tile_loader_class(snapshot_path))
 
     def get_data_timestamp(self) -> int:
         """Returns snapshot timestamp of the data
@@ -72,29 +76,86 @@ class TileProvider(ForecastProvider):
 
         return dbz
 
+    @staticmethod
+    def dbz_to_precipitation_rates(dbz: np.ndarray, precip_type: np.ndarray) -> np.ndarray:
+        """Vectorized version of `dbz_to_precipitation_rate`
+
+        Parameters
+        ----------
+        dbz : np.ndarray
+            Array of dbz values
+        precip_type : np.ndarray
+            Array of precipitation types (see PrecipitationType)
+
+        Returns
+        -------
+        np.ndarray
+            Array of precipitation rates in mm/h
+        """
+        dbz = np.asarray(dbz, dtype=np.float64)
+        rain_mmh = dbz_to_precipitation_rate(dbz=dbz,
+                                             a=TileProvider.RAIN_RATE_CONVERT_A,
+                                             b=TileProvider.RAIN_RATE_CONVERT_B)
+        snow_mmh = dbz_to_precipitation_rate(dbz=dbz,
+                                             a=TileProvider.SNOW_RATE_CONVERT_A,
+                                             b=TileProvider.SNOW_RATE_CONVERT_B)
+
+        return np.select([precip_type == PrecipitationType.RAIN,
+                          precip_type == PrecipitationType.SNOW,
+                          precip_type == PrecipitationType.MIX],
+                         [rain_mmh, snow_mmh, np.maximum(rain_mmh, snow_mmh)],
+                         default=dbz)
+
     def load(self, sensors_table: pandas.DataFrame) -> typing.Optional[pandas.DataFrame]:
-        result_data = []
+        """See ForecastProvider.load. When sensors table has "tile_x", "tile_y", "px", "py" columns
+        (see SensorIndex), then precomputed coordinates are used instead of projecting "lon", "lat"
+        """
+        ids = []
+        precip_rates = []
+        precip_types = []
+        timestamps = []
 
         if self._tile_reader is not None:
             sensors_table = sensors_table.sort_values(by=["id", "lon", "lat"])
 
+            sensor_ids = sensors_table["id"].to_numpy()
+            has_tile_pixels = all(column in sensors_table.columns for column in TILE_PIXEL_COLUMNS)
+
+            if has_tile_pixels:
+                tile_x, tile_y, px, py = [sensors_table[column].to_numpy(dtype=np.int64)
+                                          for column in TILE_PIXEL_COLUMNS]
+            else:
+                lons = sensors_table["lon"].to_numpy(dtype=np.float64)
+                lats = sensors_table["lat"].to_numpy(dtype=np.float64)
+
             forecast_time = 0
             while forecast_time <= self._max_forecast_time:
-                for sensor in sensors_table.itertuples():
-                    precip_value = self._tile_reader.get_dbz_value_by_coords(
-                        coords=Coordinate(lon=sensor.lon, lat=sensor.lat),
-                        offset=forecast_time // 60)
-
-                    if precip_value is not None and precip_value.dbz is not None:
-                        precip_rate = TileProvider.dbz_to_precipitation_rate(dbz=precip_value.dbz,
-                                                                             precip_type=precip_value.precip_type)
-                        result_data.append([
-                            sensor.id,
-                            precip_rate,
-                            precip_value.precip_type.value,
-                            self._snapshot_timestamp + forecast_time])
+                if has_tile_pixels:
+                    dbz, precip_type = self._tile_reader.get_dbz_values_by_tiles(offset=forecast_time // 60,
+                                                                                 px=px,
+                                                                                 py=py,
+                                                                                 tile_x=tile_x,
+                                                                                 tile_y=tile_y)
+                else:
+                    dbz, precip_type = self._tile_reader.get_dbz_values(lons=lons,
+                                                                        lats=lats,
+                                                                        offset=forecast_time // 60)
+
+                has_data = ~np.isnan(dbz)
+                ids.append(sensor_ids[has_data])
+                precip_rates.append(TileProvider.dbz_to_precipitation_rates(dbz=dbz[has_data],
+                                                                            precip_type=precip_type[has_data]))
+                precip_types.append(precip_type[has_data].astype(np.int64))
+                timestamps.append(np.full(np.count_nonzero(has_data),
+                                          self._snapshot_timestamp + forecast_time,
+                                          dtype=np.int64))
 
                 forecast_time += self._forecast_step
 
-        return pandas.DataFrame(data=result_data,
-                                columns=["id", "precip_rate", "precip_type", "timestamp"])
+        if len(ids) == 0:
+            return pandas.DataFrame(columns=["id", "precip_rate", "precip_type", "timestamp"])
+
+        return pandas.DataFrame({"id": np.concatenate(ids),
+                                 "precip_rate": np.concatenate(precip_rates),
+                                 "precip_type": np.concatenate(precip_types),
+                                 "timestamp": np.concatenate(timestamps)})
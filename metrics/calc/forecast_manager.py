@@ -7,6 +7,9 @@ from metrics.calc.forecast.rainviewer import RainViewerProvider
 from metrics.calc.forecast.table_provider import TableProvider
 from metrics.calc.forecast.provider import ForecastProvider
 from metrics.data_vendor import BaseDataVendor, DataVendor
+from metrics.io.rainviewer_store import RainViewerTileStore
+from metrics.io.sensor_index import SensorIndex
+from metrics.io.snapshot_dataset import SnapshotDataset
 
 from metrics.session import Session
 from metrics.utils.time import floor_timestamp
@@ -27,19 +30,83 @@ class ForecastManager:
         self._session = session
 
         self._providers: typing.Dict[int, ForecastProvider] = {}  # providers by timestamps
+        self._sensor_index: typing.Optional[SensorIndex] = None
+
+    @staticmethod
+    def uses_sensor_index(data_vendor: BaseDataVendor) -> bool:
+        """Checks if providers of the vendor read tiles, so a precomputed sensor index speeds them up
+
+        Parameters
+        ----------
+        data_vendor : BaseDataVendor
+            Data vendor to check
+
+        Returns
+        -------
+        bool
+            Returns `True` if sensor index should be built for the vendor, otherwise returns `False`
+        """
+        return data_vendor.value == DataVendor.RainViewer.value
+
+    @staticmethod
+    def uses_tile_cache(data_vendor: BaseDataVendor) -> bool:
+        """Checks if providers of the vendor decode tiles, so decoded tiles can be shared between processes
+
+        Parameters
+        ----------
+        data_vendor : BaseDataVendor
+            Data vendor to check
+
+        Returns
+        -------
+        bool
+            Returns `True` if shared tile cache should be created for the vendor, otherwise returns `False`
+        """
+        return data_vendor.value == DataVendor.RainViewer.value
 
     def _create_data_provider(self, timestamp: int) -> ForecastProvider:
         if self._data_vendor.value == DataVendor.RainViewer.value:
+            # prefer data that is converted by `metrics.parse`: either a table of values at sensor locations
+            # or tiles that are decoded into a store
+            tables_path = self._get_tables_path(timestamp)
+            table_path = os.path.join(tables_path, f"{timestamp}.parquet")
+            if RainViewerTileStore.exists(table_path):
+                return RainViewerProvider(snapshots_path=tables_path,
+                                          snapshot_timestamp=timestamp,
+                                          decoded=True)
+            elif os.path.exists(table_path):
+                return TableProvider(tables_path=tables_path,
+                                     snapshot_timestamp=timestamp)
+
             return RainViewerProvider(
                 snapshots_path=os.path.join(self._session.data_folder, DataVendor.RainViewer.value),
                 snapshot_timestamp=timestamp)
         elif self._data_vendor.value in [v.value for v in DataVendor]:
-            snapshots_path = os.path.join(self._session.tables_folder, self._data_vendor.value)
-            return TableProvider(tables_path=snapshots_path,
+            return TableProvider(tables_path=self._get_tables_path(timestamp),
                                  snapshot_timestamp=timestamp)
         else:
             raise ValueError(f"Data vendor {self._data_vendor.value} is not supported")
 
+    def _get_tables_path(self, timestamp: int) -> str:
+        """Returns path to the folder with parsed table of the snapshot. When vendor is parsed into a dataset,
+        then it is a partition folder of the snapshot
+
+        Parameters
+        ----------
+        timestamp : int
+            Snapshot timestamp
+
+        Returns
+        -------
+        str
+            Path to the folder
+        """
+        dataset = SnapshotDataset(os.path.join(self._session.datasets_folder, self._data_vendor.value))
+        if dataset.exists():
+            return dataset.partition_path(timestamp)
+
+        return os.path.join(self._session.tables_folder, self._data_vendor.value)
+
     def _get_provider_for_timestamp(self, snapshot_timestamp: int) -> typing.Optional[ForecastProvider]:
         """Returns cached provider for specified snapshot_timestamp or creates new one
 
@@ -67,6 +134,28 @@ class ForecastManager:
 
         return found_provider
 
+    def _attach_sensor_index(self, sensors_table: pandas.DataFrame) -> pandas.DataFrame:
+        """Adds tile and pixel coordinates to the sensors table. Session sensor index is loaded once,
+        if it doesn't exist, then index is built in memory.
+
+        Parameters
+        ----------
+        sensors_table : pandas.DataFrame
+            Table of sensors. It should contains unique rows by sensor id. Has next columns: "id", "lon", "lat"
+
+        Returns
+        -------
+        pandas.DataFrame
+            Sensors table with "tile_x", "tile_y", "px", "py" columns
+        """
+        if self._sensor_index is None:
+            self._sensor_index = SensorIndex.load(self._session.sensor_index_path)
+
+        if self._sensor_index is None:
+            self._sensor_index = SensorIndex.build(sensors_table)
+
+        return self._sensor_index.attach(sensors_table)
+
     def load_forecast(self,
                       time_rage: typing.Tuple[int, int],
                       sensors_table: pandas.DataFrame) -> pandas.DataFrame:
@@ -86,7 +175,10 @@ class ForecastManager:
         """
 
         sensor_ids = set(sensors_table["id"].unique())
-        unique_sensors_table = sensors_table.groupby("id").first().reset_index()
+        unique_sensors_table = sensors_table.groupby("id", observed=True).first().reset_index()
+        if ForecastManager.uses_sensor_index(self._data_vendor):
+            # only tile vendors read forecast by tile and pixel coordinates
+            unique_sensors_table = self._attach_sensor_index(unique_sensors_table)
 
         curr_time = floor_timestamp(time_rage[0], ForecastManager.DATA_STEP)
         end_time = time_rage[1]
@@ -31,3 +31,55 @@ def read_selected_sensors(path: typing.Optional[str] = None) -> pandas.DataFrame
         return pandas.read_csv(path, compression="zip")
 
     return pandas.DataFrame(columns=["id", "lon", "lat", "count", "country"])
+
+
+class CsvAppendWriter:
+    """Streams tables into a single CSV file. The header is written with the first table and next tables
+    are appended with the same columns order, so each table is written exactly once.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            Path to the output CSV file. Existing file will be overwritten
+        """
+        self._path = path
+        self._columns: typing.Optional[typing.List[str]] = None
+        self._rows_num = 0
+
+    @property
+    def rows_num(self) -> int:
+        return self._rows_num
+
+    def write(self, data: typing.Optional[pandas.DataFrame]):
+        """Appends table to the CSV file
+
+        Parameters
+        ----------
+        data : Optional[pandas.DataFrame]
+            Table to append. Empty tables and `None` are skipped
+        """
+        if data is None or len(data.columns) == 0:
+            return
+
+        if self._columns is None:
+            self._columns = list(data.columns)
+            data.to_csv(self._path, index=False, mode="w")
+        else:
+            data.reindex(columns=self._columns).to_csv(self._path, index=False, mode="a", header=False)
+
+        self._rows_num += len(data)
+
+    def close(self):
+        """Finishes writing. Creates an empty file if no table was written
+        """
+        if self._columns is None:
+            pandas.DataFrame().to_csv(self._path, index=False)
+
+    def __enter__(self) -> "CsvAppendWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
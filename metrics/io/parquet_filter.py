@@ -0,0 +1,31 @@
+import pyarrow.dataset
+import typing
+
+
+def build_filter(timestamp_range: typing.Optional[typing.Tuple[int, int]] = None,
+                 ids: typing.Optional[typing.Iterable[str]] = None) -> typing.Optional[pyarrow.dataset.Expression]:
+    """Builds dataset filter expression by `timestamp` and `id` columns
+
+    Parameters
+    ----------
+    timestamp_range : Optional[Tuple[int, int]]
+        Range of `timestamp` column values. Start is excluded, end is included
+    ids : Optional[Iterable[str]]
+        Ids of sensors to keep
+
+    Returns
+    -------
+    Optional[pyarrow.dataset.Expression]
+        Filter expression or `None` if there is nothing to filter
+    """
+    expression = None
+
+    if timestamp_range is not None:
+        expression = (pyarrow.dataset.field("timestamp") > timestamp_range[0]) & \
+            (pyarrow.dataset.field("timestamp") <= timestamp_range[1])
+
+    if ids is not None:
+        ids_expression = pyarrow.dataset.field("id").isin(list(ids))
+        expression = ids_expression if expression is None else expression & ids_expression
+
+    return expression
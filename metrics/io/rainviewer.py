@@ -6,6 +6,7 @@ import os
 import typing
 import zipfile
 
+from metrics.io.tile_cache import TileCache, get_shared_tile_cache
 from metrics.io.tile_loader import BaseTileLoader
 from metrics.utils.dbz import MIN_VALUE
 from metrics.utils.precipitation import PrecipitationData, PrecipitationType
@@ -145,21 +146,51 @@ def decode_mask_from_file(fo: typing.BinaryIO) -> np.ndarray:
 class RainViewerTileLoader(BaseTileLoader):
 
     ZOOM_LEVEL = 7
-
-    def __init__(self, zip_path: str) -> None:
+    # number of decoded tiles that are kept in memory of a loader
+    CACHE_SIZE = 1024
+    # number of tiles that are kept in memory of a loader when tiles are stored in the shared cache,
+    # calc keeps a loader for each snapshot of a job, so tiles are mostly read from the shared cache
+    SHARED_CACHE_SIZE = 64
+
+    def __init__(self, zip_path: str, tile_cache: typing.Optional[TileCache] = None) -> None:
+        """
+        Parameters
+        ----------
+        zip_path : str
+            Path to the snapshot archive
+        tile_cache : Optional[TileCache]
+            Cache of decoded tiles shared between processes. If it is `None`, then shared cache of
+            the process is used (see `set_shared_tile_cache`)
+        """
         self._zip_file = zipfile.ZipFile(zip_path, "r")
 
         file_name = os.path.basename(zip_path)
         self._timestamp_path, _ = os.path.splitext(file_name)
 
         self._zip_precip_type = None
+        self._tile_cache = tile_cache or get_shared_tile_cache()
+
+        # cache is bound to the instance, so it doesn't keep loaders alive after they are released
+        cache_size = RainViewerTileLoader.CACHE_SIZE if self._tile_cache is None else RainViewerTileLoader.SHARED_CACHE_SIZE
+        self._load_impl = functools.lru_cache(maxsize=cache_size)(self._load_cached)
 
     def load(self, offset: int, tile_x: int, tile_y: int) -> PrecipitationData:
         """Overriden from base class"""
         return self._load_impl(offset=offset, tile_x=tile_x, tile_y=tile_y)
 
-    @functools.lru_cache(maxsize=1024, typed=False)
-    def _load_impl(self, offset: int, tile_x: int, tile_y: int) -> PrecipitationData:
+    def _load_cached(self, offset: int, tile_x: int, tile_y: int) -> typing.Optional[PrecipitationData]:
+        if self._tile_cache is None:
+            return self._decode_tile(offset=offset, tile_x=tile_x, tile_y=tile_y)
+
+        key = (self._timestamp_path, offset, RainViewerTileLoader.ZOOM_LEVEL, tile_x, tile_y)
+        found, data = self._tile_cache.get(key)
+        if not found:
+            data = self._decode_tile(offset=offset, tile_x=tile_x, tile_y=tile_y)
+            self._tile_cache.put(key, data)
+
+        return data
+
+    def _decode_tile(self, offset: int, tile_x: int, tile_y: int) -> typing.Optional[PrecipitationData]:
         try:
             tile_path = os.path.join(self._timestamp_path, "_map", f"t{offset}",
                                      str(RainViewerTileLoader.ZOOM_LEVEL), str(tile_x), f"{tile_y}.png")
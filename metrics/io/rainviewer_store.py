@@ -0,0 +1,275 @@
+import cv2
+import numpy as np
+import os
+import pandas
+import pyarrow
+import pyarrow.parquet
+import re
+import tempfile
+import typing
+import zipfile
+
+from metrics.io.tile_loader import BaseTileLoader
+from metrics.utils.dbz import MIN_VALUE
+from metrics.utils.precipitation import PrecipitationData, PrecipitationType
+
+
+# tile paths in a snapshot archive: <ts>/_map/t<offset>/<zoom>/<x>/<y>.png and <ts>/_mask/<zoom>/<x>/<y>.png
+_MAP_TILE_PATTERN = re.compile(r"(?:^|/)_map/t(\d+)/(\d+)/(\d+)/(\d+)\.png$")
+_MASK_TILE_PATTERN = re.compile(r"(?:^|/)_mask/(\d+)/(\d+)/(\d+)\.png$")
+
+
+def _read_image(zip_file: zipfile.ZipFile, path: str) -> np.ndarray:
+    return cv2.imdecode(np.frombuffer(zip_file.read(path), dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+
+
+class RainViewerTileStore:
+    """Decoded tiles of a rainviewer snapshot. Tiles are decoded from the snapshot archive once and stored
+    as raw uint8 arrays, so they are opened with memory mapping and no PNG decoding is needed to read them.
+
+    Store consists of two files:
+
+        <name>.parquet - index with columns "offset", "zoom", "tile_x", "tile_y", "slot", "mask_slot"
+        <name>.tiles   - array of tiles with shape (slots, TILE_SIZE, TILE_SIZE)
+
+    Data tiles keep the encoded byte of the image (dBZ + 32 and high bit of snow, see `decode_data_from_image`).
+    Coverage masks are shared by all offsets of a tile, so they are stored once with 1 for covered pixels.
+    Empty tiles and tiles without coverage mask are not stored.
+    """
+
+    TILE_SIZE = 256
+    TILES_EXT = ".tiles"
+    COLUMNS = ["offset", "zoom", "tile_x", "tile_y", "slot", "mask_slot"]
+
+    def __init__(self, index_path: str) -> None:
+        """
+        Parameters
+        ----------
+        index_path : str
+            Path to the index file of the store
+        """
+        index = pandas.read_parquet(index_path, columns=RainViewerTileStore.COLUMNS)
+        keys = zip(index["offset"].tolist(), index["zoom"].tolist(), index["tile_x"].tolist(), index["tile_y"].tolist())
+        self._slots = dict(zip(keys, zip(index["slot"].tolist(), index["mask_slot"].tolist())))
+
+        tiles_path = RainViewerTileStore.tiles_path(index_path)
+        self._tiles = None
+        if os.path.getsize(tiles_path) > 0:
+            self._tiles = np.memmap(tiles_path, dtype=np.uint8, mode="r")
+            self._tiles = self._tiles.reshape(-1, RainViewerTileStore.TILE_SIZE, RainViewerTileStore.TILE_SIZE)
+
+    @staticmethod
+    def tiles_path(index_path: str) -> str:
+        """Returns path to the tiles file of the store by path to its index"""
+        name, _ = os.path.splitext(index_path)
+        return name + RainViewerTileStore.TILES_EXT
+
+    @staticmethod
+    def write(zip_path: str, index_path: str):
+        """Decodes tiles of the snapshot archive into the store
+
+        Parameters
+        ----------
+        zip_path : str
+            Path to the snapshot archive
+        index_path : str
+            Path to the index file of the store. Tiles file is written next to it
+        """
+        tiles_path = RainViewerTileStore.tiles_path(index_path)
+        rows = []
+        mask_slots = {}
+        slot = 0
+
+        output_folder = os.path.dirname(tiles_path)
+        output_folder = output_folder if output_folder else None
+        fd, tmp_tiles_path = tempfile.mkstemp(dir=output_folder, suffix=".tmp")
+        tmp_index_path = None
+        try:
+            with os.fdopen(fd, "wb") as tiles_file, zipfile.ZipFile(zip_path, "r") as zip_file:
+                names = zip_file.namelist()
+                mask_paths = {}
+                for name in names:
+                    match = _MASK_TILE_PATTERN.search(name)
+                    if match:
+                        mask_paths[tuple(int(value) for value in match.groups())] = name
+
+                for name in sorted(names):
+                    match = _MAP_TILE_PATTERN.search(name)
+                    if match is None:
+                        continue
+
+                    offset, zoom, tile_x, tile_y = (int(value) for value in match.groups())
+                    mask_path = mask_paths.get((zoom, tile_x, tile_y))
+                    if mask_path is None:
+                        continue
+
+                    image = _read_image(zip_file, name)
+                    if len(image.shape) == 2:
+                        continue  # rainviewer returns empty tile
+
+                    if mask_path not in mask_slots:
+                        mask_image = _read_image(zip_file, mask_path)
+                        tiles_file.write((mask_image[..., 3] == 0).astype(np.uint8).tobytes())
+                        mask_slots[mask_path] = slot
+                        slot += 1
+
+                    tiles_file.write(np.ascontiguousarray(image[..., 0]).tobytes())
+                    rows.append((offset, zoom, tile_x, tile_y, slot, mask_slots[mask_path]))
+                    slot += 1
+
+            fd, tmp_index_path = tempfile.mkstemp(dir=output_folder, suffix=".tmp")
+            os.close(fd)
+            index = pandas.DataFrame(rows, columns=RainViewerTileStore.COLUMNS).astype(np.int32)
+            index.to_parquet(tmp_index_path, index=False)
+
+            # store is read only when its index exists, so an old index is removed before tiles are replaced
+            # and the new index is moved last. Interrupted write never leaves an index next to other tiles
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            os.replace(tmp_tiles_path, tiles_path)
+            os.replace(tmp_index_path, index_path)
+        except BaseException:
+            for tmp_path in [tmp_tiles_path, tmp_index_path]:
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def exists(index_path: str) -> bool:
+        """Checks if the store is completely written: both its index and tiles files exist and the index
+        isn't a forecast table that is written to the same path
+
+        Parameters
+        ----------
+        index_path : str
+            Path to the index file of the store
+
+        Returns
+        -------
+        bool
+            Returns `True` if the store can be opened, otherwise returns `False`
+        """
+        if not os.path.exists(index_path) or not os.path.exists(RainViewerTileStore.tiles_path(index_path)):
+            return False
+
+        try:
+            schema = pyarrow.parquet.read_schema(index_path)
+        except pyarrow.ArrowInvalid:
+            return False
+
+        return all(column in schema.names for column in RainViewerTileStore.COLUMNS)
+
+    def load(self, offset: int, zoom: int, tile_x: int, tile_y: int) -> typing.Optional[PrecipitationData]:
+        """Returns decoded tile. It gives the same result as `decode_data_from_file` for the source tile
+
+        Parameters
+        ----------
+        offset : int
+            Time offset in minutes 0, 10, ...
+        zoom : int
+            Zoom level of the tile
+        tile_x : int
+            X coordinate of tile
+        tile_y : int
+            Y coordinate of tile
+
+        Returns
+        -------
+        Optional[PrecipitationData]
+            Returns decoded tile. If tile isn't stored, then returns `None`
+        """
+        slots = self._slots.get((offset, zoom, tile_x, tile_y))
+        if slots is None:
+            return None
+
+        slot, mask_slot = slots
+        reflectivity, type = RainViewerTileStore._decode(encoded=self._tiles[slot],
+                                                         covered=self._tiles[mask_slot] > 0)
+
+        return PrecipitationData(reflectivity=reflectivity, type=type)
+
+    def load_pixels(self,
+                    offset: int,
+                    zoom: int,
+                    tile_x: int,
+                    tile_y: int,
+                    px: np.ndarray,
+                    py: np.ndarray) -> typing.Optional[typing.Tuple[np.ndarray, np.ndarray]]:
+        """Returns decoded values of tile pixels. Only requested pixels are read from the mapped tiles file
+        and decoded, so the whole tile isn't created. Values are the same as pixels of `load` result
+
+        Parameters
+        ----------
+        offset : int
+            Time offset in minutes 0, 10, ...
+        zoom : int
+            Zoom level of the tile
+        tile_x : int
+            X coordinate of tile
+        tile_y : int
+            Y coordinate of tile
+        px : np.ndarray
+            X coordinates of pixels in the tile
+        py : np.ndarray
+            Y coordinates of pixels in the tile
+
+        Returns
+        -------
+        Optional[Tuple[np.ndarray, np.ndarray]]
+            Returns float32 array of reflectivity and uint8 array of precip types. If tile isn't stored,
+            then returns `None`
+        """
+        slots = self._slots.get((offset, zoom, tile_x, tile_y))
+        if slots is None:
+            return None
+
+        slot, mask_slot = slots
+        encoded = self._tiles[slot, py, px]
+        covered = self._tiles[mask_slot, py, px] > 0
+
+        return RainViewerTileStore._decode(encoded=encoded, covered=covered)
+
+    @staticmethod
+    def _decode(encoded: np.ndarray, covered: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        raw_data = encoded & 127
+
+        reflectivity = np.where(raw_data > 0, raw_data.astype(np.float32) - 32, np.float32(MIN_VALUE))
+        reflectivity = np.where(covered, reflectivity, np.float32(np.nan))
+        type = np.where(encoded > 127,
+                        np.uint8(PrecipitationType.SNOW),
+                        np.uint8(PrecipitationType.RAIN))
+
+        return (reflectivity, type)
+
+
+class RainViewerStoreTileLoader(BaseTileLoader):
+    """Loads tiles of a snapshot from `RainViewerTileStore` that is created by `metrics.parse`"""
+
+    ZOOM_LEVEL = 7
+
+    def __init__(self, index_path: str) -> None:
+        """
+        Parameters
+        ----------
+        index_path : str
+            Path to the index file of the store
+        """
+        self._store = RainViewerTileStore(index_path)
+
+    def load(self, offset: int, tile_x: int, tile_y: int) -> PrecipitationData:
+        """Overriden from base class"""
+        return self._store.load(offset=offset, zoom=RainViewerStoreTileLoader.ZOOM_LEVEL, tile_x=tile_x, tile_y=tile_y)
+
+    def load_pixels(self,
+                    offset: int,
+                    tile_x: int,
+                    tile_y: int,
+                    px: np.ndarray,
+                    py: np.ndarray) -> typing.Optional[typing.Tuple[np.ndarray, np.ndarray]]:
+        """Overriden from base class. Pixels are read from the store without decoding the whole tile"""
+        return self._store.load_pixels(offset=offset,
+                                       zoom=RainViewerStoreTileLoader.ZOOM_LEVEL,
+                                       tile_x=tile_x,
+                                       tile_y=tile_y,
+                                       px=px,
+                                       py=py)
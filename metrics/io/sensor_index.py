@@ -0,0 +1,145 @@
+import numpy as np
+import os
+import pandas
+import typing
+
+from metrics.io.tile_reader import TileReader, calculate_tile_pixels
+
+
+TILE_PIXEL_COLUMNS = ["tile_x", "tile_y", "px", "py"]
+
+
+class SensorIndex:
+    """Stores precomputed web mercator tile and pixel coordinates of sensors for several zoom levels.
+    Sensor coordinates do not change within a session, so the index is built once and reused
+    by every tile provider instead of projecting coordinates for each snapshot and forecast offset.
+
+    Index is a table with columns: "id", "lon", "lat", "zoom", "tile_x", "tile_y", "px", "py".
+    Sensors are identified by ("id", "lon", "lat"), so moved sensors are not matched with outdated coordinates.
+    """
+
+    KEY_COLUMNS = ["id", "lon", "lat"]
+    COLUMNS = KEY_COLUMNS + ["zoom"] + TILE_PIXEL_COLUMNS
+
+    def __init__(self, table: pandas.DataFrame) -> None:
+        self._table = table
+
+    @property
+    def table(self) -> pandas.DataFrame:
+        return self._table
+
+    @staticmethod
+    def build(sensors_table: pandas.DataFrame,
+              zoom_levels: typing.Sequence[int] = (TileReader.ZOOM_LEVEL,),
+              tile_size: int = TileReader.TILE_SIZE) -> "SensorIndex":
+        """Builds index for sensors
+
+        Parameters
+        ----------
+        sensors_table : pandas.DataFrame
+            Table of sensors. Has next columns: "id", "lon", "lat"
+        zoom_levels : Sequence[int]
+            Zoom levels to calculate tile and pixel coordinates for
+        tile_size : int
+            Tile size in pixels
+
+        Returns
+        -------
+        SensorIndex
+            Built sensor index
+        """
+        sensors = sensors_table[SensorIndex.KEY_COLUMNS].drop_duplicates()
+
+        lons = sensors["lon"].to_numpy(dtype=np.float64)
+        lats = sensors["lat"].to_numpy(dtype=np.float64)
+
+        zoom_tables = []
+        for zoom in zoom_levels:
+            tile_x, tile_y, px, py = calculate_tile_pixels(lons=lons, lats=lats, zoom=zoom, tile_size=tile_size)
+
+            zoom_tables.append(pandas.DataFrame({"id": sensors["id"].to_numpy(),
+                                                 "lon": lons,
+                                                 "lat": lats,
+                                                 "zoom": np.full(len(sensors), zoom, dtype=np.int32),
+                                                 "tile_x": tile_x.astype(np.int32),
+                                                 "tile_y": tile_y.astype(np.int32),
+                                                 "px": px.astype(np.int32),
+                                                 "py": py.astype(np.int32)}))
+
+        if len(zoom_tables) == 0:
+            return SensorIndex(pandas.DataFrame(columns=SensorIndex.COLUMNS))
+
+        return SensorIndex(pandas.concat(zoom_tables, ignore_index=True))
+
+    @staticmethod
+    def load(path: str) -> typing.Optional["SensorIndex"]:
+        """Loads index from a parquet file
+
+        Parameters
+        ----------
+        path : str
+            Path to the parquet file
+
+        Returns
+        -------
+        Optional[SensorIndex]
+            Returns loaded index. If file doesn't exist, then returns `None`
+        """
+        if not os.path.exists(path):
+            return None
+
+        return SensorIndex(pandas.read_parquet(path))
+
+    def save(self, path: str):
+        """Saves index into a parquet file
+
+        Parameters
+        ----------
+        path : str
+            Path to the output parquet file
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._table.to_parquet(path, index=False)
+
+    def attach(self,
+               sensors_table: pandas.DataFrame,
+               zoom: int = TileReader.ZOOM_LEVEL,
+               tile_size: int = TileReader.TILE_SIZE) -> pandas.DataFrame:
+        """Adds "tile_x", "tile_y", "px", "py" columns to the sensors table.
+        Coordinates of sensors that are missing in the index are calculated in place.
+
+        Parameters
+        ----------
+        sensors_table : pandas.DataFrame
+            Table of sensors. It should contains unique rows by sensor id. Has next columns: "id", "lon", "lat"
+        zoom : int
+            Zoom level of tile and pixel coordinates
+        tile_size : int
+            Tile size in pixels
+
+        Returns
+        -------
+        pandas.DataFrame
+            Sensors table with tile and pixel coordinates
+        """
+        zoom_index = self._table[self._table["zoom"] == zoom].drop(columns=["zoom"])
+        zoom_index = zoom_index.drop_duplicates(subset=SensorIndex.KEY_COLUMNS, keep="first")
+
+        sensors_table = sensors_table.drop(columns=TILE_PIXEL_COLUMNS, errors="ignore")
+        result = sensors_table.merge(zoom_index, on=SensorIndex.KEY_COLUMNS, how="left")
+
+        missing = result["tile_x"].isna().to_numpy()
+        if missing.any():
+            missing_index = SensorIndex.build(sensors_table=result.loc[missing, SensorIndex.KEY_COLUMNS],
+                                              zoom_levels=[zoom],
+                                              tile_size=tile_size)
+            missing_table = result.loc[missing, SensorIndex.KEY_COLUMNS].merge(missing_index.table,
+                                                                               on=SensorIndex.KEY_COLUMNS,
+                                                                               how="left")
+            for column in TILE_PIXEL_COLUMNS:
+                result.loc[missing, column] = missing_table[column].to_numpy()
+
+        for column in TILE_PIXEL_COLUMNS:
+            result[column] = result[column].astype(np.int64)
+
+        return result
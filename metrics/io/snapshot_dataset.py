@@ -0,0 +1,150 @@
+import os
+import pandas
+import pyarrow.dataset
+import typing
+
+from metrics.io.parquet_filter import build_filter
+from metrics.utils.time import floor_timestamp
+
+
+class SnapshotDataset:
+    """Hive-partitioned parquet dataset of a vendor. Each snapshot table is stored in a partition of its hour:
+
+        <root>/snapshot_hour=<hour timestamp>/<snapshot timestamp>.parquet
+
+    Only partitions of the requested hours are listed and rows are filtered with predicate pushdown,
+    so reading a short time range doesn't depend on the number of snapshots in the session.
+    """
+
+    PARTITION_KEY = "snapshot_hour"
+    PARTITION_PERIOD = 3600
+
+    def __init__(self, root: str) -> None:
+        """
+        Parameters
+        ----------
+        root : str
+            Path to the dataset directory
+        """
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    def exists(self) -> bool:
+        """Checks if dataset directory exists"""
+        return os.path.isdir(self._root)
+
+    def partition_path(self, snapshot_timestamp: int) -> str:
+        """Returns path to the partition directory of the snapshot
+
+        Parameters
+        ----------
+        snapshot_timestamp : int
+            Timestamp of the snapshot
+
+        Returns
+        -------
+        str
+            Path to the partition directory
+        """
+        hour = floor_timestamp(snapshot_timestamp, SnapshotDataset.PARTITION_PERIOD)
+        return os.path.join(self._root, f"{SnapshotDataset.PARTITION_KEY}={hour}")
+
+    def file_path(self, snapshot_timestamp: int) -> str:
+        """Returns path to the parquet file of the snapshot
+
+        Parameters
+        ----------
+        snapshot_timestamp : int
+            Timestamp of the snapshot
+
+        Returns
+        -------
+        str
+            Path to the parquet file
+        """
+        return os.path.join(self.partition_path(snapshot_timestamp), f"{snapshot_timestamp}.parquet")
+
+    def list_files(self, snapshots_range: typing.Tuple[int, int]) -> typing.List[str]:
+        """Returns files of snapshots in the range. Only partitions that intersect the range are listed
+
+        Parameters
+        ----------
+        snapshots_range : Tuple[int, int]
+            Range of snapshot timestamps (both ends are included)
+
+        Returns
+        -------
+        List[str]
+            Paths to parquet files of snapshots ordered by snapshot timestamp
+        """
+        start_hour = floor_timestamp(snapshots_range[0], SnapshotDataset.PARTITION_PERIOD)
+
+        files = []
+        for hour in range(start_hour, snapshots_range[1] + 1, SnapshotDataset.PARTITION_PERIOD):
+            partition_path = self.partition_path(hour)
+            if not os.path.isdir(partition_path):
+                continue
+
+            snapshots = []
+            for file_name in os.listdir(partition_path):
+                name, ext = os.path.splitext(file_name)
+                if ext == ".parquet" and name.isdigit() and snapshots_range[0] <= int(name) <= snapshots_range[1]:
+                    snapshots.append(int(name))
+
+            files.extend(os.path.join(partition_path, f"{snapshot}.parquet") for snapshot in sorted(snapshots))
+
+        return files
+
+    def read(self,
+             snapshots_range: typing.Tuple[int, int],
+             timestamp_range: typing.Optional[typing.Tuple[int, int]] = None,
+             ids: typing.Optional[typing.Iterable[str]] = None,
+             columns: typing.Optional[typing.List[str]] = None) -> typing.Optional[pandas.DataFrame]:
+        """Reads rows of snapshots in the range. Filters are pushed down to parquet row groups
+
+        Parameters
+        ----------
+        snapshots_range : Tuple[int, int]
+            Range of snapshot timestamps (both ends are included)
+        timestamp_range : Optional[Tuple[int, int]]
+            Range of `timestamp` column values. Start is excluded, end is included
+        ids : Optional[Iterable[str]]
+            Ids of sensors to read. If it is `None`, then all sensors are read
+        columns : Optional[List[str]]
+            Columns to read. If it is `None`, then all columns are read
+
+        Returns
+        -------
+        Optional[pandas.DataFrame]
+            Returns table with rows of snapshots. If there are no snapshots in the range, then returns `None`
+        """
+        files = self.list_files(snapshots_range)
+        if len(files) == 0:
+            return None
+
+        dataset = pyarrow.dataset.dataset(files, format="parquet")
+
+        return dataset.to_table(columns=columns, filter=build_filter(timestamp_range=timestamp_range,
+                                                                     ids=ids)).to_pandas()
+
+    def read_all(self, columns: typing.Optional[typing.List[str]] = None) -> pandas.DataFrame:
+        """Reads all snapshots of the dataset
+
+        Parameters
+        ----------
+        columns : Optional[List[str]]
+            Columns to read. If it is `None`, then all columns are read
+
+        Returns
+        -------
+        pandas.DataFrame
+            Returns table with rows of all snapshots
+        """
+        dataset = pyarrow.dataset.dataset(self._root, format="parquet", partitioning="hive")
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name != SnapshotDataset.PARTITION_KEY]
+
+        return dataset.to_table(columns=columns).to_pandas()
@@ -0,0 +1,163 @@
+import numpy as np
+import os
+import tempfile
+import typing
+
+from metrics.utils.precipitation import PrecipitationData
+
+
+TileKey = typing.Tuple[typing.Any, ...]
+
+# record of a decoded tile pixel
+TILE_DTYPE = np.dtype([("reflectivity", np.float32), ("type", np.uint8)])
+
+
+class TileCache:
+    """Store of decoded tiles in a directory shared by several processes.
+    Each tile is saved into a separate `.npy` file and loaded back into memory, so tiles
+    decoded by one process are reused by all other processes without decoding PNG files again.
+    Tiles aren't memory mapped, because each mapping keeps a file descriptor open while the tile is used.
+
+    Size of the store is bounded. When it exceeds `max_size`, then least recently used tiles are removed.
+    Access time of a tile is tracked by modification time of its file.
+    """
+
+    # number of stored tiles after which the store size is checked
+    EVICTION_CHECK_PERIOD = 64
+    # extension of files that store empty tiles
+    EMPTY_TILE_EXT = ".none"
+
+    def __init__(self, path: str, max_size: int) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            Path to the cache directory
+        max_size : int
+            Maximum size of the cache in bytes
+        """
+        self._path = path
+        self._max_size = max_size
+        self._stored_num = 0
+
+        os.makedirs(self._path, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def _entry_path(self, key: TileKey) -> str:
+        return os.path.join(self._path, "_".join(str(value) for value in key))
+
+    def get(self, key: TileKey) -> typing.Tuple[bool, typing.Optional[PrecipitationData]]:
+        """Returns decoded tile from the cache
+
+        Parameters
+        ----------
+        key : TileKey
+            Key of the tile
+
+        Returns
+        -------
+        Tuple[bool, Optional[PrecipitationData]]
+            Returns `True` and tile data when tile is found, otherwise returns `False` and `None`.
+            Tile data can be `None` for found tiles without data
+        """
+        entry_path = self._entry_path(key)
+
+        try:
+            if os.path.exists(entry_path + TileCache.EMPTY_TILE_EXT):
+                os.utime(entry_path + TileCache.EMPTY_TILE_EXT)
+                return (True, None)
+
+            data = np.load(entry_path + ".npy")
+            os.utime(entry_path + ".npy")
+        except (FileNotFoundError, ValueError):
+            # tile is not stored yet or it was evicted by another process
+            return (False, None)
+
+        return (True, PrecipitationData(reflectivity=data["reflectivity"], type=data["type"]))
+
+    def put(self, key: TileKey, data: typing.Optional[PrecipitationData]):
+        """Stores decoded tile into the cache
+
+        Parameters
+        ----------
+        key : TileKey
+            Key of the tile
+        data : Optional[PrecipitationData]
+            Decoded tile. `None` is stored for tiles without data
+        """
+        entry_path = self._entry_path(key)
+
+        # write into a temporary file and move it, so other processes never read partially written tiles
+        fd, tmp_path = tempfile.mkstemp(dir=self._path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            if data is not None:
+                record = np.empty(data.reflectivity.shape, dtype=TILE_DTYPE)
+                record["reflectivity"] = data.reflectivity
+                record["type"] = data.type
+                np.save(file, record)
+
+        os.replace(tmp_path, entry_path + (".npy" if data is not None else TileCache.EMPTY_TILE_EXT))
+
+        self._stored_num += 1
+        if self._stored_num % TileCache.EVICTION_CHECK_PERIOD == 0:
+            self.evict()
+
+    def evict(self):
+        """Removes least recently used tiles until size of the cache fits `max_size`"""
+        entries = []
+        total_size = 0
+        with os.scandir(self._path) as it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        if total_size <= self._max_size:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total_size -= size
+            if total_size <= self._max_size:
+                break
+
+
+_shared_tile_cache: typing.Optional[TileCache] = None
+
+
+def set_shared_tile_cache(path: typing.Optional[str], max_size: int = 0):
+    """Sets tile cache that is used by tile loaders of the current process.
+    It is called in each process of a pool, so all of them share the same cache directory
+
+    Parameters
+    ----------
+    path : Optional[str]
+        Path to the cache directory. If it is `None`, then shared cache is disabled
+    max_size : int
+        Maximum size of the cache in bytes
+    """
+    global _shared_tile_cache
+    _shared_tile_cache = TileCache(path=path, max_size=max_size) if path is not None else None
+
+
+def get_shared_tile_cache() -> typing.Optional[TileCache]:
+    """Returns tile cache of the current process or `None` if it isn't set"""
+    return _shared_tile_cache
@@ -1,3 +1,6 @@
+import numpy as np
+import typing
+
 from abc import abstractmethod
 from metrics.utils.precipitation import PrecipitationData
 
@@ -22,3 +25,37 @@ class BaseTileLoader:
             Loaded precipitation data
         """
         raise NotImplementedError(f"Have to be overriden in {self.__class__.__name__}")
+
+    def load_pixels(self,
+                    offset: int,
+                    tile_x: int,
+                    tile_y: int,
+                    px: np.ndarray,
+                    py: np.ndarray) -> typing.Optional[typing.Tuple[np.ndarray, np.ndarray]]:
+        """Loads values of tile pixels. By default the whole tile is loaded and its pixels are gathered,
+        loaders that can read separate pixels override it
+
+        Parameters
+        ----------
+        offset : int
+            Time offset in minutes 0, 10, ...
+        tile_x : int
+            X coordinate of tile
+        tile_y : int
+            Y coordinate of tile
+        px : np.ndarray
+            X coordinates of pixels in the tile
+        py : np.ndarray
+            Y coordinates of pixels in the tile
+
+        Returns
+        -------
+        Optional[Tuple[np.ndarray, np.ndarray]]
+            Returns float32 array of reflectivity and uint8 array of precip types. If tile isn't found,
+            then returns `None`
+        """
+        data = self.load(offset=offset, tile_x=tile_x, tile_y=tile_y)
+        if data is None:
+            return None
+
+        return (data.reflectivity[py, px], data.type[py, px])
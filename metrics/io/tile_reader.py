@@ -17,6 +17,74 @@ class PrecipValue:
         return self.precip_type == PrecipitationType.RAIN
 
 
+def calculate_tile_pixels(lons: np.ndarray,
+                          lats: np.ndarray,
+                          zoom: int,
+                          tile_size: int) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Calculates tile and pixel coordinates for arrays of coordinates. It repeats `mercantile.tile`,
+    `mercantile.xy_bounds` and `mercantile.xy` math with NumPy
+
+    Parameters
+    ----------
+    lons : np.ndarray
+        Longitudes of the points
+    lats : np.ndarray
+        Latitudes of the points
+    zoom : int
+        Zoom level
+    tile_size : int
+        Tile size in pixels
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        Returns `tile_x`, `tile_y`, `px`, `py` arrays. Pixel coordinates of points that can't be projected
+        into web mercator are set to -1
+    """
+    lons = np.asarray(lons, dtype=np.float64)
+    lats = np.asarray(lats, dtype=np.float64)
+
+    tile_size_mult = tile_size - 1
+    tiles_num = 2 ** zoom
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # mercantile.tile
+        x = lons / 360.0 + 0.5
+        sinlat = np.sin(np.radians(lats))
+        y = 0.5 - 0.25 * np.log((1.0 + sinlat) / (1.0 - sinlat)) / np.pi
+
+        tile_x = np.floor((x + mercantile.EPSILON) * tiles_num)
+        tile_y = np.floor((y + mercantile.EPSILON) * tiles_num)
+        tile_x = np.where(x <= 0, 0, np.where(x >= 1, tiles_num - 1, tile_x))
+        tile_y = np.where(y <= 0, 0, np.where(y >= 1, tiles_num - 1, tile_y))
+        tile_x = np.nan_to_num(tile_x, nan=0).astype(np.int64)
+        tile_y = np.nan_to_num(tile_y, nan=0).astype(np.int64)
+
+        # mercantile.xy_bounds
+        tile_merc_size = mercantile.CE / tiles_num
+        left = tile_x * tile_merc_size - mercantile.CE / 2
+        right = left + tile_merc_size
+        top = mercantile.CE / 2 - tile_y * tile_merc_size
+        bottom = top - tile_merc_size
+
+        # mercantile.xy
+        merc_x = mercantile.RE * np.radians(lons)
+        merc_y = mercantile.RE * np.log(np.tan((np.pi * 0.25) + (0.5 * np.radians(lats))))
+
+        pixel_x = 0.5 + (merc_x - left) / (right - left) * tile_size_mult
+        pixel_y = 0.5 + ((1.0 - (merc_y - bottom) / (top - bottom)) * tile_size_mult)
+
+    valid = np.isfinite(pixel_x) & np.isfinite(pixel_y) & \
+        (pixel_x >= 0) & (pixel_x < tile_size) & \
+        (pixel_y >= 0) & (pixel_y < tile_size)
+
+    # `astype` truncates towards zero in the same way as `int()` does
+    pixel_x = np.where(valid, pixel_x, -1).astype(np.int64)
+    pixel_y = np.where(valid, pixel_y, -1).astype(np.int64)
+
+    return (tile_x, tile_y, pixel_x, pixel_y)
+
+
 class TileReader:
 
     ZOOM_LEVEL = 7
@@ -37,6 +105,17 @@ class TileReader:
 
         return (tile, PixelCoordinate(x=pixel_x, y=pixel_y, zoom=TileReader.ZOOM_LEVEL))
 
+    def _calculate_pixel_coordinates_batch(self,
+                                           lons: np.ndarray,
+                                           lats: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray,
+                                                                             np.ndarray, np.ndarray]:
+        """Vectorized version of `_calculate_pixel_coordinates`. See `calculate_tile_pixels`
+        """
+        return calculate_tile_pixels(lons=lons,
+                                     lats=lats,
+                                     zoom=TileReader.ZOOM_LEVEL,
+                                     tile_size=TileReader.TILE_SIZE)
+
     def get_dbz_value_by_coords(self, coords: Coordinate, offset: int) -> PrecipValue:
         """Returns dbz value with precip type by coordinates and minutes offset
         """
@@ -77,3 +156,93 @@ class TileReader:
             dbz = None
         precip_type = PrecipitationType(data.type[py, px])
         return PrecipValue(dbz=dbz, precip_type=precip_type)
+
+    def get_dbz_values(self,
+                       lons: np.ndarray,
+                       lats: np.ndarray,
+                       offset: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """Returns dbz values with precip types for arrays of coordinates and minutes offset.
+        Batch version of `get_dbz_value_by_coords`
+
+        Parameters
+        ----------
+        lons : np.ndarray
+            Longitudes of the points
+        lats : np.ndarray
+            Latitudes of the points
+        offset : int
+            Forecast offset in minutes to load tiles
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Returns float32 array of dbz values and uint8 array of precip types (see PrecipitationType).
+            When no coverage, then dbz value is NaN
+        """
+        tile_x, tile_y, px, py = self._calculate_pixel_coordinates_batch(lons=lons, lats=lats)
+
+        return self.get_dbz_values_by_tiles(offset=offset,
+                                            px=px,
+                                            py=py,
+                                            tile_x=tile_x,
+                                            tile_y=tile_y)
+
+    def get_dbz_values_by_tiles(self,
+                                offset: int,
+                                px: np.ndarray,
+                                py: np.ndarray,
+                                tile_x: np.ndarray,
+                                tile_y: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """Returns dbz values with precip types by arrays of tile coordinates and pixel coordinates in tiles.
+        Points are grouped by tile, so each tile is loaded once and its pixels are gathered with a single
+        call of `BaseTileLoader.load_pixels`. Batch version of `get_dbz_value_by_tile`
+
+        Parameters
+        ----------
+        offset : int
+            Forecast offset in minutes to load tiles
+        px : np.ndarray
+            X coordinates of pixels in tiles. Negative value marks a point without data
+        py : np.ndarray
+            Y coordinates of pixels in tiles. Negative value marks a point without data
+        tile_x : np.ndarray
+            X coordinates of tiles
+        tile_y : np.ndarray
+            Y coordinates of tiles
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Returns float32 array of dbz values and uint8 array of precip types (see PrecipitationType).
+            When no coverage, then dbz value is NaN
+        """
+        px = np.asarray(px, dtype=np.int64)
+        py = np.asarray(py, dtype=np.int64)
+        tile_x = np.asarray(tile_x, dtype=np.int64)
+        tile_y = np.asarray(tile_y, dtype=np.int64)
+
+        dbz = np.full(px.shape, np.nan, dtype=np.float32)
+        precip_type = np.full(px.shape, PrecipitationType.UNKNOWN.value, dtype=np.uint8)
+
+        valid_indices = np.flatnonzero((px >= 0) & (py >= 0))
+        if len(valid_indices) == 0:
+            return (dbz, precip_type)
+
+        # group points by tile
+        tile_keys = (tile_x[valid_indices] << 32) | tile_y[valid_indices]
+        order = np.argsort(tile_keys, kind="stable")
+        sorted_keys = tile_keys[order]
+        group_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+
+        for group in np.split(valid_indices[order], group_starts[1:]):
+            values = self._tile_loader.load_pixels(offset=offset,
+                                                   tile_x=int(tile_x[group[0]]),
+                                                   tile_y=int(tile_y[group[0]]),
+                                                   px=px[group],
+                                                   py=py[group])
+            if values is None:
+                continue
+
+            dbz[group], precip_type[group] = values
+
+        return (dbz, precip_type)
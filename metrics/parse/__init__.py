@@ -2,6 +2,7 @@ from metrics.data_vendor import DataVendor
 
 from metrics.parse.forecast.accuweather import AccuWeatherParser
 from metrics.parse.forecast.rainbow import RainbowAiParser
+from metrics.parse.forecast.rainviewer import RainViewerParser
 from metrics.parse.forecast.tomorrow_io import TomorrowIoParser
 from metrics.parse.forecast.vaisala import VaisalaParser
 from metrics.parse.forecast.weather_company import WeatherCompanyParser
@@ -15,6 +16,7 @@ PROVIDERS_PARSERS = {
     DataVendor.Vaisala.value: VaisalaParser,
     DataVendor.RainbowAi.value: RainbowAiParser,
     DataVendor.WeatherCompany.value: WeatherCompanyParser,
+    DataVendor.RainViewer.value: RainViewerParser,
 
     DataVendor.Metar.value: MetarParser,
 }
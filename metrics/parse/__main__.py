@@ -4,7 +4,10 @@ from metrics.parse.parse import parse
 
 def _run_parse(args: argparse.Namespace):
     parse(session_path=args.session_path,
-          process_num=args.process_num)
+          process_num=args.process_num,
+          dataset=args.dataset,
+          sensors_path=args.sensors,
+          sensor_neighbourhood=args.sensor_neighbourhood)
 
 
 if __name__ == "__main__":
@@ -15,6 +18,14 @@ if __name__ == "__main__":
     common = parser.add_argument_group("Common parameters")
     common.add_argument("--process-num", type=int, dest="process_num", default=None, required=False,
                         help="Number of processes for multiprocessing")
+    common.add_argument("--dataset", dest="dataset", action="store_true", default=False,
+                        help=("Write tables of each vendor into a dataset partitioned by snapshot hour, "
+                              "so metrics calculation reads only relevant partitions and row groups"))
+    common.add_argument("--sensors", type=str, dest="sensors", default=None, required=False,
+                        help=("Path to csv file with sensors. Only values at sensor locations are extracted "
+                              "from tile vendors (rainviewer) into forecast tables"))
+    common.add_argument("--sensor-neighbourhood", type=int, dest="sensor_neighbourhood", default=1, required=False,
+                        help="Size of an odd square of pixels around a sensor, maximum value of the square is used")
 
     parser.add_argument("--session-path", type=str, dest="session_path", required=True,
                         help="Path to session")
@@ -1,14 +1,37 @@
 import os
 import pandas
+import pyarrow
+import pyarrow.parquet
 import typing
 import zipfile
 
 from abc import abstractmethod
+from metrics.parse.json_decoder import JsonDecodeError, get_json_decoder
+from metrics.parse.table_builder import TableBuilder
+
+
+# Arrow types of columns that are common for session tables
+COLUMN_TYPES: typing.Dict[str, pyarrow.DataType] = {
+    "id": pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+    "lon": pyarrow.float64(),
+    "lat": pyarrow.float64(),
+    "timestamp": pyarrow.int64(),
+    "precip_rate": pyarrow.float32(),
+    "precip_prob": pyarrow.float32(),
+    "precip_type": pyarrow.uint8()
+}
+
+PARQUET_COMPRESSION = "zstd"
+# small row groups allow to skip data by column statistics while reading
+PARQUET_ROW_GROUP_SIZE = 65536
 
 
 class BaseParser:
     """Base class for raw observation/forecast parsing"""
 
+    # name of the backend that decodes JSON files, the fastest installed one is used by default (see `get_json_decoder`)
+    json_backend: typing.Optional[str] = None
+
     def parse(self, input_archive_path: str, output_parquet_path: str):
         """Converts data from raw format to parquet table
 
@@ -19,7 +42,7 @@ class BaseParser:
         output_parquet_path : str
             Path to the output parquet file
         """
-        rows = []
+        builder = TableBuilder(columns=self._get_columns(), schema=self._get_schema())
         with zipfile.ZipFile(input_archive_path, "r") as zip_file:
             zip_name = os.path.basename(input_archive_path)
             timestamp = int(zip_name.replace(".zip", ""))
@@ -27,13 +50,91 @@ class BaseParser:
             for file_name in zip_file.namelist():
                 _, ext = os.path.splitext(file_name)
                 if self._should_parse_file_extension(ext):
-                    parsed_rows = self._parse_impl(timestamp=timestamp,
-                                                   file_name=file_name,
-                                                   data=zip_file.read(file_name))
-                    rows.extend(parsed_rows)
+                    self._parse_into(builder=builder,
+                                     timestamp=timestamp,
+                                     file_name=file_name,
+                                     data=zip_file.read(file_name))
+
+        self._write_arrow_table(table=builder.build(), output_parquet_path=output_parquet_path)
+
+    def _parse_into(self, builder: TableBuilder, timestamp: int, file_name: str, data: bytes):
+        """Parses file from archive and appends its values to the table builder.
+        By default rows returned by `_parse_impl` are appended. Parsers that produce values column by column
+        override it to append columns without creating rows
+
+        Parameters
+        ----------
+        builder : TableBuilder
+            Builder of the output table
+        timestamp : int
+            Timestamp of the archive
+        file_name : str
+            Name of the file from archive
+        data : bytes
+            Data to parse
+        """
+        builder.append_rows(self._parse_impl(timestamp=timestamp, file_name=file_name, data=data))
+
+    def _decode_json(self, data: bytes) -> typing.Any:
+        """Decodes JSON document with the backend of the parser
+
+        Parameters
+        ----------
+        data : bytes
+            JSON document
+
+        Returns
+        -------
+        Any
+            Returns decoded document
+
+        Raises
+        ------
+        JsonDecodeError
+            If document isn't valid JSON
+        """
+        decoder, decode_errors = get_json_decoder(self.json_backend)
+        try:
+            return decoder(data)
+        except decode_errors as e:
+            raise JsonDecodeError(str(e)) from e
+
+    def _write_table(self, data_frame: pandas.DataFrame, output_parquet_path: str):
+        """Writes table into parquet file with types declared by `_get_schema`
+
+        Parameters
+        ----------
+        data_frame : pandas.DataFrame
+            Parsed table
+        output_parquet_path : str
+            Path to the output parquet file
+        """
+        table = pyarrow.Table.from_pandas(data_frame, preserve_index=False)
+        for column, column_type in self._get_schema().items():
+            index = table.schema.get_field_index(column)
+            if index >= 0:
+                table = table.set_column(index, column, table.column(index).cast(column_type))
+
+        # pandas metadata describes types before casting
+        table = table.replace_schema_metadata(None)
+
+        self._write_arrow_table(table=table, output_parquet_path=output_parquet_path)
 
-        data_frame = pandas.DataFrame(rows, columns=self._get_columns())
-        data_frame.to_parquet(output_parquet_path, compression="gzip")
+    def _write_arrow_table(self, table: pyarrow.Table, output_parquet_path: str):
+        """Writes table into parquet file
+
+        Parameters
+        ----------
+        table : pyarrow.Table
+            Parsed table with final types of columns
+        output_parquet_path : str
+            Path to the output parquet file
+        """
+        pyarrow.parquet.write_table(table,
+                                    output_parquet_path,
+                                    compression=PARQUET_COMPRESSION,
+                                    row_group_size=PARQUET_ROW_GROUP_SIZE,
+                                    write_statistics=True)
 
     @abstractmethod
     def _parse_impl(self, timestamp: int, file_name: str, data: bytes) -> typing.List[typing.List[any]]:
@@ -71,6 +172,17 @@ class BaseParser:
         """
         raise NotImplementedError(f"This method have to be overriden in class {self.__class__.__name__}")
 
+    def _get_schema(self) -> typing.Dict[str, pyarrow.DataType]:
+        """Returns Arrow types of columns in the final parquet file.
+        By default types of known columns from `COLUMN_TYPES` are used, types of other columns are inferred
+
+        Returns
+        -------
+        Dict[str, pyarrow.DataType]
+            Returns type for each column name
+        """
+        return {column: COLUMN_TYPES[column] for column in self._get_columns() if column in COLUMN_TYPES}
+
     @abstractmethod
     def _get_columns(self) -> typing.List[str]:
         """Returns list of columns in the final parquet file
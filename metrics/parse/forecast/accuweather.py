@@ -1,49 +1,81 @@
 
-import json
+import numpy as np
 import os
 import typing
 
 from metrics.parse.base_parser import BaseParser
+from metrics.parse.table_builder import TableBuilder
 from metrics.utils.precipitation import PrecipitationType
 
 
+PRECIP_RATE = 10.0  # mm/h
+
+
 class AccuWeatherParser(BaseParser):
 
     def _parse_impl(self, timestamp: int, file_name: str, data: bytes) -> typing.List[typing.List[any]]:
         """See :func:`~metrics.base_parser.BaseParser._parse_impl`"""
-        rows = []
-        data_json = json.loads(data)
+        columns = self._parse_columns(timestamp=timestamp, file_name=file_name, data=data)
+        if columns is None:
+            return []
+
+        return list(zip(*(np.asarray(columns[column]).tolist() for column in self._get_columns())))
+
+    def _parse_into(self, builder: TableBuilder, timestamp: int, file_name: str, data: bytes):
+        """See :func:`~metrics.base_parser.BaseParser._parse_into`"""
+        columns = self._parse_columns(timestamp=timestamp, file_name=file_name, data=data)
+        if columns is not None:
+            builder.append_columns(columns)
+
+    def _parse_columns(self,
+                       timestamp: int,
+                       file_name: str,
+                       data: bytes) -> typing.Optional[typing.Dict[str, typing.Union[np.ndarray, typing.List[str]]]]:
+        """Parses minute values of the forecast. Each summary is a segment of minutes with the same values,
+        so values of segments are repeated by their lengths instead of creating a row for each minute
+
+        Returns
+        -------
+        Optional[Dict[str, Union[np.ndarray, List[str]]]]
+            Returns values of each column or `None` if file has no forecast
+        """
+        data_json = self._decode_json(data)
         sensor_id = os.path.basename(file_name).replace(".json", "")
 
-        if "position" in data_json:
+        if "position" not in data_json:
+            return None
 
-            payload_json = data_json["payload"]
-            lon = data_json["position"]["lon"]
-            lat = data_json["position"]["lat"]
+        payload_json = data_json["payload"]
+        lon = data_json["position"]["lon"]
+        lat = data_json["position"]["lat"]
 
-            if "Summaries" in payload_json:
+        summaries = payload_json.get("Summaries")
+        if not summaries:
+            return None
 
-                for item in payload_json["Summaries"]:
+        start_minutes = np.array([item["StartMinute"] for item in summaries], dtype=np.int64)
+        end_minutes = np.array([item["EndMinute"] for item in summaries], dtype=np.int64) + 1
+        lengths = np.maximum(end_minutes - start_minutes, 0)
 
-                    precip_rate = 0.0
-                    precip_prob = 0.0
-                    precip_type = PrecipitationType.UNKNOWN.value
+        type_names = [item["Type"] for item in summaries]
+        has_precip = np.array([name is not None for name in type_names], dtype=bool)
+        is_snow = np.array([name == "SNOW" for name in type_names], dtype=bool)
 
-                    precip_type_name = item["Type"]
-                    if precip_type_name is not None:
-                        precip_prob = 1.0
-                        precip_rate = 10.0  # mm/h
-                        precip_type = PrecipitationType.RAIN.value
+        precip_type = np.where(is_snow, PrecipitationType.SNOW.value, PrecipitationType.RAIN.value)
+        precip_type = np.where(has_precip, precip_type, PrecipitationType.UNKNOWN.value).astype(np.uint8)
 
-                        if precip_type_name == "SNOW":
-                            precip_type = PrecipitationType.SNOW.value
+        # minute offsets of all segments: start of a segment plus position inside it
+        size = int(lengths.sum())
+        segment_starts = np.cumsum(lengths) - lengths
+        offsets = np.arange(size, dtype=np.int64) + np.repeat(start_minutes - segment_starts, lengths)
 
-                    start_time = item["StartMinute"]
-                    end_time = item["EndMinute"] + 1
-                    for offset in range(start_time, end_time):
-                        rows.append((sensor_id, lon, lat, timestamp + offset * 60,
-                                    precip_rate, precip_prob, precip_type))
-        return rows
+        return {"id": [sensor_id] * size,
+                "lon": np.full(size, lon, dtype=np.float64),
+                "lat": np.full(size, lat, dtype=np.float64),
+                "timestamp": timestamp + offsets * 60,
+                "precip_rate": np.repeat(np.where(has_precip, PRECIP_RATE, 0.0), lengths),
+                "precip_prob": np.repeat(np.where(has_precip, 1.0, 0.0), lengths),
+                "precip_type": np.repeat(precip_type, lengths)}
 
     def _should_parse_file_extension(self, file_extension: str) -> bool:
         """See :func:`~metrics.base_parser.BaseParser._should_parse_file_extension`"""
@@ -1,4 +1,3 @@
-import json
 import os
 
 from typing import List
@@ -24,7 +23,7 @@ class RainbowAiParser(BaseParser):
         """See :func:`~metrics.base_parser.BaseParser._parse_impl`"""
         rows = []
 
-        data_json = json.loads(data)
+        data_json = self._decode_json(data)
         sensor_id = os.path.basename(file_name).replace(".json", "")
 
         lon = data_json["longitude"]
@@ -0,0 +1,107 @@
+import numpy as np
+import os
+import pandas
+
+from typing import List, Optional
+
+from metrics.calc.forecast.rainviewer import RainViewerProvider
+from metrics.io.rainviewer_store import RainViewerTileStore
+from metrics.io.sensor_index import TILE_PIXEL_COLUMNS
+from metrics.io.tile_reader import TileReader, calculate_tile_pixels
+from metrics.parse.base_parser import BaseParser
+
+
+class RainViewerParser(BaseParser):
+    """Converts rainviewer snapshots for metrics calculation.
+
+    By default tiles are decoded into `RainViewerTileStore`, so calc reads them with memory mapping
+    instead of decoding PNG files. Parquet file of the store is its index, tiles are written next to it.
+
+    When sensors are specified, then only tiles that contain sensors are decoded and values at sensor
+    locations are written into a forecast table, so rainviewer is read like table vendors.
+    """
+
+    def __init__(self, sensors_path: Optional[str] = None, neighbourhood: int = 1) -> None:
+        """
+        Parameters
+        ----------
+        sensors_path : Optional[str]
+            Path to csv file with sensors. Has next columns: "id", "lon", "lat"
+        neighbourhood : int
+            Size of a square of pixels around a sensor. Maximum value of the square is used as a sensor value.
+            Square is clipped by tile borders
+        """
+        assert neighbourhood > 0 and neighbourhood % 2 == 1, "Neighbourhood should be an odd positive number"
+
+        self._sensors_path = sensors_path
+        self._neighbourhood = neighbourhood
+
+    def parse(self, input_archive_path: str, output_parquet_path: str):
+        """See :func:`~metrics.base_parser.BaseParser.parse`"""
+        if self._sensors_path is None:
+            RainViewerTileStore.write(zip_path=input_archive_path, index_path=output_parquet_path)
+            return
+
+        # table replaces tiles of the snapshot that could be decoded before, so calc doesn't read it as a store
+        tiles_path = RainViewerTileStore.tiles_path(output_parquet_path)
+        if os.path.exists(tiles_path):
+            os.remove(tiles_path)
+
+        sensors = self._load_sensors()
+
+        zip_name = os.path.basename(input_archive_path)
+        timestamp = int(zip_name.replace(".zip", ""))
+        provider = RainViewerProvider(snapshots_path=os.path.dirname(input_archive_path),
+                                      snapshot_timestamp=timestamp)
+        data = provider.load(sensors_table=sensors)
+
+        # keep maximum value of each sensor neighbourhood
+        data = data.sort_values(by="precip_rate", kind="stable")
+        data = data.drop_duplicates(subset=["id", "timestamp"], keep="last")
+
+        sensor_coords = sensors[["id", "lon", "lat"]].drop_duplicates(subset=["id"])
+        data = data.merge(sensor_coords, on="id", how="left").sort_values(by=["id", "timestamp"])
+        data["precip_prob"] = 1.0
+
+        self._write_table(data_frame=data[self._get_columns()].reset_index(drop=True),
+                          output_parquet_path=output_parquet_path)
+
+    def _load_sensors(self) -> pandas.DataFrame:
+        """Loads sensors with tile and pixel coordinates. Each sensor has a row for every pixel of its neighbourhood
+
+        Returns
+        -------
+        pandas.DataFrame
+            Table with columns: "id", "lon", "lat", "tile_x", "tile_y", "px", "py"
+        """
+        sensors = pandas.read_csv(self._sensors_path, usecols=["id", "lon", "lat"]).drop_duplicates()
+
+        tile_x, tile_y, px, py = calculate_tile_pixels(lons=sensors["lon"].to_numpy(dtype=np.float64),
+                                                       lats=sensors["lat"].to_numpy(dtype=np.float64),
+                                                       zoom=TileReader.ZOOM_LEVEL,
+                                                       tile_size=TileReader.TILE_SIZE)
+        sensors = sensors.assign(tile_x=tile_x, tile_y=tile_y, px=px, py=py)
+
+        radius = self._neighbourhood // 2
+        if radius == 0:
+            return sensors
+
+        shifted = []
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                shifted.append(sensors.assign(px=np.clip(px + dx, 0, TileReader.TILE_SIZE - 1),
+                                              py=np.clip(py + dy, 0, TileReader.TILE_SIZE - 1)))
+
+        sensors = pandas.concat(shifted, ignore_index=True)
+        return sensors.drop_duplicates(subset=["id"] + TILE_PIXEL_COLUMNS)
+
+    def _should_parse_file_extension(self, file_extension: str) -> bool:
+        """See :func:`~metrics.base_parser.BaseParser._should_parse_file_extension`"""
+        return file_extension == ".png"
+
+    def _get_columns(self) -> List[str]:
+        """See :func:`~metrics.base_parser.BaseParser._get_columns`"""
+        if self._sensors_path is None:
+            return RainViewerTileStore.COLUMNS
+
+        return ["id", "lon", "lat", "timestamp", "precip_rate", "precip_prob", "precip_type"]
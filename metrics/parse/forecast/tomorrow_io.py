@@ -1,27 +1,22 @@
 
-import json
 import os
 import typing
 
-from dateutil.parser import isoparse
 from metrics.parse.base_parser import BaseParser
 from metrics.utils.precipitation import PrecipitationType
+from metrics.utils.time import parse_iso_timestamp as _parse_time
 
 OutputRowType = typing.List[typing.Tuple[str, float, float, int, float, float, int]]
 
 PROB_THRESHOLD = 0.7
 
 
-def _parse_time(time_str: str) -> int:
-    return int(isoparse(time_str).timestamp())
-
-
 class TomorrowIoParser(BaseParser):
 
     def _parse_impl(self, timestamp: int, file_name: str, data: bytes) -> typing.List[typing.List[any]]:
         """See :func:`~metrics.base_parser.BaseParser._parse_impl`"""
         rows = []
-        data_json = json.loads(data)
+        data_json = self._decode_json(data)
         sensor_id = os.path.basename(file_name).replace(".json", "")
 
         if "position" in data_json:
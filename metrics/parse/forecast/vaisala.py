@@ -1,4 +1,3 @@
-import json
 import os
 import typing
 
@@ -22,7 +21,7 @@ class VaisalaParser(BaseParser):
     def _parse_impl(self, timestamp: int, file_name: str, data: bytes) -> typing.List[typing.List[any]]:
         """See :func:`~metrics.base_parser.BaseParser._parse_impl`"""
         rows = []
-        data_json = json.loads(data)
+        data_json = self._decode_json(data)
         sensor_id = os.path.basename(file_name).replace(".json", "")
 
         if "position" in data_json:
@@ -1,21 +1,16 @@
-import json
 import os
 import typing
 
-from dateutil.parser import isoparse
 from metrics.parse.base_parser import BaseParser
 
 from rich.console import Console
 from metrics.utils.precipitation import PrecipitationType
+from metrics.utils.time import parse_iso_timestamp as _parse_time
 
 
 console = Console()
 
 
-def _parse_time(time_str: str) -> int:
-    return int(isoparse(time_str).timestamp())
-
-
 def _parse_precip_type(precip_type: str) -> PrecipitationType:
     if precip_type == "rain":
         return PrecipitationType.RAIN
@@ -31,7 +26,7 @@ class WeatherCompanyParser(BaseParser):
     def _parse_impl(self, timestamp: int, file_name: str, data: bytes) -> typing.List[typing.List[any]]:
         """See :func:`~metrics.base_parser.BaseParser._parse_impl`"""
         rows = []
-        data_json = json.loads(data)
+        data_json = self._decode_json(data)
         sensor_id = os.path.basename(file_name).replace(".json", "")
 
         lat = data_json["position"]["lat"]
@@ -1,14 +1,14 @@
 
-import json
 import os
 import typing
 
 from dataclasses import dataclass
-from dateutil.parser import isoparse
 
 from metrics.parse.base_parser import BaseParser
+from metrics.parse.json_decoder import JsonDecodeError
 from rich.console import Console
 from metrics.utils.precipitation import PrecipitationType
+from metrics.utils.time import parse_iso_timestamp as _parse_time
 
 
 OutputRowType = typing.List[typing.Tuple[str, float, float, int, float, float, int]]
@@ -18,10 +18,6 @@ PROB_THRESHOLD = float(os.getenv("WEATHERINDEX_PARSE_PROB_THRESHOLD", 0.6))
 console = Console()
 
 
-def _parse_time(time_str: str) -> int:
-    return int(isoparse(time_str).timestamp())
-
-
 def _condition_to_precip_type(condition: str) -> PrecipitationType:
     if condition == "clear":
         return PrecipitationType.UNKNOWN
@@ -100,14 +96,14 @@ class WeatherKitParser(BaseParser):
         """See :func:`~metrics.base_parser.BaseParser._parse_impl`"""
         rows = []
         try:
-            data_json = json.loads(data)
+            data_json = self._decode_json(data)
             sensor_id = os.path.basename(file_name).replace(".json", "")
 
             if "forecastNextHour" in data_json:
                 rows.extend(self._parse_next_hour(sensor_id=sensor_id,
                                                   forecast=data_json["forecastNextHour"]))
-        except json.decoder.JSONDecodeError:
-            console.log(f"json.decoder.JSONDecodeError on parsing {file_name} inside {timestamp}.zip")
+        except JsonDecodeError:
+            console.log(f"JsonDecodeError on parsing {file_name} inside {timestamp}.zip")
 
         return rows
 
@@ -0,0 +1,65 @@
+import functools
+import json
+import typing
+
+
+JsonDecoder = typing.Callable[[typing.Union[bytes, str]], typing.Any]
+DecodeErrors = typing.Tuple[typing.Type[Exception], ...]
+
+# backends in order of preference, fast ones are used when they are installed
+JSON_BACKENDS = ["orjson", "msgspec", "json"]
+
+
+class JsonDecodeError(ValueError):
+    """Document can't be decoded. It's raised by all backends"""
+
+
+def _load_backend(backend: str) -> typing.Optional[typing.Tuple[JsonDecoder, DecodeErrors]]:
+    if backend == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            return None
+
+        return (orjson.loads, (orjson.JSONDecodeError,))
+
+    if backend == "msgspec":
+        try:
+            import msgspec
+        except ImportError:
+            return None
+
+        return (msgspec.json.Decoder().decode, (msgspec.DecodeError,))
+
+    if backend == "json":
+        return (json.loads, (json.JSONDecodeError,))
+
+    raise ValueError(f"Unknown JSON backend {backend}. Supported backends: {JSON_BACKENDS}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_json_decoder(backend: typing.Optional[str] = None) -> typing.Tuple[JsonDecoder, DecodeErrors]:
+    """Returns function that decodes JSON documents and exceptions it raises on invalid documents
+
+    Parameters
+    ----------
+    backend : Optional[str]
+        Name of the backend: "orjson", "msgspec" or "json". If it is `None`, then the fastest installed one is used
+
+    Returns
+    -------
+    Tuple[JsonDecoder, DecodeErrors]
+        Returns decoding function and exceptions that it raises on invalid documents
+    """
+    if backend is not None:
+        decoder = _load_backend(backend)
+        if decoder is None:
+            raise ImportError(f"JSON backend {backend} is not installed")
+        return decoder
+
+    for backend in JSON_BACKENDS:
+        decoder = _load_backend(backend)
+        if decoder is not None:
+            return decoder
+
+    raise ImportError("No JSON backend is available")
@@ -1,4 +1,5 @@
 import datetime
+import pyarrow
 import typing
 import xml.etree.ElementTree as xml
 
@@ -164,6 +165,12 @@ class MetarParser(BaseParser):
         return ["id", "lon", "lat", "timestamp", "precip_rate", "precip_type", "px", "py",
                 "tile_x", "tile_y", "sky_condition"]
 
+    def _get_schema(self) -> typing.Dict[str, pyarrow.DataType]:
+        """See :func:`~metrics.base_parser.BaseParser._get_schema`"""
+        schema = super()._get_schema()
+        schema.update({column: pyarrow.int32() for column in ["px", "py", "tile_x", "tile_y"]})
+        return schema
+
     def _parse_timestamp(self, time_str: str) -> int:
         """Parses timestamp from a string"""
         date = datetime.datetime.fromisoformat(time_str.rstrip("Z")).replace(tzinfo=datetime.timezone.utc)
@@ -1,9 +1,10 @@
 import os
 import multiprocessing
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from metrics.data_vendor import BaseDataVendor, DataVendor
+from metrics.io.snapshot_dataset import SnapshotDataset
 from metrics.parse import PROVIDERS_PARSERS
 from metrics.parse.base_parser import BaseParser
 from metrics.session import Session
@@ -22,6 +23,8 @@ class ParseSource:
     input_folder: str           # path to the input folder
     output_folder: str          # path to the output folder
     parser_class: Any           # parser class
+    partitioned: bool = False   # output folder is a partitioned dataset
+    parser_params: Dict[str, Any] = field(default_factory=dict)  # parameters of the parser
 
 
 @dataclass
@@ -29,55 +32,64 @@ class ParseJob:
     input_archive_path: str     # path to the input archive file
     output_parquet_path: str    # path to the output parquet file
     parser_class: Any           # parser class
+    parser_params: Dict[str, Any] = field(default_factory=dict)  # parameters of the parser
 
 
 def _parse_process_impl(parse_job: ParseJob):
-    parser: BaseParser = parse_job.parser_class()
+    parser: BaseParser = parse_job.parser_class(**parse_job.parser_params)
     parser.parse(input_archive_path=parse_job.input_archive_path,
                  output_parquet_path=parse_job.output_parquet_path)
 
 
-def _execute_source_jobs(source_name: str,
-                         jobs: List[ParseJob],
-                         process_num: int):
+def _execute_jobs(jobs: List[ParseJob], process_num: Optional[int]):
+    """Executes jobs of all sources in one pool. Largest archives are parsed first,
+    so the longest jobs don't remain at the end when most of the processes are idle
+    """
+    jobs = sorted(jobs, key=lambda job: os.path.getsize(job.input_archive_path), reverse=True)
     with multiprocessing.Pool(processes=process_num) as pool:
         for _ in track(pool.imap_unordered(_parse_process_impl, jobs),
                        total=len(jobs),
-                       description=f"Parse {source_name}"):
+                       description="Parse"):
             pass
 
 
-def _process_source(source: ParseSource, process_num: int):
-    # collect archives
+def _collect_source_jobs(source: ParseSource) -> List[ParseJob]:
+    """Returns jobs for archives of the source that aren't parsed yet"""
     collected_archives = []
     for root, _, files in os.walk(source.input_folder):
         for file in files:
             if file.endswith(".zip"):
                 collected_archives.append(os.path.join(root, file))
 
-        os.makedirs(source.output_folder, exist_ok=True)
-        if len(collected_archives) > 0:
-            jobs = []
-            for zip_path in collected_archives:
-                file_name, _ = os.path.splitext(os.path.basename(zip_path))
-                output_file = os.path.join(source.output_folder, f"{file_name}.parquet")
+    os.makedirs(source.output_folder, exist_ok=True)
+
+    jobs = []
+    for zip_path in collected_archives:
+        file_name, _ = os.path.splitext(os.path.basename(zip_path))
+        if source.partitioned:
+            output_file = SnapshotDataset(source.output_folder).file_path(int(file_name))
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        else:
+            output_file = os.path.join(source.output_folder, f"{file_name}.parquet")
 
-                if os.path.exists(output_file):
-                    continue
+        if os.path.exists(output_file):
+            continue
 
-                jobs.append(ParseJob(input_archive_path=zip_path,
-                                     output_parquet_path=output_file,
-                                     parser_class=source.parser_class))
+        jobs.append(ParseJob(input_archive_path=zip_path,
+                             output_parquet_path=output_file,
+                             parser_class=source.parser_class,
+                             parser_params=source.parser_params))
 
-            _execute_source_jobs(source_name=source.vendor,
-                                 jobs=jobs,
-                                 process_num=process_num)
+    return jobs
 
 
 def parse(session_path: str,
           process_num: Optional[int],
           providers: List[BaseDataVendor] = [v for v in DataVendor],
-          providers_parser: Dict[BaseDataVendor, BaseParser] = PROVIDERS_PARSERS):
+          providers_parser: Dict[BaseDataVendor, BaseParser] = PROVIDERS_PARSERS,
+          dataset: bool = False,
+          sensors_path: Optional[str] = None,
+          sensor_neighbourhood: int = 1):
     """Parses data into common parquet format
 
     Parameters
@@ -86,6 +98,14 @@ def parse(session_path: str,
         Path to a session folder
     process_num : int | None
         Number of processes for multiprocessing
+    dataset : bool
+        If `True`, then tables of each vendor are written into a dataset partitioned by snapshot hour
+        (see `SnapshotDataset`) instead of one parquet file per snapshot in the tables folder
+    sensors_path : Optional[str]
+        Path to csv file with sensors. If it is set, then only values at sensor locations are extracted
+        from tile vendors into forecast tables (see `RainViewerParser`)
+    sensor_neighbourhood : int
+        Size of a square of pixels around a sensor that is used for its value
     """
     console.log(f"Run parse command for {session_path}")
 
@@ -101,14 +121,27 @@ def parse(session_path: str,
         parser_cls = providers_parser.get(provider.value)
         if parser_cls is not None:
             input_path = os.path.join(session.data_folder, provider.value)
-            output_path = os.path.join(session.tables_folder, provider.value)
+            output_path = os.path.join(session.datasets_folder if dataset else session.tables_folder, provider.value)
+
+            parser_params = {}
+            if provider.value == DataVendor.RainViewer.value and sensors_path is not None:
+                parser_params = {"sensors_path": sensors_path, "neighbourhood": sensor_neighbourhood}
+
             convert_sources.append(ParseSource(vendor=provider.name,
                                                input_folder=input_path,
                                                output_folder=output_path,
-                                               parser_class=parser_cls))
+                                               parser_class=parser_cls,
+                                               partitioned=dataset,
+                                               parser_params=parser_params))
         else:
             console.log(f"No parser class found for provider {provider}")
 
+    # jobs of all vendors share one pool, so processes aren't idle while the last jobs of a vendor are parsed
+    jobs: List[ParseJob] = []
     for source in convert_sources:
-        _process_source(source=source,
-                        process_num=process_num)
+        source_jobs = _collect_source_jobs(source=source)
+        console.log(f"Found {len(source_jobs)} archives of {source.vendor} to parse")
+        jobs.extend(source_jobs)
+
+    if len(jobs) > 0:
+        _execute_jobs(jobs=jobs, process_num=process_num)
@@ -0,0 +1,105 @@
+import itertools
+import numpy as np
+import pyarrow
+import typing
+
+
+ColumnChunk = typing.Union[np.ndarray, typing.Sequence[typing.Any]]
+
+
+class TableBuilder:
+    """Accumulates parsed values column by column and builds Arrow table from them.
+
+    Values are appended in chunks: rows of a parsed file are transposed into columns once, and parsers
+    that produce columns directly append them without creating rows. Each chunk of a column with a declared
+    type is converted into Arrow array of that type right away, so no table wide type inference is needed.
+    Missing values (`None` or `NaN`) are stored as nulls, like `pyarrow.Table.from_pandas` does.
+    """
+
+    def __init__(self, columns: typing.List[str], schema: typing.Dict[str, pyarrow.DataType]) -> None:
+        """
+        Parameters
+        ----------
+        columns : List[str]
+            Columns of the table in their order
+        schema : Dict[str, pyarrow.DataType]
+            Arrow types of columns. Types of other columns are inferred from all their values
+        """
+        self._columns = columns
+        self._schema = schema
+        self._chunks: typing.Dict[str, typing.List[typing.Any]] = {column: [] for column in columns}
+        self._num_rows = 0
+
+    @property
+    def num_rows(self) -> int:
+        return self._num_rows
+
+    def append_rows(self, rows: typing.Sequence[typing.Sequence[typing.Any]]):
+        """Appends rows. Items of each row have to be in the same order as columns of the builder
+
+        Parameters
+        ----------
+        rows : Sequence[Sequence[Any]]
+            Rows to append
+        """
+        if len(rows) == 0:
+            return
+
+        self.append_columns(dict(zip(self._columns, zip(*rows))))
+
+    def append_columns(self, columns: typing.Dict[str, ColumnChunk]):
+        """Appends values of all columns
+
+        Parameters
+        ----------
+        columns : Dict[str, ColumnChunk]
+            Values of each column of the builder. All columns have to be of the same length
+        """
+        lengths = {len(columns[column]) for column in self._columns}
+        assert len(lengths) == 1, f"Columns have different lengths: {lengths}"
+
+        length = lengths.pop()
+        if length == 0:
+            return
+
+        for column in self._columns:
+            values = columns[column]
+            column_type = self._schema.get(column)
+            if column_type is not None:
+                values = pyarrow.array(values, from_pandas=True).cast(TableBuilder._storage_type(column_type))
+            self._chunks[column].append(values)
+
+        self._num_rows += length
+
+    def build(self) -> pyarrow.Table:
+        """Builds table from all appended values
+
+        Returns
+        -------
+        pyarrow.Table
+            Table with declared types of columns
+        """
+        arrays = []
+        for column in self._columns:
+            chunks = self._chunks[column]
+            column_type = self._schema.get(column)
+            if column_type is None:
+                if all(isinstance(chunk, np.ndarray) for chunk in chunks) and len(chunks) > 0:
+                    array = pyarrow.array(np.concatenate(chunks), from_pandas=True)
+                else:
+                    array = pyarrow.array(list(itertools.chain.from_iterable(chunks)), from_pandas=True)
+            else:
+                storage_type = TableBuilder._storage_type(column_type)
+                array = pyarrow.concat_arrays(chunks) if len(chunks) > 0 else pyarrow.array([], type=storage_type)
+                array = array.cast(column_type)
+
+            arrays.append(array)
+
+        return pyarrow.Table.from_arrays(arrays, names=self._columns)
+
+    @staticmethod
+    def _storage_type(column_type: pyarrow.DataType) -> pyarrow.DataType:
+        # dictionaries of chunks differ, so values are encoded once for the whole column
+        if pyarrow.types.is_dictionary(column_type):
+            return column_type.value_type
+        return column_type
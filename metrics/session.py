@@ -16,6 +16,8 @@ DATA_FOLDER = "data"
 
 # parse
 TABLES_FOLDER = "tables"
+SENSOR_INDEX_FILE = "sensor_index.parquet"
+DATASETS_FOLDER = "datasets"
 
 # metrics
 METRICS_FOLDER = "metrics"
@@ -87,6 +89,16 @@ class Session:
     def metrics_folder(self) -> str:
         return self._metrics_folder
 
+    @property
+    def sensor_index_path(self) -> str:
+        """Path to the table with precomputed tile and pixel coordinates of sensors"""
+        return os.path.join(self._tables_folder, SENSOR_INDEX_FILE)
+
+    @property
+    def datasets_folder(self) -> str:
+        """Path to the folder with partitioned datasets of vendors"""
+        return os.path.join(self._tables_folder, DATASETS_FOLDER)
+
     def __repr__(self) -> str:
         return (f"Session {self._path}:\n"
                 f"- start_time: {self._start_time} ({format_time(self._start_time)})\n"
@@ -1,4 +1,11 @@
 import datetime
+import functools
+
+from dateutil.parser import isoparse
+
+
+# number of distinct time strings that are kept parsed. Forecasts of a snapshot share a few hundreds of them
+TIMESTAMP_CACHE_SIZE = 8192
 
 
 def floor_timestamp(timestamp: int, period: int) -> int:
@@ -22,3 +29,29 @@ def floor_timestamp(timestamp: int, period: int) -> int:
 def format_time(timestamp) -> str:
     utc_datetime = datetime.datetime.fromtimestamp(timestamp, datetime.UTC)
     return utc_datetime.strftime("%Y-%m-%d %H:%M:%S")
+
+
+@functools.lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def parse_iso_timestamp(time_str: str) -> int:
+    """Parses ISO-8601 time string into unix timestamp. Results are cached, because parsers get
+    the same time strings from all files of a snapshot
+
+    Parameters
+    ----------
+    time_str : str
+        Time string. Strings in `YYYY-MM-DDTHH:MM:SSZ` format are parsed without `isoparse`.
+        Time without offset is treated as local time like `datetime.timestamp` does
+
+    Returns
+    -------
+    int
+        Unix timestamp in seconds
+    """
+    if len(time_str) == 20 and time_str[10] == "T" and time_str[19] == "Z":
+        try:
+            date = datetime.datetime.fromisoformat(time_str[:19]).replace(tzinfo=datetime.timezone.utc)
+            return int(date.timestamp())
+        except ValueError:
+            pass  # not a fixed layout, isoparse checks it
+
+    return int(isoparse(time_str).timestamp())
@@ -1,4 +1,5 @@
 
+import os
 import pandas
 import pytest
 import typing
@@ -59,13 +60,14 @@ class TestAccuWeatherProvider:
                   snapshot_timestamp: int,
                   sensors_table: pandas.DataFrame,
                   mock_table: pandas.DataFrame,
-                  expected_data: pandas.DataFrame):
+                  expected_data: pandas.DataFrame,
+                  tmp_path):
+        if mock_table is not None:
+            mock_table.to_parquet(os.path.join(tmp_path, f"{snapshot_timestamp}.parquet"))
 
-        provider = TableProvider(tables_path="test_dir",
+        provider = TableProvider(tables_path=str(tmp_path),
                                  snapshot_timestamp=snapshot_timestamp)
 
-        provider._table = mock_table
-
         result = provider.load(sensors_table=sensors_table)
 
         # check None separately
@@ -75,3 +77,26 @@ class TestAccuWeatherProvider:
             pandas.testing.assert_frame_equal(result.reset_index(drop=True),
                                               expected_data.reset_index(drop=True),
                                               check_like=True)
+
+    def test_load_from_file(self, tmp_path):
+        table = pandas.DataFrame({"id": ["sensor_1", "sensor_2", "sensor_4"],
+                                  "lon": [23.0, 23.0, 23.0],
+                                  "lat": [52.0, 53.0, 54.0],
+                                  "timestamp": [7300, 8200, 8200],
+                                  "precip_rate": [0.0, 3.0, 4.0],
+                                  "precip_prob": [0.0, 1.0, 1.0],
+                                  "precip_type": [1, 2, 2]})
+        table.to_parquet(os.path.join(tmp_path, "7200.parquet"))
+
+        provider = TableProvider(tables_path=str(tmp_path), snapshot_timestamp=7200)
+        result = provider.load(sensors_table=_create_sensors_table([("sensor_1", 23, 52), ("sensor_2", 23, 53)]))
+
+        pandas.testing.assert_frame_equal(result.reset_index(drop=True),
+                                          _create_precip_table([("sensor_1", 0.0, 1, 7300),
+                                                                ("sensor_2", 3.0, 2, 8200)]),
+                                          check_dtype=False)
+
+    def test_load_missing_file(self, tmp_path):
+        provider = TableProvider(tables_path=str(tmp_path), snapshot_timestamp=7200)
+
+        assert provider.load(sensors_table=_create_sensors_table([("sensor_1", 23, 52)])) is None
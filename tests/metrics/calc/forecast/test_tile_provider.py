@@ -1,8 +1,8 @@
+import numpy as np
 import pandas
 import pytest
 import typing
 
-from metrics.utils.coords import Coordinate
 from metrics.utils.precipitation import PrecipitationType
 
 from metrics.calc.forecast.tile_provider import TileProvider
@@ -24,7 +24,7 @@ class TestTileProvider:
 
     @pytest.mark.parametrize("snapshot_timestamp, sensors_table, mock_tile_data, expected_data", [
         # mock_tile_data - is a dict from input parameters
-        # to output value for tile_reader.get_dbz_value_by_coords(lon, lat, offset)
+        # to output value for tile_reader.get_dbz_values(lons, lats, offset)
         (
             # snapshot_timestamp
             7200,
@@ -59,11 +59,21 @@ class TestTileProvider:
                                 max_forecast_time=7200,
                                 forecast_step=600)
 
-        def mock_get_dbz_value_by_coords(coords: Coordinate, offset: int) -> PrecipValue:
-            return mock_tile_data.get((coords.lon, coords.lat, offset * 60), None)
+        def mock_get_dbz_values(lons: np.ndarray,
+                                lats: np.ndarray,
+                                offset: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+            dbz = np.full(len(lons), np.nan, dtype=np.float32)
+            precip_type = np.zeros(len(lons), dtype=np.uint8)
+            for i, (lon, lat) in enumerate(zip(lons, lats)):
+                value = mock_tile_data.get((lon, lat, offset * 60), None)
+                if value is not None:
+                    dbz[i] = value.dbz
+                    precip_type[i] = value.precip_type.value
+
+            return (dbz, precip_type)
 
         provider._tile_reader = Mock()
-        provider._tile_reader.get_dbz_value_by_coords = mock_get_dbz_value_by_coords
+        provider._tile_reader.get_dbz_values = mock_get_dbz_values
 
         result = provider.load(sensors_table=sensors_table)
 
@@ -72,6 +82,45 @@ class TestTileProvider:
                                           expected_data.reset_index(drop=True),
                                           check_like=True)
 
+    def test_load_with_tile_pixels(self):
+        provider = TileProvider(snapshots_path="test_rainbow_dir",
+                                snapshot_timestamp=7200,
+                                tile_loader_class=BaseTileLoader,
+                                max_forecast_time=600,
+                                forecast_step=600)
+
+        sensors_table = pandas.DataFrame(columns=["id", "lon", "lat", "tile_x", "tile_y", "px", "py"], data=[
+            ("sensor_1", 23.0, 51.0, 10, 20, 30, 40),
+            ("sensor_2", 23.0, 52.0, 10, 20, 31, 41),
+        ])
+
+        def mock_get_dbz_values_by_tiles(offset: int,
+                                         px: np.ndarray,
+                                         py: np.ndarray,
+                                         tile_x: np.ndarray,
+                                         tile_y: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+            assert list(tile_x) == [10, 10]
+            assert list(tile_y) == [20, 20]
+            assert list(px) == [30, 31]
+            assert list(py) == [40, 41]
+
+            dbz = np.array([10.0, np.nan] if offset == 0 else [np.nan, 11.0], dtype=np.float32)
+            precip_type = np.array([PrecipitationType.RAIN.value, PrecipitationType.SNOW.value], dtype=np.uint8)
+            return (dbz, precip_type)
+
+        provider._tile_reader = Mock()
+        provider._tile_reader.get_dbz_values_by_tiles = mock_get_dbz_values_by_tiles
+        provider._tile_reader.get_dbz_values.side_effect = AssertionError("Coordinates should not be projected")
+
+        result = provider.load(sensors_table=sensors_table)
+
+        pandas.testing.assert_frame_equal(result.reset_index(drop=True),
+                                          _create_precip_table([
+                                              ("sensor_1", 0.153765, PrecipitationType.RAIN.value, 7200),
+                                              ("sensor_2", 0.250891, PrecipitationType.SNOW.value, 7800)
+                                          ]),
+                                          check_like=True)
+
     @pytest.mark.parametrize("precip_type, dbz, expected_precipitation_rate", [
         (PrecipitationType.RAIN, 10, 0.153765),
         (PrecipitationType.SNOW, 10, 0.223606),
@@ -84,3 +133,16 @@ class TestTileProvider:
         precip_rate = TileProvider.dbz_to_precipitation_rate(dbz=dbz, precip_type=precip_type)
         approx_precip_rate = pytest.approx(precip_rate, abs=1e-6)
         assert approx_precip_rate == expected_precipitation_rate
+
+    @pytest.mark.parametrize("precip_type, dbz", [
+        (PrecipitationType.UNKNOWN, 10),
+        (PrecipitationType.RAIN, 10),
+        (PrecipitationType.SNOW, 25),
+        (PrecipitationType.MIX, -5),
+    ])
+    def test_dbz_to_precipitation_rates(self, precip_type: PrecipitationType, dbz: float):
+        precip_rates = TileProvider.dbz_to_precipitation_rates(dbz=np.array([dbz], dtype=np.float32),
+                                                               precip_type=np.array([precip_type], dtype=np.uint8))
+        expected_precip_rate = TileProvider.dbz_to_precipitation_rate(dbz=dbz, precip_type=precip_type)
+
+        assert precip_rates[0] == pytest.approx(expected_precip_rate, abs=1e-6)
@@ -1,3 +1,4 @@
+from dataclasses import replace
 from itertools import product
 import numpy as np
 import os
@@ -5,7 +6,8 @@ import pandas
 import pytest
 import typing
 
-from metrics.calc.events import CalculateMetrics, JobParams, Worker
+from metrics.calc.events import (AggregationKey, CalculateMetrics, JobParams, JobPartition, SensorSharding, Worker,
+                                 aggregate_metrics, calc_sensor_shards, _ceil_to_period, _group_max, _join_sorted)
 from metrics.calc.forecast_manager import ForecastManager
 from metrics.data_vendor import BaseDataVendor, DataVendor
 from metrics.session import Session
@@ -21,14 +23,18 @@ def _create_calculate_metrics(forecast_vendor: DataVendor = DataVendor.AccuWeath
                               forecast_offsets: typing.List[int] = [0, 60, 120],
                               threshold: float = 0.1,
                               precip_types: typing.List[PrecipitationType] = [PrecipitationType.RAIN],
-                              session_path: str = "test") -> CalculateMetrics:
+                              session_path: str = "test",
+                              partition: JobPartition = JobPartition.TIME,
+                              sensor_shards_num: int = 1) -> CalculateMetrics:
     return CalculateMetrics(forecast_vendor=forecast_vendor,
                             observation_vendor=observation_vendor,
                             sensor_selection_path=sensor_selection_path,
                             forecast_offsets=forecast_offsets,
                             threshold=threshold,
                             precip_types=precip_types,
-                            session_path=session_path)
+                            session_path=session_path,
+                            partition=partition,
+                            sensor_shards_num=sensor_shards_num)
 
 
 def _create_worker(forecast_vendor: DataVendor = DataVendor.AccuWeather,
@@ -579,3 +585,217 @@ class TestCalculateMetrics:
         calc = _create_calculate_metrics()
 
         assert calc._calc_sensors_range() == expected_time_range
+
+    @pytest.mark.parametrize("partition, forecast_offsets, sensors_range, expected_jobs", [
+        (
+            JobPartition.TIME,
+            [0, 3600],
+            (7200, 14400),
+            [
+                ((7200, 10800), None),
+                ((10800, 14400), None)
+            ]
+        ),
+        (
+            JobPartition.SNAPSHOT,
+            [0, 3600],
+            (7200, 10800),
+            [
+                ((7200, 7799), (0, 3599)),
+                ((7200, 10800), (3600, 7199)),
+                ((7200, 10800), (7200, 10799)),
+                ((10200, 10800), (10800, 14399))
+            ]
+        ),
+        (
+            JobPartition.SNAPSHOT,
+            [1800],
+            (7200, 10800),
+            [
+                ((7200, 6000 + 3599), (3600, 7199)),
+                ((7200 + 1200, 10800), (7200, 10799))
+            ]
+        )
+    ])
+    def test_create_jobs(self,
+                         partition: JobPartition,
+                         forecast_offsets: typing.List[int],
+                         sensors_range: typing.Tuple[int, int],
+                         expected_jobs: typing.List[typing.Tuple[typing.Tuple[int, int], typing.Tuple[int, int]]]):
+        calc = _create_calculate_metrics(forecast_offsets=forecast_offsets, partition=partition)
+
+        jobs = calc._create_jobs(sensors_range=sensors_range, sensor_ids=[])
+
+        assert [(job.time_range, job.forecast_range) for job in jobs] == expected_jobs
+
+    def test_create_jobs_with_sensor_shards(self):
+        calc = _create_calculate_metrics(forecast_offsets=[0], sensor_shards_num=3)
+
+        jobs = calc._create_jobs(sensors_range=(0, 7200), sensor_ids=[])
+
+        assert [(job.time_range, job.sensor_shard, job.sensor_shards_num) for job in jobs] == [
+            ((0, 3600), 0, 3),
+            ((0, 3600), 1, 3),
+            ((0, 3600), 2, 3),
+            ((3600, 7200), 0, 3),
+            ((3600, 7200), 1, 3),
+            ((3600, 7200), 2, 3)
+        ]
+
+
+class TestCalcSensorShards:
+    @pytest.mark.parametrize("sharding", [SensorSharding.ID, SensorSharding.TILE])
+    def test_calc_sensor_shards(self, sharding: SensorSharding):
+        sensors = pandas.DataFrame({"id": [f"sensor_{i % 50}" for i in range(200)],
+                                    "lon": [float(i % 50) * 7.0 - 170.0 for i in range(200)],
+                                    "lat": [float(i % 50) * 3.0 - 75.0 for i in range(200)]})
+
+        shards = calc_sensor_shards(sensors=sensors, shards_num=4, sharding=sharding)
+
+        assert len(shards) == len(sensors)
+        assert ((shards >= 0) & (shards < 4)).all()
+        assert len(np.unique(shards)) > 1
+        # the same sensor is always assigned to the same shard
+        assert (sensors.assign(shard=shards).groupby("id")["shard"].nunique() == 1).all()
+        # shards are stable across calls
+        assert (calc_sensor_shards(sensors=sensors, shards_num=4, sharding=sharding) == shards).all()
+
+    def test_calc_sensor_shards_by_tile(self):
+        sensors = pandas.DataFrame({"id": ["a", "b", "c"],
+                                    "lon": [-87.65, -87.60, 20.32],
+                                    "lat": [41.85, 41.90, 52.45]})
+
+        shards = calc_sensor_shards(sensors=sensors, shards_num=1000, sharding=SensorSharding.TILE)
+
+        assert shards[0] == shards[1]
+
+
+class TestSortedEngine:
+    @pytest.mark.parametrize("timestamps, period, offset", [
+        (np.array([1600, 1200, 3601, 3599, 3600, 0, -1]), 600, 0),
+        (np.array([1600, 1200, 3601, 3599, 3600, 0, -1]), 600, 120),
+        (np.array([1600.0, 1200.5, 3601.0]), 600, 0)
+    ])
+    def test_ceil_to_period(self, timestamps: np.ndarray, period: int, offset: int):
+        expected = (np.ceil((timestamps + offset) / period) * period).astype(np.int64)
+
+        assert (_ceil_to_period(timestamps, period=period, offset=offset) == expected).all()
+
+    def test_group_max(self):
+        keys, values = _group_max(keys=np.array([3, 1, 3, 2, 1, 2]),
+                                  values=np.array([1.0, 5.0, np.nan, np.nan, 2.0, np.nan]))
+
+        assert keys.tolist() == [1, 2, 3]
+        assert values[0] == 5.0
+        assert np.isnan(values[1])
+        assert values[2] == 1.0
+
+    def test_join_sorted(self):
+        left_index, right_index = _join_sorted(left=np.array([1, 2, 2, 4]),
+                                               right=np.array([0, 2, 2, 3, 4]))
+
+        assert list(zip(left_index.tolist(), right_index.tolist())) == [(1, 1), (1, 2), (2, 1), (2, 2), (3, 4)]
+
+    def test_calculate_matches_pandas(self):
+        rng = np.random.default_rng(0)
+        ids = np.array(["A", "B", "C", None], dtype=object)
+
+        observations = pandas.DataFrame({"id": ids[rng.integers(0, 4, 500)],
+                                         "precip_rate": rng.exponential(0.5, 500),
+                                         "precip_type": rng.integers(0, 4, 500),
+                                         "timestamp": rng.integers(10000, 13000, 500)})
+        forecast = pandas.DataFrame({"id": ids[rng.integers(0, 4, 2000)],
+                                     "precip_rate": rng.exponential(0.5, 2000),
+                                     "precip_type": rng.integers(0, 4, 2000),
+                                     "timestamp": rng.integers(9000, 14000, 2000),
+                                     "forecast_time": rng.choice([0, 300, 600, 1200], 2000)})
+
+        worker = _create_worker(forecast_offsets=[0, 600], threshold=0.3)
+        result = worker._calculate(forecast_times=[0, 600], observations=observations, forecast=forecast)
+
+        # reference implementation with pandas groupby and merge
+        observations = observations.drop_duplicates(subset=["id", "timestamp"], keep="first")
+        observations = worker._align_time_column(data=observations.copy(), column_name="timestamp", period=600)
+        observations["precip_type_status"] = observations["precip_type"].isin([PrecipitationType.RAIN.value])
+        observations = observations.groupby(["id", "timestamp", "precip_type_status"]).agg(
+            {"precip_rate": "max"}).reset_index()
+
+        forecast = worker._align_time_column(data=forecast.copy(), column_name="timestamp", period=600)
+        forecast = worker._align_time_column(data=forecast, column_name="forecast_time", period=600)
+        forecast["precip_type_status"] = forecast["precip_type"].isin([PrecipitationType.RAIN.value])
+        forecast = forecast[forecast["forecast_time"].isin([0, 600])]
+        forecast = forecast.groupby(["id", "timestamp", "precip_type_status", "forecast_time"]).agg(
+            {"precip_rate": "max"}).reset_index()
+
+        expected = pandas.merge(forecast, observations, on=["id", "timestamp"], how="inner",
+                                suffixes=("_forecast", "_observations"))
+
+        columns = list(expected.columns)
+        pandas.testing.assert_frame_equal(result[columns].sort_values(by=columns).reset_index(drop=True),
+                                          expected.sort_values(by=columns).reset_index(drop=True))
+
+
+class TestAggregation:
+    def _create_metrics_table(self) -> pandas.DataFrame:
+        return pandas.DataFrame(columns=["id", "timestamp", "forecast_time", "tp", "fp", "tn", "fn"], data=[
+            ("A", 10800, 0, 1, 0, 0, 0),
+            ("A", 11400, 0, 0, 1, 0, 0),
+            ("B", 11400, 600, 0, 0, 1, 0),
+            ("B", 14400, 600, 0, 0, 0, 1),
+            ("C", 15000, 600, 1, 0, 0, 0)
+        ])
+
+    @pytest.mark.parametrize("aggregate_by, expected", [
+        (
+            [],
+            pandas.DataFrame(columns=["tp", "fp", "tn", "fn"], data=[(2, 1, 1, 1)])
+        ),
+        (
+            [AggregationKey.FORECAST_TIME],
+            pandas.DataFrame(columns=["forecast_time", "tp", "fp", "tn", "fn"], data=[
+                (0, 1, 1, 0, 0),
+                (600, 1, 0, 1, 1)
+            ])
+        ),
+        (
+            [AggregationKey.SENSOR, AggregationKey.FORECAST_TIME],
+            pandas.DataFrame(columns=["id", "forecast_time", "tp", "fp", "tn", "fn"], data=[
+                ("A", 0, 1, 1, 0, 0),
+                ("B", 600, 0, 0, 1, 1),
+                ("C", 600, 1, 0, 0, 0)
+            ])
+        )
+    ])
+    def test_aggregate_metrics(self, aggregate_by: typing.List[AggregationKey], expected: pandas.DataFrame):
+        result = aggregate_metrics(metrics=self._create_metrics_table(), aggregate_by=aggregate_by)
+
+        pandas.testing.assert_frame_equal(result.reset_index(drop=True), expected, check_dtype=False)
+
+    def test_worker_aggregate(self):
+        worker = _create_worker(sensors_time_range=(10800, 14400))
+        worker._params = replace(worker._params,
+                                 aggregate_by=[AggregationKey.HOUR, AggregationKey.COUNTRY],
+                                 sensor_countries={"A": "us", "B": "ca"})
+
+        result = worker._aggregate(self._create_metrics_table())
+
+        # events at 10800 and 15000 belong to neighbour time ranges
+        expected = pandas.DataFrame(columns=["hour", "country", "tp", "fp", "tn", "fn"], data=[
+            (10800, "ca", 0, 0, 1, 0),
+            (10800, "us", 0, 1, 0, 0),
+            (14400, "ca", 0, 0, 0, 1)
+        ])
+        pandas.testing.assert_frame_equal(result.reset_index(drop=True), expected, check_dtype=False)
+
+    def test_worker_aggregate_snapshot_job(self):
+        worker = _create_worker(sensors_time_range=(10800, 14400))
+        worker._params = replace(worker._params,
+                                 aggregate_by=[AggregationKey.COUNTRY],
+                                 forecast_range=(7200, 10799))
+
+        result = worker._aggregate(self._create_metrics_table())
+
+        # snapshot jobs don't overlap, so all events are counted. Unknown countries are kept
+        assert len(result) == 1
+        assert pandas.isna(result["country"].iloc[0])
+        assert result[["tp", "fp", "tn", "fn"]].iloc[0].tolist() == [2, 1, 1, 1]
@@ -1,3 +1,4 @@
+import os
 import pandas
 import pytest
 import typing
@@ -6,9 +7,14 @@ from enum import Enum
 
 from metrics.calc.forecast_manager import ForecastManager, DataVendor
 from metrics.calc.forecast.provider import ForecastProvider
+from metrics.calc.forecast.table_provider import TableProvider
 from metrics.data_vendor import BaseDataVendor
+from metrics.io.rainviewer import RainViewerTileLoader
+from metrics.io.rainviewer_store import RainViewerStoreTileLoader, RainViewerTileStore
 from metrics.session import Session
 
+from unittest.mock import patch
+
 
 def _create_sensors_table(data: typing.List[any]) -> pandas.DataFrame:
     return pandas.DataFrame(columns=["id", "lon", "lat"], data=data)
@@ -70,6 +76,59 @@ class TestForecastManager:
         with pytest.raises(ValueError):
             manager._create_data_provider(0)
 
+    def test_create_rainviewer_provider_prefers_decoded_tiles(self, tmp_path):
+        session = Session(session_path=str(tmp_path), start_time=0, end_time=3600)
+        manager = ForecastManager(data_vendor=DataVendor.RainViewer, session=session)
+
+        data_folder = os.path.join(session.data_folder, DataVendor.RainViewer.value)
+        tables_folder = os.path.join(session.tables_folder, DataVendor.RainViewer.value)
+        os.makedirs(data_folder)
+        os.makedirs(tables_folder)
+        for path in [os.path.join(data_folder, "600.zip"), os.path.join(data_folder, "1200.zip"),
+                     os.path.join(tables_folder, "600.tiles")]:
+            open(path, "w").close()
+        pandas.DataFrame(columns=RainViewerTileStore.COLUMNS).to_parquet(os.path.join(tables_folder, "600.parquet"))
+
+        with patch.object(RainViewerStoreTileLoader, "__init__", return_value=None) as store_init, \
+                patch.object(RainViewerTileLoader, "__init__", return_value=None) as archive_init:
+            manager._create_data_provider(600)
+            store_init.assert_called_once_with(os.path.join(tables_folder, "600.parquet"))
+            archive_init.assert_not_called()
+
+            manager._create_data_provider(1200)
+            archive_init.assert_called_once_with(os.path.join(data_folder, "1200.zip"))
+
+    def test_create_rainviewer_provider_ignores_incomplete_store(self, tmp_path):
+        session = Session(session_path=str(tmp_path), start_time=0, end_time=3600)
+        manager = ForecastManager(data_vendor=DataVendor.RainViewer, session=session)
+
+        data_folder = os.path.join(session.data_folder, DataVendor.RainViewer.value)
+        tables_folder = os.path.join(session.tables_folder, DataVendor.RainViewer.value)
+        os.makedirs(data_folder)
+        os.makedirs(tables_folder)
+        # tiles without index are left by interrupted parse
+        for path in [os.path.join(data_folder, "600.zip"), os.path.join(tables_folder, "600.tiles")]:
+            open(path, "w").close()
+
+        with patch.object(RainViewerStoreTileLoader, "__init__", return_value=None) as store_init, \
+                patch.object(RainViewerTileLoader, "__init__", return_value=None) as archive_init:
+            manager._create_data_provider(600)
+            store_init.assert_not_called()
+            archive_init.assert_called_once_with(os.path.join(data_folder, "600.zip"))
+
+    def test_create_rainviewer_provider_from_sensors_table(self, tmp_path):
+        session = Session(session_path=str(tmp_path), start_time=0, end_time=3600)
+        manager = ForecastManager(data_vendor=DataVendor.RainViewer, session=session)
+
+        tables_folder = os.path.join(session.tables_folder, DataVendor.RainViewer.value)
+        os.makedirs(tables_folder)
+        open(os.path.join(tables_folder, "600.parquet"), "w").close()
+
+        provider = manager._create_data_provider(600)
+
+        assert isinstance(provider, TableProvider)
+        assert provider._table_path == os.path.join(tables_folder, "600.parquet")
+
     @pytest.mark.parametrize("time_range, sensors_table, provider_data, expected_data", [
         (
             # time_range
@@ -121,3 +180,19 @@ class TestForecastManager:
         pandas.testing.assert_frame_equal(result.reset_index(drop=True),
                                           expected_data.reset_index(drop=True),
                                           check_like=True)
+
+    @pytest.mark.parametrize("data_vendor, expected_attached", [
+        (DataVendor.AccuWeather, False),
+        (DataVendor.RainViewer, True),
+    ])
+    def test_load_forecast_attaches_sensor_index_for_tiles(self, data_vendor: DataVendor, expected_attached: bool):
+        session = Session(session_path="test", start_time=0, end_time=3600)
+        manager = ForecastManager(data_vendor=data_vendor, session=session)
+        manager._get_provider_for_timestamp = lambda timestamp: MockProvider(timestamp=timestamp,
+                                                                             mock_data=_create_precip_table(data=[]))
+
+        sensors_table = _create_sensors_table(data=[("sensor_1", 23.34, 53.43)])
+        with patch.object(manager, "_attach_sensor_index", side_effect=lambda table: table) as attach_mock:
+            manager.load_forecast(time_rage=(0, 600), sensors_table=sensors_table)
+
+        assert attach_mock.called == expected_attached
@@ -1,7 +1,7 @@
 import pandas
 import pytest
 
-from metrics.calc.utils import read_selected_sensors
+from metrics.calc.utils import CsvAppendWriter, read_selected_sensors
 
 from unittest.mock import patch
 
@@ -76,3 +76,30 @@ class TestCalcUtils:
         read_selected_sensors("test_dir")
 
         assert data_types == ["csv", "zip", "parquet"]
+
+
+class TestCsvAppendWriter:
+    def test_write(self, tmp_path):
+        output_csv = str(tmp_path / "metrics.csv")
+
+        with CsvAppendWriter(output_csv) as writer:
+            writer.write(pandas.DataFrame(columns=["id", "tp", "fp"], data=[("sensor_1", 1, 0)]))
+            writer.write(None)
+            # columns order follows the first table
+            writer.write(pandas.DataFrame(columns=["fp", "tp", "id"], data=[(1, 0, "sensor_2"),
+                                                                            (0, 0, "sensor_3")]))
+
+        assert writer.rows_num == 3
+
+        pandas.testing.assert_frame_equal(pandas.read_csv(output_csv),
+                                          pandas.DataFrame(columns=["id", "tp", "fp"], data=[("sensor_1", 1, 0),
+                                                                                             ("sensor_2", 0, 1),
+                                                                                             ("sensor_3", 0, 0)]))
+
+    def test_write_nothing(self, tmp_path):
+        output_csv = tmp_path / "metrics.csv"
+
+        with CsvAppendWriter(str(output_csv)):
+            pass
+
+        assert output_csv.exists()
@@ -0,0 +1,25 @@
+import pyarrow
+import pytest
+import typing
+
+from metrics.io.parquet_filter import build_filter
+
+
+class TestParquetFilter:
+    @pytest.mark.parametrize("timestamp_range, ids, expected_ids", [
+        (None, None, ["A", "B", "A", "C"]),
+        ((100, 200), None, ["B", "A"]),
+        (None, ["A"], ["A", "A"]),
+        ((100, 200), ["A", "C"], ["A"])
+    ])
+    def test_build_filter(self,
+                          timestamp_range: typing.Optional[typing.Tuple[int, int]],
+                          ids: typing.Optional[typing.List[str]],
+                          expected_ids: typing.List[str]):
+        table = pyarrow.table({"id": ["A", "B", "A", "C"], "timestamp": [100, 150, 200, 250]})
+
+        expression = build_filter(timestamp_range=timestamp_range, ids=ids)
+        if expression is not None:
+            table = table.filter(expression)
+
+        assert table.column("id").to_pylist() == expected_ids
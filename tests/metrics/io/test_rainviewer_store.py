@@ -0,0 +1,115 @@
+import cv2
+import numpy as np
+import os
+import pytest
+import zipfile
+
+from metrics.io.rainviewer import RainViewerTileLoader
+from metrics.io.rainviewer_store import RainViewerStoreTileLoader, RainViewerTileStore
+from unittest.mock import patch
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+
+
+def _create_archive(path: str):
+    _, empty_tile = cv2.imencode(".png", np.zeros((256, 256), dtype=np.uint8))
+
+    with zipfile.ZipFile(path, "w") as zip_file:
+        for offset in [0, 10]:
+            zip_file.write(os.path.join(SCRIPT_DIRECTORY, "rainviewer_data.png"), f"1000/_map/t{offset}/7/1/2.png")
+        zip_file.write(os.path.join(SCRIPT_DIRECTORY, "rainviewer_mask.png"), "1000/_mask/7/1/2.png")
+        # empty tile
+        zip_file.writestr("1000/_map/t0/7/3/4.png", empty_tile.tobytes())
+        zip_file.write(os.path.join(SCRIPT_DIRECTORY, "rainviewer_mask.png"), "1000/_mask/7/3/4.png")
+        # tile without mask
+        zip_file.write(os.path.join(SCRIPT_DIRECTORY, "rainviewer_data.png"), "1000/_map/t0/7/5/6.png")
+
+
+class TestRainViewerTileStore:
+    def test_write(self, tmp_path):
+        zip_path = os.path.join(str(tmp_path), "1000.zip")
+        index_path = os.path.join(str(tmp_path), "1000.parquet")
+        _create_archive(zip_path)
+
+        RainViewerTileStore.write(zip_path=zip_path, index_path=index_path)
+
+        # one mask and two data tiles
+        assert os.path.getsize(RainViewerTileStore.tiles_path(index_path)) == 3 * 256 * 256
+        assert [name for name in os.listdir(str(tmp_path)) if name.endswith(".tmp")] == []
+
+    def test_interrupted_rewrite(self, tmp_path):
+        zip_path = os.path.join(str(tmp_path), "1000.zip")
+        index_path = os.path.join(str(tmp_path), "1000.parquet")
+        _create_archive(zip_path)
+        RainViewerTileStore.write(zip_path=zip_path, index_path=index_path)
+        assert RainViewerTileStore.exists(index_path)
+
+        # fail to move the index after tiles are replaced
+        replace = os.replace
+
+        def replace_tiles_only(src: str, dst: str):
+            if not dst.endswith(RainViewerTileStore.TILES_EXT):
+                raise OSError("interrupted")
+            replace(src, dst)
+
+        with patch("metrics.io.rainviewer_store.os.replace", side_effect=replace_tiles_only):
+            with pytest.raises(OSError):
+                RainViewerTileStore.write(zip_path=zip_path, index_path=index_path)
+
+        # old index doesn't point into the new tiles
+        assert not os.path.exists(index_path)
+        assert not RainViewerTileStore.exists(index_path)
+        assert [name for name in os.listdir(str(tmp_path)) if name.endswith(".tmp")] == []
+
+    def test_load_matches_archive(self, tmp_path):
+        zip_path = os.path.join(str(tmp_path), "1000.zip")
+        index_path = os.path.join(str(tmp_path), "1000.parquet")
+        _create_archive(zip_path)
+        RainViewerTileStore.write(zip_path=zip_path, index_path=index_path)
+
+        archive_loader = RainViewerTileLoader(zip_path)
+        store_loader = RainViewerStoreTileLoader(index_path)
+
+        for offset, tile_x, tile_y in [(0, 1, 2), (10, 1, 2), (20, 1, 2), (0, 3, 4), (0, 5, 6)]:
+            expected = archive_loader._decode_tile(offset=offset, tile_x=tile_x, tile_y=tile_y)
+            result = store_loader.load(offset=offset, tile_x=tile_x, tile_y=tile_y)
+
+            if expected is None:
+                assert result is None
+            else:
+                assert result.reflectivity.dtype == np.float32
+                assert result.type.dtype == np.uint8
+                assert result == expected
+
+    def test_load_pixels(self, tmp_path):
+        zip_path = os.path.join(str(tmp_path), "1000.zip")
+        index_path = os.path.join(str(tmp_path), "1000.parquet")
+        _create_archive(zip_path)
+        RainViewerTileStore.write(zip_path=zip_path, index_path=index_path)
+
+        store_loader = RainViewerStoreTileLoader(index_path)
+        rng = np.random.default_rng(42)
+        px = rng.integers(0, 256, 500)
+        py = rng.integers(0, 256, 500)
+
+        with patch.object(RainViewerTileStore, "load") as load_mock:
+            reflectivity, types = store_loader.load_pixels(offset=0, tile_x=1, tile_y=2, px=px, py=py)
+            assert store_loader.load_pixels(offset=0, tile_x=3, tile_y=4, px=px, py=py) is None
+            # pixels are gathered without decoding the whole tile
+            load_mock.assert_not_called()
+
+        expected = store_loader.load(offset=0, tile_x=1, tile_y=2)
+        assert reflectivity.dtype == np.float32
+        assert types.dtype == np.uint8
+        np.testing.assert_array_equal(reflectivity, expected.reflectivity[py, px])
+        np.testing.assert_array_equal(types, expected.type[py, px])
+
+    def test_empty_archive(self, tmp_path):
+        zip_path = os.path.join(str(tmp_path), "1000.zip")
+        index_path = os.path.join(str(tmp_path), "1000.parquet")
+        with zipfile.ZipFile(zip_path, "w"):
+            pass
+
+        RainViewerTileStore.write(zip_path=zip_path, index_path=index_path)
+
+        assert RainViewerStoreTileLoader(index_path).load(offset=0, tile_x=1, tile_y=2) is None
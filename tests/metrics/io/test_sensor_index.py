@@ -0,0 +1,66 @@
+import numpy as np
+import os
+import pandas
+import typing
+
+from metrics.io.sensor_index import SensorIndex
+from metrics.io.tile_reader import TileReader
+from metrics.utils.coords import Coordinate
+
+
+def _create_sensors_table(data: typing.List[any]) -> pandas.DataFrame:
+    return pandas.DataFrame(columns=["id", "lon", "lat"], data=data)
+
+
+class TestSensorIndex:
+
+    def test_build(self):
+        sensors_table = _create_sensors_table([
+            ("sensor_1", -87.65, 41.85),
+            ("sensor_2", 20.321, -5.302),
+            ("sensor_2", 20.321, -5.302),
+        ])
+
+        index = SensorIndex.build(sensors_table=sensors_table, zoom_levels=[6, 7])
+
+        assert list(index.table.columns) == SensorIndex.COLUMNS
+        assert len(index.table) == 4
+
+        reader = TileReader(None)
+        zoom_table = index.table[index.table["zoom"] == TileReader.ZOOM_LEVEL]
+        for row in zoom_table.itertuples():
+            tile, pixel = reader._calculate_pixel_coordinates(coords=Coordinate(lon=row.lon, lat=row.lat))
+            assert (row.tile_x, row.tile_y, row.px, row.py) == (tile.x, tile.y, pixel.x, pixel.y)
+
+    def test_save_load(self, tmp_path):
+        path = os.path.join(str(tmp_path), "tables", "sensor_index.parquet")
+
+        assert SensorIndex.load(path) is None
+
+        index = SensorIndex.build(sensors_table=_create_sensors_table([("sensor_1", -87.65, 41.85)]))
+        index.save(path)
+
+        loaded_index = SensorIndex.load(path)
+        pandas.testing.assert_frame_equal(loaded_index.table, index.table)
+
+    def test_attach(self):
+        index = SensorIndex(pandas.DataFrame(columns=SensorIndex.COLUMNS, data=[
+            ("sensor_1", -87.65, 41.85, TileReader.ZOOM_LEVEL, 1, 2, 3, 4),
+            ("sensor_2", 20.321, -5.302, TileReader.ZOOM_LEVEL, 5, 6, 7, 8),
+        ]))
+
+        sensors_table = pandas.DataFrame(columns=["id", "lon", "lat", "px", "py"], data=[
+            ("sensor_1", -87.65, 41.85, 100, 100),
+            # sensor was moved, so coordinates are calculated
+            ("sensor_2", -87.65, 41.85, 100, 100),
+            # sensor is missing in index
+            ("sensor_3", 20.321, -5.302, 100, 100),
+        ])
+
+        result = index.attach(sensors_table=sensors_table)
+
+        assert list(result["id"]) == ["sensor_1", "sensor_2", "sensor_3"]
+        np.testing.assert_array_equal(result["tile_x"], [1, 32, 71])
+        np.testing.assert_array_equal(result["tile_y"], [2, 47, 65])
+        np.testing.assert_array_equal(result["px"], [3, 213, 57])
+        np.testing.assert_array_equal(result["py"], [4, 150, 226])
@@ -0,0 +1,70 @@
+import os
+import pandas
+import pytest
+import typing
+
+from metrics.io.snapshot_dataset import SnapshotDataset
+from metrics.parse.forecast.accuweather import AccuWeatherParser
+
+
+def _write_snapshot(dataset: SnapshotDataset, snapshot_timestamp: int, ids: typing.List[str]):
+    path = dataset.file_path(snapshot_timestamp)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pandas.DataFrame({"id": ids,
+                              "lon": [1.0] * len(ids),
+                              "lat": [2.0] * len(ids),
+                              "timestamp": [snapshot_timestamp + 60 * i for i in range(len(ids))],
+                              "precip_rate": [1.0] * len(ids),
+                              "precip_prob": [1.0] * len(ids),
+                              "precip_type": [1] * len(ids)})
+    AccuWeatherParser()._write_table(data_frame=table, output_parquet_path=path)
+
+
+class TestSnapshotDataset:
+    def test_paths(self):
+        dataset = SnapshotDataset("root")
+
+        assert dataset.partition_path(7300) == "root/snapshot_hour=7200"
+        assert dataset.file_path(7300) == "root/snapshot_hour=7200/7300.parquet"
+
+    @pytest.mark.parametrize("snapshots_range, expected_snapshots", [
+        ((0, 20000), [3000, 3600, 7200, 10800]),
+        ((3600, 7200), [3600, 7200]),
+        ((3001, 7199), [3600]),
+        ((11000, 20000), [])
+    ])
+    def test_list_files(self, tmp_path, snapshots_range: typing.Tuple[int, int], expected_snapshots: typing.List[int]):
+        dataset = SnapshotDataset(os.path.join(tmp_path, "dataset"))
+        for snapshot_timestamp in [3000, 3600, 7200, 10800]:
+            _write_snapshot(dataset, snapshot_timestamp, ["A"])
+
+        assert dataset.list_files(snapshots_range) == [dataset.file_path(s) for s in expected_snapshots]
+
+    def test_read(self, tmp_path):
+        dataset = SnapshotDataset(os.path.join(tmp_path, "dataset"))
+        assert not dataset.exists()
+
+        for snapshot_timestamp in [3000, 3600, 7200]:
+            _write_snapshot(dataset, snapshot_timestamp, ["A", "B", "C"])
+
+        assert dataset.exists()
+        assert dataset.read(snapshots_range=(10000, 20000)) is None
+
+        table = dataset.read(snapshots_range=(3000, 3600),
+                             timestamp_range=(3000, 3660),
+                             ids=["A", "B"],
+                             columns=["id", "timestamp"])
+
+        assert list(table.columns) == ["id", "timestamp"]
+        assert sorted(zip(table["id"].astype(str), table["timestamp"])) == [("A", 3600), ("B", 3060), ("B", 3660)]
+
+    def test_read_all(self, tmp_path):
+        dataset = SnapshotDataset(os.path.join(tmp_path, "dataset"))
+        for snapshot_timestamp in [3000, 7200]:
+            _write_snapshot(dataset, snapshot_timestamp, ["A", "B"])
+
+        table = dataset.read_all()
+
+        assert SnapshotDataset.PARTITION_KEY not in table.columns
+        assert len(table) == 4
@@ -0,0 +1,106 @@
+import numpy as np
+import os
+import pytest
+import time
+import zipfile
+
+from metrics.io.rainviewer import RainViewerTileLoader
+from metrics.io.tile_cache import TileCache, get_shared_tile_cache, set_shared_tile_cache
+from metrics.utils.precipitation import PrecipitationData, PrecipitationType
+
+from unittest.mock import patch
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+
+
+def _create_tile(value: float) -> PrecipitationData:
+    return PrecipitationData(reflectivity=np.full((4, 4), value, dtype=np.float32),
+                             type=np.full((4, 4), PrecipitationType.RAIN.value, dtype=np.uint8))
+
+
+class TestTileCache:
+    def test_put_get(self, tmp_path):
+        cache = TileCache(path=str(tmp_path), max_size=1024 ** 2)
+
+        assert cache.get(("1000", 0, 1, 2)) == (False, None)
+
+        tile = _create_tile(10.0)
+        cache.put(("1000", 0, 1, 2), tile)
+        cache.put(("1000", 10, 1, 2), None)
+
+        found, data = cache.get(("1000", 0, 1, 2))
+        assert found
+        assert data == tile
+
+        assert cache.get(("1000", 10, 1, 2)) == (True, None)
+
+    def test_shared_between_instances(self, tmp_path):
+        TileCache(path=str(tmp_path), max_size=1024 ** 2).put(("1000", 0, 1, 2), _create_tile(5.0))
+
+        found, data = TileCache(path=str(tmp_path), max_size=1024 ** 2).get(("1000", 0, 1, 2))
+
+        assert found
+        assert data == _create_tile(5.0)
+
+    def test_evict(self, tmp_path):
+        cache = TileCache(path=str(tmp_path), max_size=1024 ** 2)
+        for index in range(3):
+            cache.put(("1000", index, 0, 0), _create_tile(float(index % 50)))
+
+        # make access order explicit: tile 1 is the least recently used
+        now = time.time()
+        for index, access_time in [(0, now - 10), (1, now - 20), (2, now - 5)]:
+            os.utime(os.path.join(str(tmp_path), f"1000_{index}_0_0.npy"), (access_time, access_time))
+
+        entry_size = os.path.getsize(os.path.join(str(tmp_path), "1000_0_0_0.npy"))
+        cache._max_size = 2 * entry_size
+        cache.evict()
+
+        assert cache.get(("1000", 1, 0, 0)) == (False, None)
+        assert cache.get(("1000", 0, 0, 0))[0]
+        assert cache.get(("1000", 2, 0, 0))[0]
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="open files are counted by /proc")
+    def test_get_keeps_no_open_files(self, tmp_path):
+        cache = TileCache(path=str(tmp_path), max_size=1024 ** 3)
+        for index in range(300):
+            cache.put(("1000", index, 0, 0), _create_tile(float(index % 50)))
+
+        open_files_num = len(os.listdir("/proc/self/fd"))
+        tiles = [cache.get(("1000", index, 0, 0))[1] for index in range(300)]
+
+        assert all(tile is not None for tile in tiles)
+        assert len(os.listdir("/proc/self/fd")) <= open_files_num + 1
+
+    def test_shared_tile_cache(self, tmp_path):
+        set_shared_tile_cache(str(tmp_path), max_size=100)
+        assert get_shared_tile_cache().path == str(tmp_path)
+        assert get_shared_tile_cache().max_size == 100
+
+        set_shared_tile_cache(None)
+        assert get_shared_tile_cache() is None
+
+
+class TestRainViewerTileLoaderCache:
+    def _create_archive(self, path: str):
+        with zipfile.ZipFile(path, "w") as zip_file:
+            zip_file.write(os.path.join(SCRIPT_DIRECTORY, "rainviewer_data.png"), "1000/_map/t0/7/1/2.png")
+            zip_file.write(os.path.join(SCRIPT_DIRECTORY, "rainviewer_mask.png"), "1000/_mask/7/1/2.png")
+
+    def test_load_uses_shared_cache(self, tmp_path):
+        zip_path = os.path.join(str(tmp_path), "1000.zip")
+        self._create_archive(zip_path)
+        cache = TileCache(path=os.path.join(str(tmp_path), "cache"), max_size=1024 ** 3)
+
+        expected = RainViewerTileLoader(zip_path=zip_path, tile_cache=cache).load(offset=0, tile_x=1, tile_y=2)
+        assert expected is not None
+
+        with patch("metrics.io.rainviewer.decode_data_from_file") as decode_mock:
+            loader = RainViewerTileLoader(zip_path=zip_path, tile_cache=cache)
+
+            assert loader.load(offset=0, tile_x=1, tile_y=2) == expected
+            assert loader.load(offset=10, tile_x=1, tile_y=2) is None
+            decode_mock.assert_not_called()
+
+        # missing tiles are cached too
+        assert cache.get(("1000", 10, 7, 1, 2)) == (True, None)
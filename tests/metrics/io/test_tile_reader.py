@@ -3,12 +3,21 @@ import mercantile
 import pytest
 import typing
 
+from metrics.io.tile_loader import BaseTileLoader
 from metrics.io.tile_reader import TileReader, PrecipValue
 from metrics.utils.coords import Coordinate, PixelCoordinate
 from metrics.utils.precipitation import PrecipitationType, PrecipitationData
 from unittest.mock import MagicMock
 
 
+class MockTileLoader(BaseTileLoader):
+    def __init__(self, load: typing.Callable[[int, int, int], typing.Optional[PrecipitationData]]) -> None:
+        self._load = load
+
+    def load(self, offset: int, tile_x: int, tile_y: int) -> typing.Optional[PrecipitationData]:
+        return self._load(offset=offset, tile_x=tile_x, tile_y=tile_y)
+
+
 class TestTileReader:
 
     @pytest.mark.parametrize("coords, expected_result", [
@@ -49,3 +58,55 @@ class TestTileReader:
         precip_value = tile_reader.get_dbz_value_by_tile(0, 0, 0, 0, 0)
 
         assert precip_value.dbz == expected_dbz
+
+    def test_calculate_pixel_coordinates_batch(self):
+        rng = np.random.default_rng(42)
+        lons = np.concatenate([rng.uniform(-180.0, 180.0, 1000), [-87.65, 20.321]])
+        lats = np.concatenate([rng.uniform(-85.0, 85.0, 1000), [41.85, -5.302]])
+
+        reader = TileReader(None)
+        tile_x, tile_y, px, py = reader._calculate_pixel_coordinates_batch(lons=lons, lats=lats)
+
+        for i, (lon, lat) in enumerate(zip(lons, lats)):
+            tile, pixel = reader._calculate_pixel_coordinates(coords=Coordinate(lon=lon, lat=lat))
+            assert (tile_x[i], tile_y[i], px[i], py[i]) == (tile.x, tile.y, pixel.x, pixel.y)
+
+    def test_get_dbz_values(self):
+        reflectivity = np.full((TileReader.TILE_SIZE, TileReader.TILE_SIZE), np.nan, dtype=np.float32)
+        reflectivity[150, 213] = 10.0
+        reflectivity[226, 57] = 20.0
+        precip_type = np.full((TileReader.TILE_SIZE, TileReader.TILE_SIZE),
+                              PrecipitationType.SNOW.value, dtype=np.uint8)
+
+        loaded_tiles = []
+
+        def mock_load(offset: int, tile_x: int, tile_y: int) -> typing.Optional[PrecipitationData]:
+            loaded_tiles.append((offset, tile_x, tile_y))
+            if (tile_x, tile_y) == (32, 47) or (tile_x, tile_y) == (71, 65):
+                return PrecipitationData(reflectivity=reflectivity, type=precip_type)
+            return None
+
+        tile_reader = TileReader(MockTileLoader(mock_load))
+
+        lons = np.array([-87.65, 20.321, -87.65, 0.0, -87.7])
+        lats = np.array([41.85, -5.302, 41.85, 0.0, 41.85])
+        dbz, types = tile_reader.get_dbz_values(lons=lons, lats=lats, offset=10)
+
+        assert dbz.dtype == np.float32
+        assert types.dtype == np.uint8
+
+        np.testing.assert_array_equal(dbz, [10.0, 20.0, 10.0, np.nan, np.nan])
+        np.testing.assert_array_equal(types, [PrecipitationType.SNOW.value] * 3 +
+                                      [PrecipitationType.UNKNOWN.value] +
+                                      [PrecipitationType.SNOW.value])
+
+        # every tile is loaded only once
+        assert sorted(loaded_tiles) == [(10, 32, 47), (10, 64, 64), (10, 71, 65)]
+
+        # batch values match single point values
+        for lon, lat, value in zip(lons, lats, dbz):
+            precip_value = tile_reader.get_dbz_value_by_coords(coords=Coordinate(lon=lon, lat=lat), offset=10)
+            if precip_value.dbz is None:
+                assert np.isnan(value)
+            else:
+                assert precip_value.dbz == value
@@ -3,6 +3,7 @@
 import json
 from typing import List, Tuple
 from metrics.parse.forecast.accuweather import AccuWeatherParser
+from metrics.parse.table_builder import TableBuilder
 from metrics.utils.precipitation import PrecipitationType
 
 
@@ -40,3 +41,35 @@ class TestAccuWeatherParser:
 
         assert len(rows) == 11
         assert all(r[-1] == PrecipitationType.SNOW.value for r in rows)
+
+    def test_parse_segments(self):
+        data = _mock_accuweather_response(lon=1.5,
+                                          lat=2.5,
+                                          forecasts=[(0, 1, PrecipitationType.RAIN),
+                                                     (2, 2, PrecipitationType.SNOW),
+                                                     (3, 4, PrecipitationType.UNKNOWN)])
+        data["payload"]["Summaries"][2]["Type"] = None
+        data_bytes = json.dumps(data).encode("utf-8")
+
+        parser = AccuWeatherParser()
+        rows = parser._parse_impl(timestamp=600,
+                                  file_name="sensor.json",
+                                  data=data_bytes)
+
+        rain, snow, unknown = PrecipitationType.RAIN.value, PrecipitationType.SNOW.value, PrecipitationType.UNKNOWN.value
+        assert rows == [("sensor", 1.5, 2.5, 600, 10.0, 1.0, rain),
+                        ("sensor", 1.5, 2.5, 660, 10.0, 1.0, rain),
+                        ("sensor", 1.5, 2.5, 720, 10.0, 1.0, snow),
+                        ("sensor", 1.5, 2.5, 780, 0.0, 0.0, unknown),
+                        ("sensor", 1.5, 2.5, 840, 0.0, 0.0, unknown)]
+
+        builder = TableBuilder(columns=parser._get_columns(), schema=parser._get_schema())
+        parser._parse_into(builder=builder, timestamp=600, file_name="sensor.json", data=data_bytes)
+        table = builder.build()
+        assert table.column("timestamp").to_pylist() == [row[3] for row in rows]
+        assert table.column("precip_type").to_pylist() == [row[6] for row in rows]
+
+    def test_parse_without_summaries(self):
+        data_bytes = json.dumps(_mock_accuweather_response(forecasts=[])).encode("utf-8")
+
+        assert AccuWeatherParser()._parse_impl(timestamp=0, file_name="sensor.json", data=data_bytes) == []
@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+import os
+import pandas
+import pytest
+import zipfile
+
+from metrics.calc.forecast.table_provider import TableProvider
+from metrics.calc.forecast.tile_provider import TileProvider
+from metrics.calc.forecast_manager import ForecastManager
+from metrics.data_vendor import DataVendor
+from metrics.io.rainviewer import encode_data_to_image
+from metrics.io.rainviewer_store import RainViewerStoreTileLoader, RainViewerTileStore
+from metrics.io.tile_reader import TileReader, calculate_tile_pixels
+from metrics.parse.forecast.rainviewer import RainViewerParser
+from metrics.session import Session
+from metrics.utils.precipitation import PrecipitationData, PrecipitationType
+
+SENSOR_LON = 23.0
+SENSOR_LAT = 53.0
+
+
+def _create_archive(path: str):
+    tile_x, tile_y, px, py = calculate_tile_pixels(lons=np.array([SENSOR_LON]),
+                                                   lats=np.array([SENSOR_LAT]),
+                                                   zoom=TileReader.ZOOM_LEVEL,
+                                                   tile_size=TileReader.TILE_SIZE)
+    tile_x, tile_y, px, py = int(tile_x[0]), int(tile_y[0]), int(px[0]), int(py[0])
+
+    reflectivity = np.full((TileReader.TILE_SIZE, TileReader.TILE_SIZE), np.nan, dtype=np.float32)
+    reflectivity[py, px] = 20.0
+    reflectivity[py, px + 1] = 40.0
+    data = PrecipitationData(reflectivity=reflectivity,
+                             type=np.full(reflectivity.shape, PrecipitationType.RAIN.value, dtype=np.uint8))
+
+    _, data_png = cv2.imencode(".png", encode_data_to_image(data))
+    # transparent mask covers all pixels
+    _, mask_png = cv2.imencode(".png", np.zeros((TileReader.TILE_SIZE, TileReader.TILE_SIZE, 4), dtype=np.uint8))
+
+    with zipfile.ZipFile(path, "w") as zip_file:
+        zip_file.writestr(f"1000/_map/t0/7/{tile_x}/{tile_y}.png", data_png.tobytes())
+        zip_file.writestr(f"1000/_mask/7/{tile_x}/{tile_y}.png", mask_png.tobytes())
+
+
+def _create_sensors(path: str):
+    pandas.DataFrame(columns=["id", "lon", "lat", "country"], data=[
+        ("sensor_1", SENSOR_LON, SENSOR_LAT, "POL"),
+        ("sensor_2", -100.0, 40.0, "USA"),  # sensor outside of downloaded tiles
+    ]).to_csv(path, index=False)
+
+
+class TestRainViewerParser:
+    def test_parse_tile_store(self, tmp_path):
+        input_path = os.path.join(str(tmp_path), "1000.zip")
+        output_path = os.path.join(str(tmp_path), "1000.parquet")
+        _create_archive(input_path)
+
+        RainViewerParser().parse(input_archive_path=input_path, output_parquet_path=output_path)
+
+        assert os.path.exists(RainViewerTileStore.tiles_path(output_path))
+
+    @pytest.mark.parametrize("neighbourhood, expected_dbz", [
+        (1, 20.0),
+        (3, 40.0),
+    ])
+    def test_parse_sensors(self, tmp_path, neighbourhood: int, expected_dbz: float):
+        input_path = os.path.join(str(tmp_path), "1000.zip")
+        output_path = os.path.join(str(tmp_path), "tables", "1000.parquet")
+        sensors_path = os.path.join(str(tmp_path), "sensors.csv")
+        os.makedirs(os.path.dirname(output_path))
+        _create_archive(input_path)
+        _create_sensors(sensors_path)
+
+        RainViewerParser(sensors_path=sensors_path,
+                         neighbourhood=neighbourhood).parse(input_archive_path=input_path,
+                                                            output_parquet_path=output_path)
+
+        assert not os.path.exists(RainViewerTileStore.tiles_path(output_path))
+
+        table = pandas.read_parquet(output_path)
+        expected_rate = TileProvider.dbz_to_precipitation_rates(dbz=np.array([expected_dbz], dtype=np.float32),
+                                                                precip_type=np.array([PrecipitationType.RAIN.value]))
+
+        assert list(table.columns) == ["id", "lon", "lat", "timestamp", "precip_rate", "precip_prob", "precip_type"]
+        assert table["id"].tolist() == ["sensor_1"]
+        assert table["timestamp"].tolist() == [1000]
+        assert table["lon"].tolist() == [SENSOR_LON]
+        assert table["precip_type"].tolist() == [PrecipitationType.RAIN.value]
+        assert table["precip_rate"].to_numpy() == pytest.approx(expected_rate)
+
+    @pytest.mark.parametrize("with_sensors_first", [False, True])
+    def test_reparse_in_other_mode(self, tmp_path, with_sensors_first: bool):
+        session = Session(session_path=str(tmp_path), start_time=0, end_time=3600)
+        data_folder = os.path.join(session.data_folder, DataVendor.RainViewer.value)
+        tables_folder = os.path.join(session.tables_folder, DataVendor.RainViewer.value)
+        os.makedirs(data_folder)
+        os.makedirs(tables_folder)
+
+        input_path = os.path.join(data_folder, "1000.zip")
+        output_path = os.path.join(tables_folder, "1000.parquet")
+        sensors_path = os.path.join(str(tmp_path), "sensors.csv")
+        _create_archive(input_path)
+        _create_sensors(sensors_path)
+
+        parsers = [RainViewerParser(), RainViewerParser(sensors_path=sensors_path)]
+        if with_sensors_first:
+            parsers.reverse()
+
+        for parser in parsers:
+            parser.parse(input_archive_path=input_path, output_parquet_path=output_path)
+
+        manager = ForecastManager(data_vendor=DataVendor.RainViewer, session=session)
+        provider = manager._create_data_provider(1000)
+        if with_sensors_first:
+            assert isinstance(provider, TileProvider)
+            assert isinstance(provider._tile_reader._tile_loader, RainViewerStoreTileLoader)
+        else:
+            assert isinstance(provider, TableProvider)
+            assert not os.path.exists(RainViewerTileStore.tiles_path(output_path))
+
+        data = provider.load(sensors_table=pandas.DataFrame(columns=["id", "lon", "lat"],
+                                                            data=[("sensor_1", SENSOR_LON, SENSOR_LAT)]))
+        assert data["id"].unique().tolist() == ["sensor_1"]
+
+    def test_invalid_neighbourhood(self):
+        with pytest.raises(AssertionError):
+            RainViewerParser(sensors_path="sensors.csv", neighbourhood=2)
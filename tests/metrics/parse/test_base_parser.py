@@ -0,0 +1,73 @@
+import json
+import os
+import pandas
+import pyarrow
+import pyarrow.parquet
+import pytest
+import zipfile
+
+from metrics.parse.base_parser import PARQUET_COMPRESSION
+from metrics.parse.forecast.accuweather import AccuWeatherParser
+from metrics.parse.json_decoder import JsonDecodeError
+
+
+def _create_archive(path: str, responses: dict):
+    with zipfile.ZipFile(path, "w") as zip_file:
+        for file_name, response in responses.items():
+            zip_file.writestr(file_name, json.dumps(response))
+
+
+def _mock_response(lon: float, lat: float):
+    return {
+        "position": {"lon": lon, "lat": lat},
+        "payload": {"Summaries": [{"StartMinute": 0, "EndMinute": 1, "Type": "RAIN"}]}
+    }
+
+
+class TestBaseParser:
+    def test_parse_writes_typed_schema(self, tmp_path):
+        input_path = os.path.join(tmp_path, "1000.zip")
+        output_path = os.path.join(tmp_path, "1000.parquet")
+        _create_archive(input_path, {"sensor_1.json": _mock_response(lon=10.5, lat=20.25),
+                                     "sensor_2.json": _mock_response(lon=11.5, lat=21.25)})
+
+        AccuWeatherParser().parse(input_archive_path=input_path, output_parquet_path=output_path)
+
+        parquet_file = pyarrow.parquet.ParquetFile(output_path)
+        schema = parquet_file.schema_arrow
+        assert schema.field("id").type == pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        assert schema.field("lon").type == pyarrow.float64()
+        assert schema.field("timestamp").type == pyarrow.int64()
+        assert schema.field("precip_rate").type == pyarrow.float32()
+        assert schema.field("precip_prob").type == pyarrow.float32()
+        assert schema.field("precip_type").type == pyarrow.uint8()
+
+        column = parquet_file.metadata.row_group(0).column(0)
+        assert column.compression.lower() == PARQUET_COMPRESSION
+        assert column.statistics is not None
+
+        table = pandas.read_parquet(output_path)
+        assert sorted(table["id"].unique()) == ["sensor_1", "sensor_2"]
+        assert table["timestamp"].tolist() == [1000, 1060, 1000, 1060]
+        assert (table["precip_rate"] == 10.0).all()
+
+    def test_parse_empty_archive(self, tmp_path):
+        input_path = os.path.join(tmp_path, "1000.zip")
+        output_path = os.path.join(tmp_path, "1000.parquet")
+        _create_archive(input_path, {})
+
+        AccuWeatherParser().parse(input_archive_path=input_path, output_parquet_path=output_path)
+
+        table = pandas.read_parquet(output_path)
+        assert len(table) == 0
+        assert list(table.columns) == ["id", "lon", "lat", "timestamp", "precip_rate", "precip_prob", "precip_type"]
+
+    @pytest.mark.parametrize("backend", [None, "json"])
+    def test_decode_json(self, backend):
+        parser = AccuWeatherParser()
+        parser.json_backend = backend
+
+        assert parser._decode_json(b'{"position": {"lon": 10.5, "lat": 20.25}}') == {"position": {"lon": 10.5,
+                                                                                                  "lat": 20.25}}
+        with pytest.raises(JsonDecodeError):
+            parser._decode_json(b'{"position": ')
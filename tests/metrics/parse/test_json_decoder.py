@@ -0,0 +1,49 @@
+import pytest
+import sys
+
+from metrics.parse.json_decoder import JSON_BACKENDS, get_json_decoder
+
+
+DOCUMENT = b'{"id": "sensor", "values": [0.1, 2.5e-3, 10, null, true], "nested": {"name": "\\u00e9"}}'
+EXPECTED = {"id": "sensor", "values": [0.1, 2.5e-3, 10, None, True], "nested": {"name": "é"}}
+
+
+@pytest.fixture(autouse=True)
+def clear_decoders_cache():
+    get_json_decoder.cache_clear()
+    yield
+    get_json_decoder.cache_clear()
+
+
+@pytest.mark.parametrize("backend", JSON_BACKENDS)
+def test_backends_decode_same_values(backend):
+    pytest.importorskip(backend)
+
+    decoder, decode_errors = get_json_decoder(backend)
+
+    assert decoder(DOCUMENT) == EXPECTED
+    with pytest.raises(decode_errors):
+        decoder(b'{"id": ')
+
+
+def test_fallback_to_stdlib(monkeypatch):
+    # import of a module that is set to `None` raises ImportError
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+
+    decoder, _ = get_json_decoder()
+
+    assert decoder.__module__ == "json"
+    assert decoder(DOCUMENT) == EXPECTED
+
+
+def test_missing_backend(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+
+    with pytest.raises(ImportError):
+        get_json_decoder("orjson")
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_json_decoder("unknown")
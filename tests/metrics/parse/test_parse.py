@@ -1,6 +1,8 @@
+import os
+
 from enum import Enum
 
-from metrics.parse.parse import ParseSource, _process_source, parse
+from metrics.parse.parse import ParseJob, ParseSource, _collect_source_jobs, _execute_jobs, parse
 from metrics.data_vendor import BaseDataVendor, DataVendor
 from metrics.parse.base_parser import BaseParser
 
@@ -18,9 +20,15 @@ class PickableMockParser(BaseParser):
 
 class TestParse:
     @patch("metrics.parse.parse.Session.create_from_folder")
-    @patch("metrics.parse.parse._process_source")
+    @patch("metrics.parse.parse._execute_jobs")
+    @patch("metrics.parse.parse._collect_source_jobs")
     @patch("metrics.parse.parse.os.makedirs")
-    def test_parse_smoke(self, mkdir_mock, process_source_mock: MagicMock, create_session_mock):
+    def test_parse_smoke(self, mkdir_mock, collect_jobs_mock: MagicMock, execute_jobs_mock: MagicMock,
+                         create_session_mock):
+        collect_jobs_mock.side_effect = lambda source: [ParseJob(input_archive_path=f"{source.vendor}.zip",
+                                                                 output_parquet_path=f"{source.vendor}.parquet",
+                                                                 parser_class=source.parser_class)]
+
         parse(session_path="test",
               process_num=1,
               providers=[DataVendor.AccuWeather,
@@ -28,18 +36,21 @@ class TestParse:
                          UnsupportedVendor.WeatherTest])
 
         processed_sources = []
-        for args, kwargs in process_source_mock.call_args_list:
+        for args, kwargs in collect_jobs_mock.call_args_list:
             processed_sources.append(kwargs["source"].vendor)
 
         assert processed_sources == [DataVendor.AccuWeather.name, DataVendor.Vaisala.name]
 
-    @patch("metrics.parse.parse._execute_source_jobs")
+        # jobs of all vendors are executed in one pool
+        execute_jobs_mock.assert_called_once()
+        args, kwargs = execute_jobs_mock.call_args
+        assert kwargs["process_num"] == 1
+        assert [job.input_archive_path for job in kwargs["jobs"]] == [f"{DataVendor.AccuWeather.name}.zip",
+                                                                      f"{DataVendor.Vaisala.name}.zip"]
+
     @patch("metrics.parse.parse.os.walk")
     @patch("metrics.parse.parse.os.makedirs")
-    def test_process_source_smoke(self, os_mkdir_mock, os_walk_mock, exec_mock: MagicMock):
-        source = None
-        process_num = 1
-
+    def test_collect_source_jobs_smoke(self, os_mkdir_mock, os_walk_mock):
         os_walk_mock.return_value = [("test/", (), ("1.zip",))]
 
         source = ParseSource(vendor="test",
@@ -47,10 +58,61 @@ class TestParse:
                              output_folder="test",
                              parser_class=PickableMockParser)
 
-        _process_source(source=source, process_num=process_num)
+        jobs = _collect_source_jobs(source=source)
 
-        args, kwargs = exec_mock.call_args
+        assert len(jobs) == 1
+        assert jobs[0].input_archive_path == "test/1.zip"
+        assert jobs[0].output_parquet_path == "test/1.parquet"
+        assert jobs[0].parser_class == PickableMockParser
 
-        assert kwargs["source_name"] == "test"
-        assert kwargs["process_num"] == 1
-        assert kwargs["jobs"][0].input_archive_path == "test/1.zip"
+    @patch("metrics.parse.parse.os.walk")
+    @patch("metrics.parse.parse.os.makedirs")
+    def test_collect_source_jobs_partitioned(self, os_mkdir_mock, os_walk_mock):
+        os_walk_mock.return_value = [("test/", (), ("7300.zip",))]
+
+        source = ParseSource(vendor="test",
+                             input_folder="test",
+                             output_folder="dataset",
+                             parser_class=PickableMockParser,
+                             partitioned=True)
+
+        jobs = _collect_source_jobs(source=source)
+
+        assert jobs[0].output_parquet_path == "dataset/snapshot_hour=7200/7300.parquet"
+        os_mkdir_mock.assert_any_call("dataset/snapshot_hour=7200", exist_ok=True)
+
+    @patch("metrics.parse.parse.os.walk")
+    @patch("metrics.parse.parse.os.makedirs")
+    def test_collect_source_jobs_multiple_folders(self, os_mkdir_mock, os_walk_mock):
+        os_walk_mock.return_value = [("test/", ("a",), ("1.zip",)),
+                                     ("test/a", (), ("2.zip",))]
+
+        source = ParseSource(vendor="test",
+                             input_folder="test",
+                             output_folder="out",
+                             parser_class=PickableMockParser)
+
+        jobs = _collect_source_jobs(source=source)
+
+        # each archive is parsed once
+        assert [job.input_archive_path for job in jobs] == ["test/1.zip", "test/a/2.zip"]
+
+    @patch("metrics.parse.parse.track", side_effect=lambda iterable, **kwargs: iterable)
+    @patch("metrics.parse.parse.multiprocessing.Pool")
+    def test_execute_jobs_largest_first(self, pool_mock: MagicMock, track_mock, tmp_path):
+        jobs = []
+        for name, size in [("small", 1), ("large", 100), ("medium", 10)]:
+            archive_path = tmp_path / f"{name}.zip"
+            archive_path.write_bytes(b"0" * size)
+            jobs.append(ParseJob(input_archive_path=str(archive_path),
+                                 output_parquet_path=str(tmp_path / f"{name}.parquet"),
+                                 parser_class=PickableMockParser))
+
+        pool = pool_mock.return_value.__enter__.return_value
+        pool.imap_unordered.return_value = []
+
+        _execute_jobs(jobs=jobs, process_num=2)
+
+        pool_mock.assert_called_once_with(processes=2)
+        args, _ = pool.imap_unordered.call_args
+        assert [os.path.basename(job.input_archive_path) for job in args[1]] == ["large.zip", "medium.zip", "small.zip"]
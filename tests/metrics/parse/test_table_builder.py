@@ -0,0 +1,43 @@
+import numpy as np
+import pyarrow
+
+from metrics.parse.base_parser import COLUMN_TYPES
+from metrics.parse.table_builder import TableBuilder
+
+
+COLUMNS = ["id", "timestamp", "precip_rate", "extra"]
+SCHEMA = {column: COLUMN_TYPES[column] for column in ["id", "timestamp", "precip_rate"]}
+
+
+class TestTableBuilder:
+    def test_append_rows_and_columns(self):
+        builder = TableBuilder(columns=COLUMNS, schema=SCHEMA)
+        builder.append_rows([("a", 0, 1, [1]),
+                             ("b", 60, 2.5, [])])
+        builder.append_rows([])
+        builder.append_columns({"id": ["a"],
+                                "timestamp": np.array([120], dtype=np.int64),
+                                "precip_rate": np.array([np.nan]),
+                                "extra": [[2, 3]]})
+
+        assert builder.num_rows == 3
+
+        table = builder.build()
+        assert table.schema.field("id").type == COLUMN_TYPES["id"]
+        assert table.schema.field("timestamp").type == COLUMN_TYPES["timestamp"]
+        assert table.schema.field("precip_rate").type == COLUMN_TYPES["precip_rate"]
+        assert table.schema.field("extra").type == pyarrow.list_(pyarrow.int64())
+
+        assert table.column("id").to_pylist() == ["a", "b", "a"]
+        assert table.column("timestamp").to_pylist() == [0, 60, 120]
+        # missing values are stored as nulls
+        assert table.column("precip_rate").to_pylist() == [1.0, 2.5, None]
+        assert table.column("extra").to_pylist() == [[1], [], [2, 3]]
+
+    def test_build_empty(self):
+        table = TableBuilder(columns=COLUMNS, schema=SCHEMA).build()
+
+        assert table.num_rows == 0
+        assert table.column_names == COLUMNS
+        assert table.schema.field("precip_rate").type == COLUMN_TYPES["precip_rate"]
+        assert table.schema.field("extra").type == pyarrow.null()
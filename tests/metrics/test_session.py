@@ -18,6 +18,8 @@ class TestSession:
         assert session.forecast_range == 7800
         assert session.sensors_folder == "test/sensors"
         assert session.metrics_folder == "test/metrics"
+        assert session.sensor_index_path == "test/tables/sensor_index.parquet"
+        assert session.datasets_folder == "test/tables/datasets"
 
     @patch("builtins.open", new_callable=mock_open)
     def test_session_from_folder(self, mock_open):
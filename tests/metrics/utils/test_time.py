@@ -1,6 +1,7 @@
 import pytest
 
-from metrics.utils.time import floor_timestamp
+from dateutil.parser import isoparse
+from metrics.utils.time import floor_timestamp, parse_iso_timestamp
 
 
 class TestTime:
@@ -12,3 +13,20 @@ class TestTime:
     ])
     def test_floor_timestamp(self, timestamp: int, period: int, expected_timestamp: int):
         assert floor_timestamp(timestamp=timestamp, period=period) == expected_timestamp
+
+    @pytest.mark.parametrize("time_str", [
+        "2023-11-05T01:00:00Z",
+        "2024-02-29T23:59:59Z",
+        "2024-06-13T08:00:00-0400",
+        "2024-06-13T08:00:00+05:30",
+        "2024-06-13T08:00:00.500Z",
+        "2024-06-13T08:00Z",
+    ])
+    def test_parse_iso_timestamp(self, time_str: str):
+        assert parse_iso_timestamp(time_str) == int(isoparse(time_str).timestamp())
+        # cached result
+        assert parse_iso_timestamp(time_str) == int(isoparse(time_str).timestamp())
+
+    def test_parse_iso_timestamp_invalid(self):
+        with pytest.raises(ValueError):
+            parse_iso_timestamp("2023-13-05T01:00:00Z")
@@ -1,13 +1,17 @@
 import asyncio
 import json
 import os
+import pandas as pd
 import pytest
+import time
+import zipfile
 
-from forecast.providers.provider import BaseForecastInPointProvider, batched
+from forecast.providers.provider import BaseForecastInPointProvider, batched, gather_until
 from forecast.sensor import Sensor
 from forecast.utils.constants import FETCHING_REPORT_NAME
 from forecast.utils.req_interface import Response
 from typing_extensions import override
+from unittest.mock import patch
 
 
 @pytest.mark.parametrize("input_data,batch_size,expected", [
@@ -77,3 +81,144 @@ async def test_sensor_provider_base_forecast(tmp_path):
     # Check if fetching report was created
     report_path = tmp_path / str(timestamp) / FETCHING_REPORT_NAME
     assert report_path.exists(), "Missing fetching report"
+
+
+class CountingSensorProvider(BaseForecastInPointProvider):
+    active = 0
+    max_active = 0
+
+    @override
+    async def get_json_forecast_in_point(self, lon: float, lat: float) -> Response:
+        CountingSensorProvider.active += 1
+        CountingSensorProvider.max_active = max(CountingSensorProvider.max_active, CountingSensorProvider.active)
+        await asyncio.sleep(0.01)
+        CountingSensorProvider.active -= 1
+
+        return Response(status=200, payload=json.dumps({"lon": lon, "lat": lat}))
+
+
+@pytest.mark.asyncio
+async def test_sensor_provider_in_event_loop(tmp_path):
+    sensors = [Sensor(id=f"test{ind}",
+                      lon=10.0,
+                      lat=20.0,
+                      country="country") for ind in range(100)]
+
+    timestamp = 1718236800
+    snapshot_path = os.path.join(str(tmp_path), str(timestamp))
+    os.makedirs(snapshot_path, exist_ok=True)
+
+    client = CountingSensorProvider(sensors,
+                                    download_path=str(tmp_path),
+                                    publisher=None,
+                                    process_num=1,
+                                    concurrency=10)
+
+    await client.fetch_job(timestamp=timestamp)
+
+    assert CountingSensorProvider.max_active == 10
+    for s in sensors:
+        assert (tmp_path / str(timestamp) / f"{s.id}.json").exists(), f"Missing output file for sensor {s.id}"
+
+    assert (tmp_path / str(timestamp) / FETCHING_REPORT_NAME).exists(), "Missing fetching report"
+
+
+class StopRun(Exception):
+    pass
+
+
+class ArchiveCheckingPublisher:
+    def __init__(self):
+        self.names = None
+        self.payloads = {}
+
+    async def publish(self, snapshot_path: str):
+        with zipfile.ZipFile(snapshot_path, "r") as zip_file:
+            self.names = sorted(zip_file.namelist())
+            self.payloads = {name: zip_file.read(name) for name in self.names}
+        # snapshot folder isn't created when responses are streamed into the archive
+        assert not os.path.exists(snapshot_path[:-len(".zip")])
+        raise StopRun()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrency", [None, 10])
+async def test_sensor_provider_streams_archive(tmp_path, concurrency):
+    sensors = [Sensor(id=f"test{ind}",
+                      lon=10.0,
+                      lat=float(ind),
+                      country="country") for ind in range(20)]
+
+    publisher = ArchiveCheckingPublisher()
+    client = CountingSensorProvider(sensors,
+                                    download_path=str(tmp_path),
+                                    publisher=publisher,
+                                    process_num=2,
+                                    chunk_size=10,
+                                    concurrency=concurrency,
+                                    publish_margin=0)
+
+    timestamp = int(time.time()) // 600 * 600
+    with patch("forecast.providers.provider.time_to_next_run", return_value=0), \
+            patch("forecast.providers.provider.Timestamp.get_current", return_value=timestamp):
+        with pytest.raises(StopRun):
+            await client.run()
+
+    expected = sorted([f"{timestamp}/{s.id}.json" for s in sensors] + [f"{timestamp}/{FETCHING_REPORT_NAME}"])
+    assert publisher.names == expected
+    for s in sensors:
+        assert json.loads(publisher.payloads[f"{timestamp}/{s.id}.json"]) == {"lon": s.lon, "lat": s.lat}
+
+
+@pytest.mark.asyncio
+async def test_gather_until():
+    async def _respond(delay: float, status: int) -> Response:
+        await asyncio.sleep(delay)
+        if status < 0:
+            raise RuntimeError("failed request")
+        return Response(status=status, payload=b"ok")
+
+    responses = await gather_until([_respond(0.0, 200), _respond(10.0, 200), _respond(0.0, -1)],
+                                   deadline=time.time() + 0.1)
+
+    assert responses[0].ok
+    assert responses[1].timed_out and not responses[1].ok
+    assert not responses[2].ok and not responses[2].timed_out
+
+
+class SlowSensorProvider(BaseForecastInPointProvider):
+    @override
+    async def get_json_forecast_in_point(self, lon: float, lat: float) -> Response:
+        await asyncio.sleep(lon)
+        return Response(status=200, payload=json.dumps({"lon": lon, "lat": lat}))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrency", [None, 10])
+async def test_sensor_provider_deadline(tmp_path, concurrency):
+    sensors = [Sensor(id="fast", lon=0.0, lat=20.0, country="country"),
+               Sensor(id="slow", lon=30.0, lat=20.0, country="country")]
+
+    timestamp = 1718236800
+    snapshot_path = os.path.join(str(tmp_path), str(timestamp))
+    os.makedirs(snapshot_path, exist_ok=True)
+
+    client = SlowSensorProvider(sensors,
+                                download_path=str(tmp_path),
+                                publisher=None,
+                                process_num=1,
+                                chunk_size=2,
+                                concurrency=concurrency)
+    client._snapshot_deadline = time.time() + 1
+
+    start = time.time()
+    await client.fetch_job(timestamp=timestamp)
+
+    assert time.time() - start < 10
+    assert (tmp_path / str(timestamp) / "fast.json").exists()
+    assert not (tmp_path / str(timestamp) / "slow.json").exists()
+
+    report = pd.read_csv(tmp_path / str(timestamp) / FETCHING_REPORT_NAME)
+    assert report["target"].tolist() == ["fast", "slow"]
+    assert report["status"].tolist() == [True, False]
+    assert report["timeout"].tolist() == [False, True]
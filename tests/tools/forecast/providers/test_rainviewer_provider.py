@@ -3,7 +3,8 @@ import os
 import pytest
 import tempfile
 
-from forecast.providers.rainviewer import RainViewer
+from forecast.providers.rainviewer import RainViewer, coord_to_tile, get_sensor_tiles
+from forecast.sensor import Sensor
 from forecast.utils.constants import FETCHING_REPORT_NAME
 from forecast.utils.req_interface import Response
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -21,6 +22,63 @@ def test_rainviewer_smoke():
     assert client.zoom == 1
 
 
+@pytest.mark.parametrize("lon, lat, zoom, expected_tile", [
+    (0.0, 0.0, 1, (1, 1)),
+    (-180.0, 90.0, 1, (0, 0)),
+    (180.0, -90.0, 1, (1, 1)),
+    (-119.291, 50.703, 7, (21, 43)),
+    (23.0, 53.0, 7, (72, 41)),
+])
+def test_coord_to_tile(lon, lat, zoom, expected_tile):
+    assert coord_to_tile(lon=lon, lat=lat, zoom=zoom) == expected_tile
+
+
+def test_get_sensor_tiles():
+    sensors = [Sensor(id="s1", lon=23.0, lat=53.0, country="POL"),
+               Sensor(id="s2", lon=23.1, lat=53.1, country="POL"),
+               Sensor(id="s3", lon=-119.291, lat=50.703, country="CAN")]
+
+    assert get_sensor_tiles(sensors=sensors, zoom=7) == [(21, 43), (72, 41)]
+
+
+def _mock_metadata() -> dict:
+    return {
+        "host": "https://test-host.com",
+        "radar": {
+            "past": [
+                {"time": 1234567890, "path": "/test/path"}
+            ],
+            "nowcast": [
+                {"time": 1234567890 + 600 * index, "path": f"/test/path/{index}"} for index in range(1, 7)
+            ]
+        }
+    }
+
+
+@pytest.mark.asyncio
+@patch.object(RainViewer, "execute_with_batches", new_callable=AsyncMock)
+@patch.object(RainViewer, "_native_get", new_callable=AsyncMock)
+async def test_get_forecast_for_sensors(mock_get, mock_execute):
+    mock_get.return_value = Response(status=200, payload=json.dumps(_mock_metadata()).encode())
+    mock_execute.return_value = [Response(status=200, payload=b"test")] * 8
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = RainViewer(token="test_token",
+                            zoom=7,
+                            download_path=temp_dir,
+                            publisher=MagicMock(),
+                            process_num=1,
+                            chunk_size=1,
+                            sensors=[Sensor(id="s1", lon=23.0, lat=53.0, country="POL")])
+
+        await client.fetch_job(timestamp=1234567890)
+
+        jobs = mock_execute.call_args[1]["args"]
+        # mask and 7 frames of a single tile
+        assert len(jobs) == 8
+        assert all("/7/72/41/" in url for url, _ in jobs)
+
+
 @pytest.mark.asyncio
 @patch.object(RainViewer, "execute_with_batches", new_callable=AsyncMock)
 @patch.object(RainViewer, "_native_get", new_callable=AsyncMock)
@@ -0,0 +1,27 @@
+import zipfile
+
+from forecast.utils.memory_zip import MemoryZip, ZipWriter
+
+
+def _read_entries(target) -> dict:
+    with zipfile.ZipFile(target, "r") as zip_file:
+        return {name: zip_file.read(name) for name in zip_file.namelist()}
+
+
+def test_zip_writer_to_file(tmp_path):
+    path = str(tmp_path / "1000.zip")
+    archive = ZipWriter(path)
+    archive.write_raw("1000/sensor.json", '{"value": 1}')
+    archive.write_raw("1000/raw.bin", b"\x00\x01")
+    archive.close()
+
+    assert _read_entries(path) == {"1000/sensor.json": b'{"value": 1}', "1000/raw.bin": b"\x00\x01"}
+
+
+def test_memory_zip():
+    archive = MemoryZip()
+    archive.write_raw("sensor.json", "data")
+    archive.close()
+
+    archive.buffer.seek(0)
+    assert _read_entries(archive.buffer) == {"sensor.json": b"data"}
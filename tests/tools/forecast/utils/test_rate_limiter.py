@@ -0,0 +1,110 @@
+import asyncio
+import pickle
+import pytest
+import time
+
+from forecast.utils.rate_limiter import RateLimiter, parse_retry_after
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("5", 5.0),
+    ("0.5", 0.5),
+    ("-1", 0.0),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+@pytest.mark.asyncio
+async def test_rate():
+    limiter = RateLimiter(requests_per_second=20)
+
+    async def _request():
+        async with limiter.request():
+            pass
+
+    start = time.monotonic()
+    await asyncio.gather(*[_request() for _ in range(30)])
+
+    # first 20 requests use the initial bucket capacity
+    assert time.monotonic() - start >= 0.45
+
+
+@pytest.mark.asyncio
+async def test_max_in_flight():
+    limiter = RateLimiter(max_in_flight=3)
+    active = 0
+    max_active = 0
+
+    async def _request():
+        nonlocal active, max_active
+        async with limiter.request():
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*[_request() for _ in range(20)])
+
+    assert max_active == 3
+
+
+def test_adaptive_limit():
+    limiter = RateLimiter(max_in_flight=8)
+
+    limiter.report(status=429)
+    assert limiter.limit == 4
+
+    # responses of requests that were sent together decrease limit once
+    limiter.report(status=503)
+    assert limiter.limit == 4
+
+    # limit grows by one request per window of successful requests
+    for _ in range(4):
+        limiter.report(status=200)
+    assert limiter.limit == 4
+    limiter.report(status=200)
+    assert limiter.limit == 5
+
+    for _ in range(100):
+        limiter.report(status=200)
+    assert limiter.limit == 8
+
+    # other statuses don't change limit
+    limiter.report(status=404)
+    limiter.report(status=0)
+    assert limiter.limit == 8
+
+
+@pytest.mark.asyncio
+async def test_retry_after_blocks_requests():
+    limiter = RateLimiter()
+    limiter.report(status=429, retry_after=0.2)
+
+    start = time.monotonic()
+    async with limiter.request():
+        pass
+
+    assert time.monotonic() - start >= 0.15
+
+
+def test_split():
+    limiter = RateLimiter(requests_per_second=10, max_in_flight=8).split(4)
+
+    assert limiter.requests_per_second == 2.5
+    assert limiter.limit == 2
+
+    assert RateLimiter(max_in_flight=2).split(4).limit == 1
+    assert RateLimiter().split(4).limit is None
+
+
+def test_pickle():
+    limiter = RateLimiter(requests_per_second=10, max_in_flight=8)
+    limiter.report(status=429)
+
+    restored = pickle.loads(pickle.dumps(limiter))
+
+    assert restored.requests_per_second == 10
+    assert restored.limit == 8
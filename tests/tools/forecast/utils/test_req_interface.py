@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from forecast.utils.rate_limiter import RateLimiter
+from forecast.utils.req_interface import RequestInterface
+from forecast.utils.retry import RetryPolicy
+
+
+async def _start_server() -> tuple[TestServer, set]:
+    peers = set()
+
+    async def handle(request: web.Request) -> web.Response:
+        peers.add(request.transport.get_extra_info("peername"))
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    app.router.add_post("/", handle)
+
+    server = TestServer(app)
+    await server.start_server()
+    return server, peers
+
+
+@pytest.mark.asyncio
+async def test_shared_session_reuses_connections():
+    server, peers = await _start_server()
+    try:
+        interface = RequestInterface()
+        interface.limit_per_host = 2
+
+        async with interface.shared_session() as session:
+            assert interface._shared_session is session
+            responses = await asyncio.gather(*[interface._native_get(url=str(server.make_url("/")))
+                                               for _ in range(10)])
+            responses.append(await interface._native_post(url=str(server.make_url("/"))))
+
+        assert interface._shared_session is None
+        assert all(resp.ok and resp.payload == b"ok" for resp in responses)
+        assert len(peers) <= 2
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_request_without_shared_session():
+    server, peers = await _start_server()
+    try:
+        interface = RequestInterface()
+        for _ in range(3):
+            resp = await interface._native_get(url=str(server.make_url("/")))
+            assert resp.ok
+
+        # each request opens its own connection
+        assert len(peers) == 3
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_throttled_request():
+    statuses = [429, 200]
+    requests_num = 0
+
+    async def handle(request: web.Request) -> web.Response:
+        nonlocal requests_num
+        requests_num += 1
+        status = statuses.pop(0)
+        if status == 429:
+            return web.Response(status=429, headers={"Retry-After": "0.2"})
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        interface = RequestInterface()
+        interface.rate_limiter = RateLimiter(max_in_flight=4)
+        interface.retry_policy = RetryPolicy(base_delay=0.01)
+
+        start = time.monotonic()
+        resp = await interface._native_get(url=str(server.make_url("/")))
+
+        assert resp.ok
+        assert requests_num == 2
+        # retry waits for the delay requested by the server
+        assert time.monotonic() - start >= 0.15
+        assert interface.rate_limiter.limit == 2
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_client_error_is_not_retried():
+    requests_num = 0
+
+    async def handle(request: web.Request) -> web.Response:
+        nonlocal requests_num
+        requests_num += 1
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        resp = await RequestInterface()._native_get(url=str(server.make_url("/")))
+
+        assert resp.status == 404
+        assert requests_num == 1
+    finally:
+        await server.close()
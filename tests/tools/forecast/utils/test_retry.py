@@ -0,0 +1,81 @@
+import pytest
+import time
+
+from forecast.utils.response import Response
+from forecast.utils.retry import RetryPolicy
+from unittest.mock import AsyncMock, patch
+
+
+def _mock_request(statuses: list[int]) -> AsyncMock:
+    return AsyncMock(side_effect=[Response(status=status, payload=b"ok" if status == 200 else None)
+                                  for status in statuses])
+
+
+@pytest.mark.asyncio
+@patch("forecast.utils.retry.asyncio.sleep", new_callable=AsyncMock)
+async def test_retry_until_success(mock_sleep):
+    do_request = _mock_request([503, 0, 200])
+
+    resp = await RetryPolicy(jitter=False).run(do_request)
+
+    assert resp.ok
+    assert do_request.call_count == 3
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [1.0, 2.0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [400, 401, 403, 404])
+@patch("forecast.utils.retry.asyncio.sleep", new_callable=AsyncMock)
+async def test_no_retry_on_client_error(mock_sleep, status):
+    do_request = _mock_request([status, 200])
+
+    resp = await RetryPolicy().run(do_request)
+
+    assert resp.status == status
+    assert do_request.call_count == 1
+    mock_sleep.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch("forecast.utils.retry.asyncio.sleep", new_callable=AsyncMock)
+async def test_max_attempts(mock_sleep):
+    do_request = _mock_request([500] * 5)
+
+    resp = await RetryPolicy(max_attempts=3).run(do_request)
+
+    assert resp.status == 500
+    assert do_request.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+@pytest.mark.asyncio
+@patch("forecast.utils.retry.asyncio.sleep", new_callable=AsyncMock)
+async def test_deadline(mock_sleep):
+    do_request = _mock_request([500] * 5)
+
+    # next attempt can't be done before the deadline
+    resp = await RetryPolicy(base_delay=10, jitter=False).with_deadline(time.time() + 5).run(do_request)
+    assert resp.status == 500
+    assert do_request.call_count == 1
+    mock_sleep.assert_not_called()
+
+    # deadline has already passed
+    resp = await RetryPolicy().with_deadline(time.time() - 1).run(do_request)
+    assert resp.status == 0
+    assert do_request.call_count == 1
+
+
+@pytest.mark.parametrize("attempt, retry_after, expected", [
+    (0, None, 1.0),
+    (3, None, 8.0),
+    (10, None, 30.0),
+    (0, 5.0, 5.0),
+    (3, 2.0, 8.0),
+])
+def test_get_delay(attempt, retry_after, expected):
+    assert RetryPolicy(jitter=False).get_delay(attempt=attempt, retry_after=retry_after) == expected
+
+
+def test_get_delay_jitter():
+    for attempt in range(10):
+        assert 0 <= RetryPolicy().get_delay(attempt=attempt) <= min(30.0, 2 ** attempt)
@@ -18,6 +18,8 @@ from rich.console import Console
 from forecast.publishers.publisher import Publisher, NullPublisher
 from forecast.publishers.s3 import S3Publisher
 from forecast.providers.provider import BaseProvider
+from forecast.utils.rate_limiter import RateLimiter
+from forecast.utils.req_interface import RequestInterface
 
 
 console = Console()
@@ -39,6 +41,7 @@ def _create_wk(args: argparse.Namespace) -> WeatherKit:
                       publisher=publisher,
                       process_num=args.process_num,
                       chunk_size=args.chunk_size,
+                      concurrency=args.concurrency,
                       frequency=args.download_period,
                       config_path=args.config_path,
                       forecast_type=args.forecast_type,
@@ -54,6 +57,7 @@ def _create_accuweather(args: argparse.Namespace) -> AccuWeather:
                        publisher=publisher,
                        process_num=args.process_num,
                        chunk_size=args.chunk_size,
+                       concurrency=args.concurrency,
                        frequency=args.download_period,
                        token=args.token,
                        sensors=sensors)
@@ -68,6 +72,7 @@ def _create_myradar(args: argparse.Namespace) -> MyRadar:
                    publisher=publisher,
                    process_num=args.process_num,
                    chunk_size=args.chunk_size,
+                   concurrency=args.concurrency,
                    frequency=args.download_period,
                    sub_key=args.key,
                    sensors=sensors)
@@ -82,6 +87,7 @@ def _create_microsoft(args: argparse.Namespace) -> Microsoft:
                      publisher=publisher,
                      process_num=args.process_num,
                      chunk_size=args.chunk_size,
+                     concurrency=args.concurrency,
                      frequency=args.download_period,
                      cliend_id=args.client_id,
                      subscription_key=args.subscription_key,
@@ -97,6 +103,7 @@ def _create_tomorrowio(args: argparse.Namespace) -> TomorrowIo:
                       publisher=publisher,
                       process_num=args.process_num,
                       chunk_size=args.chunk_size,
+                      concurrency=args.concurrency,
                       frequency=args.download_period,
                       token=args.token,
                       forecast_type=args.forecast_type,
@@ -112,6 +119,7 @@ def _create_viasala(args: argparse.Namespace) -> Vaisala:
                    publisher=publisher,
                    process_num=args.process_num,
                    chunk_size=args.chunk_size,
+                   concurrency=args.concurrency,
                    frequency=args.download_period,
                    client_id=args.client_id,
                    client_secret=args.client_secret,
@@ -127,6 +135,7 @@ def _create_open_weather(args: argparse.Namespace) -> OpenWeather:
                        publisher=publisher,
                        process_num=args.process_num,
                        chunk_size=args.chunk_size,
+                       concurrency=args.concurrency,
                        frequency=args.download_period,
                        token=args.token,
                        sensors=sensors)
@@ -141,6 +150,7 @@ def _create_rainbow(args: argparse.Namespace) -> Rainbow:
                    publisher=publisher,
                    process_num=args.process_num,
                    chunk_size=args.chunk_size,
+                   concurrency=args.concurrency,
                    frequency=args.download_period,
                    token=args.token,
                    sensors=sensors)
@@ -148,13 +158,18 @@ def _create_rainbow(args: argparse.Namespace) -> Rainbow:
 
 def _create_rainviewer(args: argparse.Namespace) -> RainViewer:
     publisher = _create_publisher(args)
+    sensors = None
+    if args.sensors is not None:
+        sensors = Sensor.from_csv(sensors_path=args.sensors,
+                                  include_countries=args.include_countries)
 
     return RainViewer(download_path=args.download_path,
                       publisher=publisher,
                       process_num=args.process_num,
                       chunk_size=args.chunk_size,
                       frequency=args.download_period,
-                      token=args.token, zoom=args.zoom)
+                      token=args.token, zoom=args.zoom,
+                      sensors=sensors)
 
 
 def _create_weathercompany(args: argparse.Namespace) -> WeatherCompany:
@@ -166,13 +181,14 @@ def _create_weathercompany(args: argparse.Namespace) -> WeatherCompany:
                           publisher=publisher,
                           process_num=args.process_num,
                           chunk_size=args.chunk_size,
+                          concurrency=args.concurrency,
                           frequency=args.download_period,
                           sensors=sensors,
                           token=args.token)
 
 
-def _add_sensors_params(parser: argparse.ArgumentParser):
-    parser.add_argument("--sensors", type=str, required=True,
+def _add_sensors_params(parser: argparse.ArgumentParser, required: bool = True):
+    parser.add_argument("--sensors", type=str, required=required,
                         help="Path to csv file with sensors information")
     parser.add_argument("--include-countries",
                         dest="include_countries",
@@ -203,6 +219,16 @@ if __name__ == "__main__":
                         help="Number of processes")
     parser.add_argument("--chunk-size", type=int, dest="chunk_size", default=None, required=False,
                         help="Chunk size")
+    parser.add_argument("--concurrency", type=int, dest="concurrency", default=None, required=False,
+                        help=("Process all sensors in one event loop with this number of simultaneous requests "
+                              "instead of a process pool"))
+    parser.add_argument("--limit-per-host", type=int, dest="limit_per_host", default=None, required=False,
+                        help="Maximum number of simultaneous connections to a host in each process")
+    parser.add_argument("--rate-limit", type=float, dest="rate_limit", default=None, required=False,
+                        help="Maximum number of requests per second to the provider")
+    parser.add_argument("--max-in-flight", type=int, dest="max_in_flight", default=None, required=False,
+                        help=("Maximum number of simultaneous requests to the provider. "
+                              "It's decreased when the provider throttles requests and restored on success"))
 
     subparser = parser.add_subparsers(dest="provider", help="Available intergrations")
 
@@ -272,6 +298,8 @@ if __name__ == "__main__":
 
     # RainViewer
     rainviewer_parser = subparser.add_parser("rainviewer", help="RainViewer")
+    # without sensors all tiles of the zoom level are downloaded
+    _add_sensors_params(rainviewer_parser, required=False)
     rainviewer_parser.add_argument("--token", type=str, required=True, help="Token to access RainViewer API")
     rainviewer_parser.add_argument("--zoom", type=int, required=False, default=7, help="Zoom level")
     rainviewer_parser.set_defaults(func=_create_rainviewer)
@@ -291,5 +319,10 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     provider: BaseProvider = args.func(args)
+    if isinstance(provider, RequestInterface) and args.limit_per_host is not None:
+        provider.limit_per_host = args.limit_per_host
+    if isinstance(provider, RequestInterface) and (args.rate_limit is not None or args.max_in_flight is not None):
+        provider.rate_limiter = RateLimiter(requests_per_second=args.rate_limit,
+                                            max_in_flight=args.max_in_flight)
 
     asyncio.run(provider.run())
@@ -2,13 +2,16 @@ import asyncio
 import os
 import pandas as pd
 import shutil
+import time
 
 from abc import abstractmethod
 from concurrent.futures import ProcessPoolExecutor
 from forecast.publishers.publisher import Publisher
 from forecast.sensor import Sensor
 from forecast.utils.constants import FETCHING_REPORT_NAME
-from forecast.utils.req_interface import Response
+from forecast.utils.rate_limiter import RateLimiter
+from forecast.utils.req_interface import RequestInterface, Response
+from forecast.utils.memory_zip import ZipWriter
 from forecast.utils.time import Timestamp, time_to_next_run
 from functools import partial
 from itertools import islice
@@ -23,12 +26,59 @@ console = Console()
 T = TypeVar("T")
 
 
+# time in seconds that is reserved before the next snapshot to archive and publish the current one
+PUBLISH_MARGIN = 60
+
+
+async def gather_until(jobs: list[Awaitable[Response]], deadline: float | None) -> list[Response]:
+    """Runs jobs concurrently until the deadline. Unfinished jobs are cancelled and their responses are
+    marked as timed out. Jobs that failed with an exception get failed responses
+
+    Parameters
+    ----------
+    jobs : list[Awaitable[Response]]
+        Jobs to run
+    deadline : float | None
+        Unix time when unfinished jobs are cancelled. If it is `None`, then all jobs are awaited
+
+    Returns
+    -------
+    list[Response]
+        Responses in the same order as jobs
+    """
+    tasks = [asyncio.ensure_future(job) for job in jobs]
+    if len(tasks) == 0:
+        return []
+
+    timeout = None if deadline is None else max(0.0, deadline - time.time())
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    responses = []
+    for task in tasks:
+        if task in pending:
+            responses.append(Response(timed_out=True))
+        elif task.exception() is not None:
+            responses.append(Response())
+        else:
+            responses.append(task.result())
+
+    return responses
+
+
 class BaseProvider:
+    # if it is set, then files saved with `save_snapshot_file` are written directly into the snapshot archive
+    streams_snapshot: bool = False
+
     def __init__(self,
                  publisher: Publisher,
                  download_path: str,
                  frequency: int = 600,
-                 delay: int = 0):
+                 delay: int = 0,
+                 publish_margin: int = PUBLISH_MARGIN):
         """
         Initialize the provider.
 
@@ -38,6 +88,9 @@ class BaseProvider:
             The frequency of the provider in seconds.
         delay : int
             Additional delay in seconds. It used to wait for the data to be available.
+        publish_margin : int
+            Time in seconds before the next snapshot that is reserved to archive and publish the current one.
+            Requests that aren't finished by then are cancelled.
         publisher : Publisher
             The publisher to publish the data. Local storage or any cloud storage.
         download_path : str
@@ -49,6 +102,11 @@ class BaseProvider:
         self._delay = delay
         self._download_path = download_path
         self._publisher = publisher
+        self._publish_margin = publish_margin
+        # unix time when requests of the current snapshot are cancelled
+        self._snapshot_deadline: float | None = None
+        # archive of the current snapshot when the provider streams it
+        self._archive: ZipWriter | None = None
 
     async def run(self):
         """
@@ -63,17 +121,31 @@ class BaseProvider:
             timestamp = Timestamp.floor(start_time, self._frequency)
 
             snapshot_path = self.snapshot_path(timestamp)
+            archive_path = f"{snapshot_path}.zip"
 
             shutil.rmtree(snapshot_path, ignore_errors=True)
-            os.makedirs(snapshot_path, exist_ok=False)
+            if self.streams_snapshot:
+                self._archive = ZipWriter(archive_path)
+            else:
+                os.makedirs(snapshot_path, exist_ok=False)
 
-            await self.fetch_job(timestamp)
+            # finish the snapshot before the next one starts, so snapshot cadence is kept when provider is slow
+            self._snapshot_deadline = timestamp + self._delay + self._frequency - self._publish_margin
+            if isinstance(self, RequestInterface):
+                self.retry_policy = self.retry_policy.with_deadline(self._snapshot_deadline)
 
-            shutil.make_archive(base_name=snapshot_path,
-                                format="zip",
-                                root_dir=self._download_path,
-                                base_dir=str(timestamp))
-            archive_path = f"{snapshot_path}.zip"
+            try:
+                await self.fetch_job(timestamp)
+            finally:
+                if self._archive is not None:
+                    self._archive.close()
+                    self._archive = None
+
+            if not self.streams_snapshot:
+                shutil.make_archive(base_name=snapshot_path,
+                                    format="zip",
+                                    root_dir=self._download_path,
+                                    base_dir=str(timestamp))
 
             # Publish to the storage
             await self._publisher.publish(snapshot_path=archive_path)
@@ -88,6 +160,13 @@ class BaseProvider:
 
             console.log(f"It took {Timestamp.get_current() - start_time} seconds to download data")
 
+    def __getstate__(self) -> dict:
+        # provider is copied into pool processes with its methods, while the archive is written only by
+        # the main process
+        state = self.__dict__.copy()
+        state["_archive"] = None
+        return state
+
     def snapshot_path(self, timestamp: int) -> str:
         return os.path.join(self._download_path, str(timestamp))
 
@@ -103,18 +182,43 @@ class BaseProvider:
         """
         pass
 
+    def save_snapshot_file(self, timestamp: int, file_name: str, data: str | bytes):
+        """
+        Save file of the snapshot. While the snapshot is streamed, the file is written into its archive
+        with the same path as `make_archive` gives, otherwise into the snapshot folder.
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp of the snapshot
+        file_name : str
+            The name of the file in the snapshot
+        data : str | bytes
+            The content of the file
+        """
+        if self._archive is not None:
+            self._archive.write_raw(f"{timestamp}/{file_name}", data)
+            return
+
+        with open(os.path.join(self.snapshot_path(timestamp), file_name), "w" if isinstance(data, str) else "wb") as f:
+            f.write(data)
+
     def save_fetching_report(self,
-                             folder: str,
+                             timestamp: int,
                              targets: list[str],
                              coords: list[str],
                              statuses: list[bool],
-                             codes: list[int]):
+                             codes: list[int],
+                             timeouts: list[bool] | None = None):
         report = pd.DataFrame({"provider": [self.provider_name] * len(targets),
                                "target": targets,
                                "coords": coords,
                                "status": statuses,
-                               "code": codes})
-        report.to_csv(os.path.join(folder, FETCHING_REPORT_NAME), index=False)
+                               "code": codes,
+                               "timeout": timeouts if timeouts is not None else [False] * len(targets)})
+        self.save_snapshot_file(timestamp=timestamp,
+                                file_name=FETCHING_REPORT_NAME,
+                                data=report.to_csv(index=False))
 
     @property
     def provider_name(self):
@@ -162,45 +266,91 @@ class BaseParallelExecutionProvider(BaseProvider):
         return [item for chunk in chunk_results for item in chunk]
 
 
-def _process_sensor_chunk(sensors: list[Sensor],
-                          download_path: str,
-                          get_json: Callable[[float, float], Awaitable[str | bytes | None]]) -> list[object]:
+async def _process_sensor(sensor: Sensor,
+                          get_json: Callable[[float, float], Awaitable[str | bytes | None]],
+                          on_response: Callable[[Sensor, Response], None] | None = None) -> Response:
+    resp = await get_json(sensor.lon, sensor.lat)
+    if resp.ok:
+        if not isinstance(resp.payload, (str, bytes)):
+            console.log(f"Expected str or bytes for {sensor.id}, got {type(resp.payload).__name__}")
+            resp.set_failed()
+    else:
+        console.log(f"Wasn't able to get data for {sensor.id}")
 
-    async def _process_sensor(sensor: Sensor) -> Response:
-        resp = await get_json(sensor.lon, sensor.lat)
-        if resp.ok:
-            try:
-                file_mode = None
-                if isinstance(resp.payload, str):
-                    file_mode = "w"
-                elif isinstance(resp.payload, bytes):
-                    file_mode = "wb"
-                else:
-                    raise TypeError(f"Expected str or bytes, got {type(resp.payload).__name__}")
-
-                with open(os.path.join(download_path, f"{sensor.id}.json"), file_mode) as f:
-                    f.write(resp.payload)
-            except Exception:
-                resp.set_failed()
-                return resp
+    if on_response is not None:
+        on_response(sensor, resp)
+    return resp
 
-        else:
-            console.log(f"Wasn't able to get data for {sensor.id}")
-        return resp
+
+def _process_sensor_chunk(sensors: list[Sensor],
+                          get_json: Callable[[float, float], Awaitable[str | bytes | None]],
+                          request_interface: RequestInterface | None = None,
+                          rate_limiter: RateLimiter | None = None,
+                          deadline: float | None = None) -> list[object]:
+    if request_interface is not None:
+        # share of provider limits for this process
+        request_interface.rate_limiter = rate_limiter
 
     async def _process(sensors: list[Sensor]) -> list[Response]:
-        jobs = [_process_sensor(sensor) for sensor in sensors]
-        return await asyncio.gather(*jobs, return_exceptions=True)
+        jobs = [_process_sensor(sensor, get_json) for sensor in sensors]
+        if request_interface is None:
+            return await gather_until(jobs, deadline)
+
+        # all requests of the chunk reuse connections of one session
+        async with request_interface.shared_session():
+            return await gather_until(jobs, deadline)
 
+    # payloads are returned to the main process, which is the only writer of the snapshot archive.
+    # So all payloads are copied between processes once, `concurrency` mode avoids it
     return asyncio.run(_process(sensors))
 
 
+async def _process_sensors_in_loop(sensors: list[Sensor],
+                                   get_json: Callable[[float, float], Awaitable[str | bytes | None]],
+                                   concurrency: int,
+                                   on_response: Callable[[Sensor, Response], None],
+                                   request_interface: RequestInterface | None = None,
+                                   deadline: float | None = None) -> list[object]:
+    """Processes all sensors in the running event loop. Number of simultaneous requests is limited by `concurrency`.
+    Each response is passed to `on_response` as soon as it is received
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _process_limited(sensor: Sensor) -> Response:
+        async with semaphore:
+            return await _process_sensor(sensor, get_json, on_response)
+
+    jobs = [_process_limited(sensor) for sensor in sensors]
+    if request_interface is None:
+        return await gather_until(jobs, deadline)
+
+    async with request_interface.shared_session():
+        return await gather_until(jobs, deadline)
+
+
 class BaseForecastInPointProvider(BaseParallelExecutionProvider):
+    # responses are appended to the snapshot archive from the event loop, so each payload touches disk once
+    streams_snapshot = True
+
     def __init__(self,
                  sensors: list[Sensor],
                  process_num: int | None = None,
                  chunk_size: int | None = None,
+                 concurrency: int | None = None,
                  **kwargs):
+        """
+        Parameters
+        ----------
+        sensors : list[Sensor]
+            Sensors to request forecast for
+        process_num : int | None
+            The number of processes to use for downloading the data
+        chunk_size : int | None
+            The number of sensors that are processed by a process at once
+        concurrency : int | None
+            If it is set, then all sensors are processed in the main event loop with this number of simultaneous
+            requests instead of a process pool
+        """
         process_num = os.cpu_count() if process_num is None else process_num
         chunk_size = len(sensors) // process_num if chunk_size is None else chunk_size
 
@@ -209,24 +359,54 @@ class BaseForecastInPointProvider(BaseParallelExecutionProvider):
                          **kwargs)
 
         self.sensors = sensors
+        self._concurrency = concurrency
         console.log(f"Requesting forecast for {len(self.sensors)} sensors")
 
     @abstractmethod
     async def get_json_forecast_in_point(self, lon: float, lat: float) -> str | bytes | None:
         raise NotImplementedError("Getting JSON forecast in point was not implemented")
 
+    def _save_response(self, timestamp: int, sensor: Sensor, resp: Response):
+        if not resp.ok:
+            return
+
+        try:
+            self.save_snapshot_file(timestamp=timestamp, file_name=f"{sensor.id}.json", data=resp.payload)
+        except Exception as e:
+            console.log(f"Wasn't able to save data for {sensor.id}: {e}")
+            resp.set_failed()
+
     @override
     async def fetch_job(self, timestamp: int):
-        snapshot_path = self.snapshot_path(timestamp)
+        save_response = partial(self._save_response, timestamp)
+
+        request_interface = self if isinstance(self, RequestInterface) else None
+
+        if self._concurrency is not None:
+            responses = await _process_sensors_in_loop(sensors=self.sensors,
+                                                       get_json=self.get_json_forecast_in_point,
+                                                       concurrency=self._concurrency,
+                                                       on_response=save_response,
+                                                       request_interface=request_interface,
+                                                       deadline=self._snapshot_deadline)
+        else:
+            rate_limiter = None
+            if request_interface is not None and request_interface.rate_limiter is not None:
+                rate_limiter = request_interface.rate_limiter.split(self._process_num)
 
-        op = partial(_process_sensor_chunk,
-                     download_path=snapshot_path,
-                     get_json=self.get_json_forecast_in_point)
+            op = partial(_process_sensor_chunk,
+                         get_json=self.get_json_forecast_in_point,
+                         request_interface=request_interface,
+                         rate_limiter=rate_limiter,
+                         deadline=self._snapshot_deadline)
 
-        responses = await self.execute_with_batches(self.sensors, op)
+            responses = await self.execute_with_batches(self.sensors, op)
+            for sensor, resp in zip(self.sensors, responses):
+                save_response(sensor, resp)
 
-        self.save_fetching_report(folder=snapshot_path,
+        self.save_fetching_report(timestamp=timestamp,
                                   targets=[sensor.id for sensor in self.sensors],
                                   coords=[f"lat:{sensor.lat} lon:{sensor.lon}" for sensor in self.sensors],
                                   statuses=[resp.ok for resp in responses],
-                                  codes=[resp.status for resp in responses])
+                                  codes=[resp.status for resp in responses],
+                                  timeouts=[resp.timed_out for resp in responses])
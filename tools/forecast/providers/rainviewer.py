@@ -2,10 +2,15 @@ import aiohttp
 import asyncio
 import datetime
 import json
+import math
 import os
 
-from forecast.providers.provider import BaseParallelExecutionProvider
+from forecast.providers.provider import BaseParallelExecutionProvider, gather_until
+from forecast.sensor import Sensor
+from forecast.utils.rate_limiter import parse_retry_after
 from forecast.utils.req_interface import RequestInterface, Response
+from forecast.utils.retry import RetryPolicy
+from functools import partial
 from itertools import product
 from rich.console import Console
 from typing_extensions import override  # for python <3.12
@@ -19,39 +24,58 @@ DOWNLOAD_TRY_NUM = 5
 DOWNLOAD_TRY_SLEEP = 1
 MAX_CONNECTIONS_PER_SESSION = 10
 MAX_WAIT_TIME = 5 * 60
+WEB_MERCATOR_BOUND = 85.06
 
 
 def get_current_time() -> int:
     return int(datetime.datetime.now().timestamp())
 
 
-async def _try_download_file(session: aiohttp.ClientSession, url: str) -> Response:
-    sleep_time = DOWNLOAD_TRY_SLEEP
-    resp = Response()
-    for attempt in range(DOWNLOAD_TRY_NUM):
+def coord_to_tile(lon: float, lat: float, zoom: int) -> tuple[int, int]:
+    """Returns web mercator tile that contains the coordinate. Math is the same as
+    `metrics.utils.coords.coord_to_tile_pixel`, so downloaded tiles match tiles read by metrics
+    """
+    scale = 2 ** zoom
+
+    lat = min(WEB_MERCATOR_BOUND, max(-WEB_MERCATOR_BOUND, lat))
+    siny = math.sin((lat * math.pi) / 180.0)
+
+    x = scale * (0.5 + lon / 360.0)
+    y = scale * (0.5 - math.log((1 + siny) / (1 - siny)) / (4 * math.pi))
+
+    # points on the right and bottom edges of the map belong to the last tile
+    return (min(max(int(x), 0), scale - 1), min(max(int(y), 0), scale - 1))
+
+
+def get_sensor_tiles(sensors: list[Sensor], zoom: int) -> list[tuple[int, int]]:
+    """Returns sorted list of unique tiles that contain sensors"""
+    return sorted({coord_to_tile(lon=sensor.lon, lat=sensor.lat, zoom=zoom) for sensor in sensors})
+
+
+async def _try_download_file(session: aiohttp.ClientSession, url: str, retry_policy: RetryPolicy) -> Response:
+
+    async def _try_download() -> Response:
         try:
             async with session.get(url) as response:
                 if response.status == 200:
                     return Response(status=response.status,
                                     payload=(await response.read()))
-                else:
-                    resp = Response(status=response.status)
-        except Exception as ex:
-            console.log(f"Wasn't able to download `{url}`. "
-                        f"Attempt {attempt + 1} of {DOWNLOAD_TRY_NUM}. "
-                        f"Next try in {sleep_time} seconds. "
-                        f"Exception: {str(ex)}")
 
-            await asyncio.sleep(sleep_time)
-            sleep_time *= 2
+                return Response(status=response.status,
+                                retry_after=parse_retry_after(response.headers.get("Retry-After")))
+        except Exception as ex:
+            console.log(f"Wasn't able to download `{url}`. Exception: {str(ex)}")
+            return Response()
 
-    return resp
+    return await retry_policy.run(_try_download)
 
 
-def _download_tiles_batch(jobs: list[tuple[str, str]]) -> list[Response]:
+def _download_tiles_batch(jobs: list[tuple[str, str]],
+                          retry_policy: RetryPolicy,
+                          deadline: float | None = None) -> list[Response]:
 
     async def download_one_tile(session: aiohttp.ClientSession, url: str, file_path: str) -> Response:
-        resp = await _try_download_file(session, url)
+        resp = await _try_download_file(session, url, retry_policy)
         if resp.ok:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             with open(file_path, "wb") as file:
@@ -70,7 +94,7 @@ def _download_tiles_batch(jobs: list[tuple[str, str]]) -> list[Response]:
                 url, file_path = job
                 run_jobs.append(download_one_tile(session, url, file_path))
 
-            return await asyncio.gather(*run_jobs)
+            return await gather_until(run_jobs, deadline)
 
     return asyncio.run(download_batch())
 
@@ -79,12 +103,29 @@ class RainViewer(BaseParallelExecutionProvider, RequestInterface):
     TILE_SIZE = 256
     METADATA_RETRY_DELAY = 15
 
-    def __init__(self, token: str, zoom: int, chunk_size: int | None = None, *args, **kwargs):
+    retry_policy = RetryPolicy(max_attempts=DOWNLOAD_TRY_NUM, base_delay=DOWNLOAD_TRY_SLEEP)
+
+    def __init__(self,
+                 token: str,
+                 zoom: int,
+                 chunk_size: int | None = None,
+                 sensors: list[Sensor] | None = None,
+                 *args, **kwargs):
         chunk_size = chunk_size if chunk_size is not None else BATCH_SIZE
 
         super().__init__(chunk_size=chunk_size, *args, **kwargs)
         self.token = token
         self.zoom = zoom
+        # when sensors are set, only tiles that contain them are downloaded
+        self.tiles = None
+        if sensors is not None:
+            self.tiles = get_sensor_tiles(sensors=sensors, zoom=zoom)
+
+    def _get_tiles(self) -> list[tuple[int, int]]:
+        if self.tiles is not None:
+            return self.tiles
+
+        return list(product(range(0, 2 ** self.zoom), range(0, 2 ** self.zoom)))
 
     async def _get_metadata(self) -> dict[object, object] | None:
         url = f"https://api.rainviewer.com/private/{self.token}/weather-maps.json"
@@ -131,7 +172,7 @@ class RainViewer(BaseParallelExecutionProvider, RequestInterface):
 
         jobs = []
         coord_dump = []
-        for tile_x, tile_y in product(range(0, 2 ** self.zoom), range(0, 2 ** self.zoom)):
+        for tile_x, tile_y in self._get_tiles():
             tile_rel_path = os.path.join(str(self.zoom), str(tile_x), f"{tile_y}.png")
 
             mask_tile_url = f"{metadata['host']}/v2/coverage/0/{RainViewer.TILE_SIZE}/{self.zoom}/{tile_x}/{tile_y}/0/0_0.png"
@@ -152,15 +193,18 @@ class RainViewer(BaseParallelExecutionProvider, RequestInterface):
         console.log(f"Downloading {len(jobs)} tiles")
 
         responses = await self.execute_with_batches(args=jobs,
-                                                    chunk_func=_download_tiles_batch)
+                                                    chunk_func=partial(_download_tiles_batch,
+                                                                       retry_policy=self.retry_policy,
+                                                                       deadline=self._snapshot_deadline))
 
         # Count successful responses
         valid_results = len([resp for resp in responses if resp.ok])
         console.log(f"Downloaded {valid_results} tiles")
         console.log(f"Errors: {len(jobs) - valid_results}")
 
-        self.save_fetching_report(folder=download_path,
+        self.save_fetching_report(timestamp=snapshot_timestamp,
                                   targets=[job[0] for job in jobs],
                                   coords=coord_dump,
                                   statuses=[resp.ok for resp in responses],
-                                  codes=[resp.status for resp in responses])
+                                  codes=[resp.status for resp in responses],
+                                  timeouts=[resp.timed_out for resp in responses])
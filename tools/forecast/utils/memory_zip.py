@@ -1,20 +1,22 @@
 import zipfile
 
 from io import BytesIO
+from typing import BinaryIO
 
 
-class MemoryZip:
+class ZipWriter:
     """
-    MemoryZip is a class that allows to store data in a zip file in memory.
+    ZipWriter is a class that allows to write data into a zip file entry by entry.
     """
 
-    def __init__(self):
-        self._buffer = BytesIO()
-        self._zf = zipfile.ZipFile(self._buffer, mode="w", compression=zipfile.ZIP_DEFLATED)
-
-    @property
-    def buffer(self) -> BytesIO:
-        return self._buffer
+    def __init__(self, target: str | BinaryIO):
+        """
+        Parameters
+        ----------
+        target : str | BinaryIO
+            The path to the zip file or a file object to write it into. Existing file is overwritten.
+        """
+        self._zf = zipfile.ZipFile(target, mode="w", compression=zipfile.ZIP_DEFLATED)
 
     def write_raw(self, file_path: str, data: str | bytes):
         """
@@ -34,3 +36,17 @@ class MemoryZip:
         Close the zip file.
         """
         self._zf.close()
+
+
+class MemoryZip(ZipWriter):
+    """
+    MemoryZip is a class that allows to store data in a zip file in memory.
+    """
+
+    def __init__(self):
+        self._buffer = BytesIO()
+        super().__init__(self._buffer)
+
+    @property
+    def buffer(self) -> BytesIO:
+        return self._buffer
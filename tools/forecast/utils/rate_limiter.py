@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+# statuses that mean the provider is overloaded or the quota is exceeded
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+# minimum time between two decreases of the concurrency limit, so a burst of throttled responses
+# to requests that were sent together halves the limit only once
+DECREASE_INTERVAL = 1.0  # seconds
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parses `Retry-After` header value in seconds. HTTP-date values are not supported
+
+    Parameters
+    ----------
+    value : str | None
+        Header value
+
+    Returns
+    -------
+    float | None
+        Delay in seconds or `None` if header is missing or can't be parsed
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    """Limits requests of a provider by a token bucket of `requests_per_second` and by a number of requests
+    in flight. Limit of requests in flight is adapted with AIMD: it grows by one request per window
+    of successful requests and halves when the provider throttles requests (429 or 5xx status).
+
+    Limiter is bound to an event loop on the first use. When it's copied into another process,
+    then only parameters are copied.
+    """
+
+    def __init__(self,
+                 requests_per_second: float | None = None,
+                 max_in_flight: int | None = None,
+                 min_in_flight: int = 1) -> None:
+        """
+        Parameters
+        ----------
+        requests_per_second : float | None
+            Maximum rate of requests. If it is `None`, then rate is not limited
+        max_in_flight : int | None
+            Maximum number of simultaneous requests. If it is `None`, then only rate is limited
+        min_in_flight : int
+            Minimum number of simultaneous requests after backing off
+        """
+        assert requests_per_second is None or requests_per_second > 0
+        assert max_in_flight is None or max_in_flight >= min_in_flight >= 1
+
+        self._requests_per_second = requests_per_second
+        self._max_in_flight = max_in_flight
+        self._min_in_flight = min_in_flight
+        self._reset()
+
+    def _reset(self):
+        # capacity of one second of requests smooths startup bursts
+        self._capacity = max(1.0, self._requests_per_second or 0.0)
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+
+        self._limit = float(self._max_in_flight) if self._max_in_flight is not None else None
+        self._in_flight = 0
+        self._decreased_at = float("-inf")
+        self._condition: asyncio.Condition | None = None
+
+    def __getstate__(self) -> dict:
+        return {"requests_per_second": self._requests_per_second,
+                "max_in_flight": self._max_in_flight,
+                "min_in_flight": self._min_in_flight}
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    @property
+    def requests_per_second(self) -> float | None:
+        return self._requests_per_second
+
+    @property
+    def limit(self) -> int | None:
+        """Current limit of requests in flight"""
+        return int(self._limit) if self._limit is not None else None
+
+    def split(self, parts: int) -> "RateLimiter":
+        """Returns limiter with an equal share of limits, so `parts` processes together keep the original limits
+
+        Parameters
+        ----------
+        parts : int
+            Number of processes that share limits
+
+        Returns
+        -------
+        RateLimiter
+            Limiter for a single process
+        """
+        parts = max(1, parts)
+        requests_per_second = self._requests_per_second / parts if self._requests_per_second is not None else None
+        max_in_flight = None
+        if self._max_in_flight is not None:
+            max_in_flight = max(self._min_in_flight, self._max_in_flight // parts)
+
+        return RateLimiter(requests_per_second=requests_per_second,
+                           max_in_flight=max_in_flight,
+                           min_in_flight=self._min_in_flight)
+
+    async def _acquire_token(self):
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+
+            if self._requests_per_second is None:
+                return
+
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._requests_per_second)
+            self._updated_at = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+
+            await asyncio.sleep((1.0 - self._tokens) / self._requests_per_second)
+
+    @asynccontextmanager
+    async def request(self) -> AsyncIterator[None]:
+        """Waits until a request is allowed and holds its slot until the context is closed"""
+        if self._limit is None:
+            await self._acquire_token()
+            yield
+            return
+
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+            self._in_flight += 1
+
+        try:
+            await self._acquire_token()
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def report(self, status: int, retry_after: float | None = None):
+        """Updates limits by the response status
+
+        Parameters
+        ----------
+        status : int
+            Http status of the response, 0 if request failed for any other reason
+        retry_after : float | None
+            Delay in seconds requested by the provider. No requests are sent until it passes
+        """
+        if retry_after is not None:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+        if self._limit is None:
+            return
+
+        if status in THROTTLE_STATUSES:
+            now = time.monotonic()
+            if now - self._decreased_at >= DECREASE_INTERVAL:
+                self._limit = max(float(self._min_in_flight), self._limit / 2)
+                self._decreased_at = now
+        elif 200 <= status < 300:
+            self._limit = min(float(self._max_in_flight), self._limit + 1.0 / self._limit)
@@ -1,37 +1,96 @@
 import aiohttp
 import json
 
-from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from forecast.utils.rate_limiter import RateLimiter, parse_retry_after
+from forecast.utils.response import Response
+from forecast.utils.retry import RetryPolicy
 from rich.console import Console
-from typing import Awaitable, Callable
+from typing import AsyncIterator, Awaitable, Callable
 
 
 console = Console()
 
 
-@dataclass
-class Response:
-    status: int = 0  # http status code, 0 if failed for any other reason
-    payload: bytes | str | None = None
-
-    @property
-    def ok(self) -> bool:
-        return (200 <= self.status < 300) and (self.payload is not None)
-
-    def set_failed(self):
-        self.status = 0
+LIMIT_PER_HOST = 64
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 60  # seconds
 
 
 class RequestInterface():
+    # maximum number of simultaneous connections to a host that are opened by a shared session
+    limit_per_host: int = LIMIT_PER_HOST
+    # limiter of requests rate and concurrency, requests are not limited if it is `None`
+    rate_limiter: RateLimiter | None = None
+    # policy of retrying failed requests
+    retry_policy: RetryPolicy = RetryPolicy()
+
+    _shared_session: aiohttp.ClientSession | None = None
+
+    @asynccontextmanager
+    async def shared_session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """Opens session that is used by all requests of the interface until the context is closed.
+        Connections are kept alive and DNS responses are cached, so requests to the same host
+        don't repeat TCP and TLS handshakes. Session is bound to the running event loop
+        """
+        connector = aiohttp.TCPConnector(limit=0,
+                                         limit_per_host=self.limit_per_host,
+                                         ttl_dns_cache=DNS_CACHE_TTL,
+                                         keepalive_timeout=KEEPALIVE_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            self._shared_session = session
+            try:
+                yield session
+            finally:
+                self._shared_session = None
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """Returns shared session if it's opened, otherwise opens a session for a single request"""
+        if self._shared_session is not None:
+            yield self._shared_session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
 
     async def _run_with_retries(self,
-                                do_request: Callable[[], Awaitable[Response]],
-                                n: int = 5) -> Response:
-        for _ in range(n):
-            resp = await do_request()
-            if resp.payload is not None:
-                return resp
-        return resp  # return latest response if no valid response encountered
+                                do_request: Callable[[], Awaitable[Response]]) -> Response:
+        return await self.retry_policy.run(do_request)
+
+    async def _send(self,
+                    session: aiohttp.ClientSession,
+                    method: str,
+                    url: str,
+                    timeout: int,
+                    **kwargs) -> Response:
+        """Does a single http request. Waits for the rate limiter and reports the response status to it
+        """
+        async with self._limit_rate():
+            try:
+                client_timeout = aiohttp.ClientTimeout(total=timeout)
+                async with session.request(method, url, timeout=client_timeout, **kwargs) as resp:
+                    if resp.ok:
+                        response = Response(status=resp.status,
+                                            payload=(await resp.read()))
+                    else:
+                        console.log(f"{resp.status} - {url}")
+                        response = Response(status=resp.status,
+                                            retry_after=parse_retry_after(resp.headers.get("Retry-After")))
+            except Exception:
+                response = Response()
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.report(status=response.status, retry_after=response.retry_after)
+
+        return response
+
+    @asynccontextmanager
+    async def _limit_rate(self) -> AsyncIterator[None]:
+        if self.rate_limiter is None:
+            yield
+        else:
+            async with self.rate_limiter.request():
+                yield
 
     async def _native_get(self, url: str,
                           headers: dict[str, str] | None = None,
@@ -39,25 +98,11 @@ class RequestInterface():
                           timeout: int = 30) -> Response:
         """Does http GET-request to specified url
         """
-        async with aiohttp.ClientSession() as session:
-
-            client_timeout = aiohttp.ClientTimeout(total=timeout)
+        async with self._session() as session:
 
             async def _try_download() -> Response:
-                try:
-                    async with session.get(url,
-                                           headers=headers,
-                                           params=params,
-                                           timeout=client_timeout) as resp:
-                        if resp.ok:
-                            return Response(status=resp.status,
-                                            payload=(await resp.read()))
-                        else:
-                            console.log(f"{resp.status} - {url}")
-                        return Response(status=resp.status)
+                return await self._send(session, "GET", url, timeout, headers=headers, params=params)
 
-                except Exception as e:
-                    return Response()
             return await self._run_with_retries(_try_download)
 
     async def _native_post(self, url: str,
@@ -66,22 +111,9 @@ class RequestInterface():
                            timeout: int = 30) -> Response:
         """Does http POST-request to specified url
         """
-        async with aiohttp.ClientSession() as session:
+        async with self._session() as session:
 
             async def _try_download() -> Response:
-                try:
-                    client_timeout = aiohttp.ClientTimeout(total=timeout)
-                    async with session.post(url,
-                                            headers=headers,
-                                            json=body,
-                                            timeout=client_timeout) as resp:
-                        if resp.ok:
-                            return Response(status=resp.status,
-                                            payload=(await resp.read()))
-                        else:
-                            console.log(f"{resp.status} - {url}")
-                        return Response(status=resp.status)
-                except Exception as e:
-                    return Response()
+                return await self._send(session, "POST", url, timeout, headers=headers, json=body)
 
             return await self._run_with_retries(_try_download)
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class Response:
+    status: int = 0  # http status code, 0 if failed for any other reason
+    payload: bytes | str | None = None
+    retry_after: float | None = None  # delay in seconds requested by the server
+    timed_out: bool = False  # request was cancelled by the snapshot deadline
+
+    @property
+    def ok(self) -> bool:
+        return (200 <= self.status < 300) and (self.payload is not None)
+
+    def set_failed(self):
+        self.status = 0
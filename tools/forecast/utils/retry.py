@@ -0,0 +1,86 @@
+import asyncio
+import random
+import time
+
+from dataclasses import dataclass, field, replace
+from forecast.utils.response import Response
+from typing import Awaitable, Callable
+
+
+# 0 is a status of requests that failed without a response (connection errors, timeouts)
+RETRYABLE_STATUSES = frozenset({0, 408, 425, 429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Policy of retrying failed requests with exponential backoff and full jitter"""
+
+    max_attempts: int = 5               # maximum number of attempts including the first one
+    base_delay: float = 1.0             # delay before the first retry in seconds
+    max_delay: float = 30.0             # maximum delay between attempts in seconds
+    jitter: bool = True                 # randomize delays, so parallel requests don't retry at the same time
+    retryable_statuses: frozenset[int] = field(default=RETRYABLE_STATUSES)
+    deadline: float | None = None       # unix time after which requests are not retried
+
+    def with_deadline(self, deadline: float | None) -> "RetryPolicy":
+        """Returns a copy of the policy with another deadline"""
+        return replace(self, deadline=deadline)
+
+    def is_retryable(self, response: Response) -> bool:
+        """Checks if a failed request can succeed after a retry"""
+        return response.status in self.retryable_statuses
+
+    def get_delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """Returns delay before the next attempt
+
+        Parameters
+        ----------
+        attempt : int
+            Number of the failed attempt starting from 0
+        retry_after : float | None
+            Delay in seconds requested by the server. It's used as a lower bound of the delay
+
+        Returns
+        -------
+        float
+            Delay in seconds
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
+
+    async def run(self, do_request: Callable[[], Awaitable[Response]]) -> Response:
+        """Does request until it succeeds, fails with a non-retryable status, runs out of attempts or
+        the next attempt can't be done before the deadline
+
+        Parameters
+        ----------
+        do_request : Callable[[], Awaitable[Response]]
+            Function that does a single attempt
+
+        Returns
+        -------
+        Response
+            Returns successful response or the last failed one
+        """
+        resp = Response()
+        for attempt in range(self.max_attempts):
+            if self.deadline is not None and time.time() >= self.deadline:
+                break
+
+            resp = await do_request()
+            if resp.ok or not self.is_retryable(resp) or attempt + 1 == self.max_attempts:
+                break
+
+            delay = self.get_delay(attempt=attempt, retry_after=resp.retry_after)
+            if self.deadline is not None and time.time() + delay >= self.deadline:
+                break
+
+            await asyncio.sleep(delay)
+
+        return resp